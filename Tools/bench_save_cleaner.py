@@ -0,0 +1,230 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource # Not available on Windows
+except ImportError:
+    resource = None
+
+import save_cleaner
+import json_codec
+
+BENCH_RESULTS_VERSION = 2
+
+# The editor's data file, benchmarked with the JSON codec alongside the synthetic saves.
+EMPIRE_JSON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Mods", "Empire", "empire.json")
+
+FIRST_NAMES = ["Benji", "Kyle", "Sam", "Jessi", "Peter", "Chloe", "Ludwig", "Mick", "Fiona", "Doris", "Marco", "Jen"]
+LAST_NAMES = ["Coleman", "Cooley", "Thompson", "Waters", "File", "Bowers", "Meyer", "Lubbin", "Hancock", "Simmons", "Baron", "Heinz"]
+REGIONS = ["Northtown", "Westville", "Downtown", "Docks", "Suburbia", "Uptown"]
+
+
+def synthetic_base_data(npc_id, rng):
+    """A BaseData JSON string shaped like the ones the game nests in NPCs.json."""
+    return json.dumps({
+        "DataType": "NPCData",
+        "DataVersion": 0,
+        "GameVersion": "0.3.6f6",
+        "ID": npc_id,
+        "FirstName": rng.choice(FIRST_NAMES),
+        "LastName": rng.choice(LAST_NAMES),
+        "Region": rng.choice(REGIONS),
+        "Relationship": {"RelationDelta": round(rng.uniform(0, 5), 3), "Unlocked": rng.random() < 0.5, "UnlockType": rng.randint(0, 2)},
+        "Customer": {"Dependence": round(rng.random(), 4), "ProductAffinities": [round(rng.uniform(-1, 1), 3) for _ in range(3)]},
+    })
+
+
+def synthetic_npc(npc_id, rng, malformed=False):
+    """One NPCs.json record. Malformed records carry a BaseData string that is not valid JSON."""
+    base_data = synthetic_base_data(npc_id, rng)
+    if malformed:
+        base_data = base_data[:rng.randint(1, len(base_data) - 1)]
+    return {
+        "DataType": "NPCData",
+        "DataVersion": 0,
+        "GameVersion": "0.3.6f6",
+        "BaseData": base_data,
+        "Inventory": {"Items": [{"ID": rng.choice(["cash", "ogkush", "cuke", "banana"]), "Quantity": rng.randint(1, 20)}]},
+        "Health": {"Health": 100.0, "IsDead": False, "DaysPassedSinceDeath": 0},
+    }
+
+
+def generate_save(path, records, dup_ratio=0.05, malformed_ratio=0.01, seed=0):
+    """
+    Writes a synthetic NPCs.json with `records` NPCs to path, one record at a
+    time so even 1M-record saves need no more memory than a single NPC.
+    dup_ratio of the records reuse the ID of an earlier NPC and malformed_ratio
+    of them have an undecodable BaseData string. Returns the file size in bytes.
+    """
+    rng = random.Random(seed)
+    unique_ids = max(1, int(records * (1 - dup_ratio)))
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{\n    "DataType": "NPCCollectionData",\n    "DataVersion": 0,\n    "GameVersion": "0.3.6f6",\n    "NPCs": [')
+        for i in range(records):
+            if i < unique_ids:
+                npc_id = f"npc_{i:07d}"
+            else:
+                npc_id = f"npc_{rng.randrange(unique_ids):07d}"
+            npc = synthetic_npc(npc_id, rng, malformed=rng.random() < malformed_ratio)
+            f.write(("," if i else "") + "\n        " + save_cleaner._indented_dump(npc, 2))
+        f.write("\n    ]\n}" if records else "]\n}")
+    return os.path.getsize(path)
+
+
+def _peak_rss_mb():
+    """
+    Peak resident set size in MiB of the current process or of any finished
+    child (the BaseData decoding pool with --jobs > 1), whichever is largest;
+    None when it cannot be measured. This is the biggest single process, not
+    the sum over processes.
+    """
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in bytes on macOS and in KiB everywhere else.
+    return round(peak / (1 << 20) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def _measure_clean(file_path, mode, jobs):
+    """Runs in a fresh process so the peak RSS belongs to this clean alone."""
+    start = time.perf_counter()
+    result = save_cleaner.clean_npcs_file(file_path, mode, jobs)
+    seconds = time.perf_counter() - start
+    return seconds, result.records, result.removed, _peak_rss_mb()
+
+
+def _run_in_fresh_process(function, *args):
+    """
+    Calls function(*args) in a newly spawned process and returns its result.
+    Spawned children inherit the parent's peak RSS on Linux, so nothing big is
+    ever loaded in the benchmark process itself.
+    """
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(function, *args).result()
+
+
+def bench_mode(source_path, work_dir, mode, jobs=1, repeat=1):
+    """
+    Cleans fresh copies of source_path `repeat` times with one cleaner mode and
+    returns the best run as a dict of wall time, peak RSS and throughput.
+    """
+    best = None
+    for _ in range(repeat):
+        target = os.path.join(work_dir, save_cleaner.NPCS_FILE_NAME)
+        shutil.copyfile(source_path, target)
+        if os.path.exists(save_cleaner.sidecar_path(target)):
+            os.remove(save_cleaner.sidecar_path(target))
+        seconds, records, removed, peak_rss_mb = _run_in_fresh_process(_measure_clean, target, mode, jobs)
+        if best is None or seconds < best["seconds"]:
+            best = {
+                "mode": mode,
+                "jobs": jobs,
+                "seconds": round(seconds, 4),
+                "peak_rss_mb": peak_rss_mb,
+                "records_per_second": round(records / seconds) if seconds > 0 else None,
+                "records": records,
+                "removed": removed,
+            }
+    return best
+
+
+def _best_seconds(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def bench_codec(path, repeat=1):
+    """
+    Times parsing path and serializing it back with indent=4, once with the
+    standard json module and once with json_codec's active backend, and checks
+    that both serializations are identical.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    data = json.loads(text)
+    row = {
+        "file": os.path.basename(path),
+        "file_bytes": len(text.encode('utf-8')),
+        "backend": json_codec.BACKEND,
+        "json_parse_seconds": round(_best_seconds(lambda: json.loads(text), repeat), 4),
+        "codec_parse_seconds": round(_best_seconds(lambda: json_codec.loads(text), repeat), 4),
+        "json_dump_seconds": round(_best_seconds(lambda: json.dumps(data, indent=4), repeat), 4),
+        "codec_dump_seconds": round(_best_seconds(lambda: json_codec.dumps(data, indent=4), repeat), 4),
+        "identical_output": json_codec.dumps(data, indent=4) == json.dumps(data, indent=4),
+    }
+    print(f"{row['file']:<20} {json_codec.BACKEND:<7} parse {row['json_parse_seconds']:.4f} -> {row['codec_parse_seconds']:.4f} s  "
+          f"dump {row['json_dump_seconds']:.4f} -> {row['codec_dump_seconds']:.4f} s  identical: {row['identical_output']}")
+    return row
+
+
+def run_benchmarks(sizes, modes, dup_ratio=0.05, malformed_ratio=0.01, jobs=1, repeat=1, seed=0, work_dir=None, codec_files=()):
+    """
+    Generates one synthetic save per size and benchmarks every mode on it, and
+    the JSON codec on it and on each of codec_files. Returns the results document.
+    """
+    results = []
+    codec = [_run_in_fresh_process(bench_codec, path, repeat) for path in codec_files if os.path.isfile(path)]
+    with tempfile.TemporaryDirectory(dir=work_dir) as temp_dir:
+        source_path = os.path.join(temp_dir, "source.json")
+        for size in sizes:
+            file_bytes = generate_save(source_path, size, dup_ratio, malformed_ratio, seed)
+            codec.append(dict(_run_in_fresh_process(bench_codec, source_path, repeat), size=size))
+            for mode in modes:
+                row = bench_mode(source_path, temp_dir, mode, jobs, repeat)
+                row.update({"size": size, "file_bytes": file_bytes, "dup_ratio": dup_ratio, "malformed_ratio": malformed_ratio})
+                results.append(row)
+                print(f"{size:>8} records  {mode:<11}  {row['seconds']:>8.3f} s  "
+                      f"{row['records_per_second'] or 0:>9} rec/s  peak RSS {row['peak_rss_mb']} MiB")
+    return {
+        "version": BENCH_RESULTS_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "codec_backend": json_codec.BACKEND,
+        "results": results,
+        "codec": codec,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks save_cleaner modes on synthetic NPCs.json files.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], metavar="N", help="NPC record counts to benchmark (default: 1000 10000 100000; up to 1000000 is supported).")
+    parser.add_argument("--modes", nargs="+", default=list(save_cleaner.CLEANERS), choices=list(save_cleaner.CLEANERS), help="Cleaner modes to benchmark (default: all).")
+    parser.add_argument("--dup-ratio", type=float, default=0.05, help="Share of records that reuse an earlier NPC's ID (default: 0.05).")
+    parser.add_argument("--malformed", type=float, default=0.01, help="Share of records with an undecodable BaseData string (default: 0.01).")
+    parser.add_argument("--jobs", type=int, default=1, metavar="N", help="Passed to the cleaner's --jobs (default: 1).")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per mode and size; the fastest is reported (default: 1).")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the synthetic saves (default: 0).")
+    parser.add_argument("--work-dir", default=None, help="Folder for the temporary save files (default: system temp folder).")
+    parser.add_argument("--codec-files", nargs="*", default=[EMPIRE_JSON_PATH], metavar="PATH", help="Extra JSON files to benchmark the JSON codec on (default: Mods/Empire/empire.json).")
+    parser.add_argument("--generate", metavar="PATH", help="Only write one synthetic save of the first --sizes value to PATH.")
+    parser.add_argument("--out", default="bench_results.json", help="Where to write the JSON results (default: bench_results.json).")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    args = parse_args()
+    if args.generate:
+        size = generate_save(args.generate, args.sizes[0], args.dup_ratio, args.malformed, args.seed)
+        print(f"Wrote {args.sizes[0]} NPC records ({size} bytes) to '{args.generate}'.")
+    else:
+        document = run_benchmarks(args.sizes, args.modes, args.dup_ratio, args.malformed, max(1, args.jobs), max(1, args.repeat), args.seed, args.work_dir, args.codec_files)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=4)
+        print(f"\nResults written to '{args.out}'.")
@@ -0,0 +1,190 @@
+"""
+Command-line front end for empire_core, usable without a display:
+
+    empire split empire.json -o dealers/ [--compact] [--workers N]
+    empire combine dealers/*.json -o combined_empire.json [--workers N]
+    empire merge empire.json community.json [-o merged.json] [--policy keep|overwrite|newer]
+    empire diff old_empire.json empire.json [--json]
+    empire merge3 base.json ours.json theirs.json -o merged.json [--prefer ours|theirs] [--conflicts conflicts.json]
+    empire validate empire.json dealers/*.json
+    empire fmt [--check] empire.json dealers/*.json
+
+Never imports tkinter, so it starts quickly and runs on headless machines.
+"""
+import os
+import sys
+import glob
+import json
+import argparse
+
+import empire_core
+import empire_diff
+import empire_schema
+
+
+def _expand(paths):
+    """Expands wildcards ourselves, since the Windows shell passes them through unexpanded."""
+    expanded = []
+    for path in paths:
+        matches = sorted(glob.glob(path)) if glob.has_magic(path) else [path]
+        expanded.extend(matches or [path])
+    return expanded
+
+
+def cmd_split(args):
+    loaded = empire_core.load_empire(args.file)
+    if not loaded.dealers:
+        print("Split Error: No dealers loaded to split.", file=sys.stderr)
+        return 1
+    os.makedirs(args.output, exist_ok=True)
+    result = empire_core.split_dealers(loaded.dealers, loaded.other_keys, args.output, compact=args.compact, workers=args.workers)
+    for filepath, message in result.errors:
+        print(f"Error saving split file {filepath}: {message}", file=sys.stderr)
+    print(f"Split {len(result.written)} dealer file(s) into '{args.output}'; {len(result.errors)} failed.")
+    return 1 if result.errors else 0
+
+
+def cmd_combine(args):
+    summary = empire_core.combine_to_file(_expand(args.files), args.output, workers=args.workers)
+    for error in summary.errors:
+        print(error, file=sys.stderr)
+    if not summary.written:
+        print("Combine Error: No valid dealer data found in the selected files.", file=sys.stderr)
+        return 1
+    print(f"Combined {summary.written} unique dealer(s) into '{args.output}'.")
+    return 1 if summary.errors else 0
+
+
+def cmd_merge(args):
+    loaded = empire_core.load_empire(args.base)
+    source = empire_core.read_merge_file(args.incoming)
+    resolve = empire_core.merge_policy(args.policy, empire_core.file_version(loaded.other_keys), empire_core.file_version(source.other_keys))
+    result = empire_core.merge_dealers(loaded.dealers, source.dealers, resolve)
+    output = args.output or args.base
+    empire_core.save_empire(output, loaded.dealers, loaded.other_keys)
+    print(f"Merged '{args.incoming}' into '{output}' ({args.policy} policy).")
+    print(empire_core.merge_summary(result, limit=args.list_limit))
+    return 0
+
+
+def cmd_diff(args):
+    changes = empire_diff.diff_files(args.old, args.new)
+    if args.json:
+        print(json.dumps([empire_diff.change_to_json(change) for change in changes], indent=4, ensure_ascii=False))
+    else:
+        for change in changes:
+            print(empire_diff.format_change(change, width=args.width))
+    return 1 if changes else 0
+
+
+def cmd_merge3(args):
+    result = empire_diff.merge_files(args.base, args.ours, args.theirs, prefer=args.prefer)
+    empire_core.write_json(args.output, result.merged)
+    for conflict in result.conflicts:
+        print(empire_diff.format_conflict(conflict, width=args.width))
+    if args.conflicts:
+        empire_core.write_json(args.conflicts, [empire_diff.conflict_to_json(conflict) for conflict in result.conflicts])
+    print(f"Merged into '{args.output}' with {len(result.conflicts)} conflict(s); conflicting values taken from {args.prefer}.")
+    return 1 if result.conflicts else 0
+
+
+def cmd_validate(args):
+    failed = 0
+    for path in _expand(args.files):
+        try:
+            problems = empire_schema.validate_empire(empire_core.read_json(path))
+        except (OSError, json.JSONDecodeError) as e:
+            problems = [f"$: could not read file: {e}"]
+        if problems:
+            failed += 1
+            for problem in problems:
+                print(f"{path}: {problem}")
+        elif not args.quiet:
+            print(f"{path}: OK")
+    return 1 if failed else 0
+
+
+def cmd_fmt(args):
+    changed = 0
+    errors = 0
+    for path in _expand(args.files):
+        try:
+            if empire_core.format_file(path, check=args.check):
+                changed += 1
+                print(f"{'Would reformat' if args.check else 'Reformatted'} {path}")
+        except (OSError, json.JSONDecodeError) as e:
+            errors += 1
+            print(f"{path}: {e}", file=sys.stderr)
+    if errors or (args.check and changed):
+        return 1
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="empire", description="Headless Empire Editor operations on empire.json and dealer files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    split = commands.add_parser("split", help="Write one file per dealer, each with a copy of the global settings.")
+    split.add_argument("file", help="The empire.json to split.")
+    split.add_argument("-o", "--output", default=".", help="Folder for the dealer files (default: current folder).")
+    split.add_argument("--compact", action="store_true", help=f"Write the global settings once to {empire_core.GLOBALS_FILE_NAME} and reference it from each dealer file.")
+    split.add_argument("--workers", type=int, default=empire_core.SPLIT_WORKERS, metavar="N", help=f"Threads writing dealer files (default: {empire_core.SPLIT_WORKERS}).")
+    split.set_defaults(handler=cmd_split)
+
+    combine = commands.add_parser("combine", help="Combine dealer or empire files into one empire file; repeated dealer names keep the first.")
+    combine.add_argument("files", nargs="+", help="Files to combine, in order (wildcards allowed).")
+    combine.add_argument("-o", "--output", default="combined_empire.json", help="Output file (default: combined_empire.json).")
+    combine.add_argument("--workers", type=int, default=empire_core.COMBINE_WORKERS, metavar="N", help=f"Threads reading and parsing the input files (default: {empire_core.COMBINE_WORKERS}).")
+    combine.set_defaults(handler=cmd_combine)
+
+    merge = commands.add_parser("merge", help="Merge the dealers of one empire file into another.")
+    merge.add_argument("base", help="The empire file to merge into.")
+    merge.add_argument("incoming", help="The empire file to merge from.")
+    merge.add_argument("-o", "--output", help="Output file (default: overwrite base).")
+    merge.add_argument("--policy", "--on-conflict", dest="policy", choices=empire_core.MERGE_POLICIES, default="keep",
+                       help="For a dealer whose name exists with different content: keep the existing one, overwrite it, or take whichever has the newer version (default: keep). Identical dealers are always skipped.")
+    merge.add_argument("--list-limit", type=int, default=20, metavar="N", help="Names listed per outcome in the summary (default: 20).")
+    merge.set_defaults(handler=cmd_merge)
+
+    diff = commands.add_parser("diff", help="List the changed paths between two empire files; exits with 1 when they differ.")
+    diff.add_argument("old", help="The original file.")
+    diff.add_argument("new", help="The changed file.")
+    diff.add_argument("--json", action="store_true", help="Print the changes as a JSON list of {op, path, old, new}.")
+    diff.add_argument("--width", type=int, default=80, metavar="N", help="Shorten values to N characters in the text output (default: 80).")
+    diff.set_defaults(handler=cmd_diff)
+
+    merge3 = commands.add_parser("merge3", help="Three-way merge of two edited copies of one empire file; exits with 1 on conflicts.")
+    merge3.add_argument("base", help="The common original.")
+    merge3.add_argument("ours", help="Our edited copy.")
+    merge3.add_argument("theirs", help="Their edited copy.")
+    merge3.add_argument("-o", "--output", required=True, help="Where to write the merged file.")
+    merge3.add_argument("--prefer", choices=["ours", "theirs"], default="ours", help="Side whose value the merged file keeps where both changed it (default: ours).")
+    merge3.add_argument("--conflicts", metavar="PATH", help="Also write the conflicts as a JSON list of {kind, path, base, ours, theirs}.")
+    merge3.add_argument("--width", type=int, default=80, metavar="N", help="Shorten values to N characters in the conflict list (default: 80).")
+    merge3.set_defaults(handler=cmd_merge3)
+
+    validate = commands.add_parser("validate", help="Check empire files against the schema, listing every problem; exits with 1 when any has problems.")
+    validate.add_argument("files", nargs="+", help="Files to check (wildcards allowed).")
+    validate.add_argument("-q", "--quiet", action="store_true", help="Only print problems.")
+    validate.set_defaults(handler=cmd_validate)
+
+    fmt = commands.add_parser("fmt", help="Rewrite files in the editor's format (4-space indent, key order kept).")
+    fmt.add_argument("files", nargs="+", help="Files to format (wildcards allowed).")
+    fmt.add_argument("--check", action="store_true", help="Change nothing; exit with 1 when a file would be reformatted.")
+    fmt.set_defaults(handler=cmd_fmt)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        return args.handler(args)
+    except json.JSONDecodeError as e:
+        print(f"Error: Could not decode JSON: {e}", file=sys.stderr)
+    except (OSError, empire_core.EmpireFileError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
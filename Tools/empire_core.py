@@ -0,0 +1,624 @@
+"""
+GUI-free core of the Empire Editor: loading, saving, splitting, combining,
+merging, validating and formatting empire.json files.
+
+Nothing here imports tkinter, so the same logic backs empire_editor.py (which
+only adds dialogs and widgets on top) and the headless empire_cli.py.
+"""
+import os
+import re
+import hashlib
+from collections import Counter, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import json_codec
+
+DIALOGUE_KEYS = ["intro", "dealStart", "accept", "incomplete", "expire", "fail", "success", "reward"]
+
+# Global lists stored next to "dealers" and the type of their items.
+GLOBAL_LIST_TYPES = {
+    "effectsName": str, "effectsDollarMult": float, "qualityTypes": str,
+    "qualitiesDollarMult": float, "productTypes": str, "randomNumberRanges": float
+}
+
+
+# Compact split files carry {"$globals": "<file name>"} instead of a copy of
+# the global keys; the named file (next to the dealer file) holds them once.
+GLOBALS_REF_KEY = "$globals"
+GLOBALS_FILE_NAME = "_globals.json"
+
+SPLIT_WORKERS = 8 # Threads writing split dealer files
+COMBINE_WORKERS = 8 # Threads reading and parsing files to combine
+IO_CHUNK_SIZE = 1 << 20 # Bytes read or written between two progress calls
+
+
+class EmpireFileError(ValueError):
+    """Raised when a file parses as JSON but is not a usable empire or dealer file."""
+
+
+class OperationCancelled(Exception):
+    """
+    Raised by a progress callback to stop the operation reporting to it.
+    Load, save and combine then leave no partial file behind; a cancelled
+    split keeps the dealer files written so far.
+    """
+
+
+def default_empire():
+    """Returns a dictionary with the default empty structure for a new file."""
+    return {
+        "version": {"s1api": "1.0.0", "empire": "0.1"},
+        "effectsName": [], "effectsDollarMult": [],
+        "qualityTypes": [], "qualitiesDollarMult": [],
+        "productTypes": [], "randomNumberRanges": [],
+        "noNecessaryEffects": False,
+        "dealers": []
+    }
+
+
+def new_dealer(name="New Dealer"):
+    """Returns a dealer object with every field the mod expects, left empty."""
+    return {
+        "name": name, "image": "", "tier": 0,
+        "unlockRequirements": [], "deals": [], "dealDays": [],
+        "curfewDeal": False,
+        "repLogBase": 10,
+        "gift": {"cost": 0, "rep": 0},
+        "reward": {"rep_cost": 0, "unlockRep": 0, "type": "", "args": []},
+        "drugs": [], "shipping": [],
+        "dialogue": {key: [] for key in DIALOGUE_KEYS}
+    }
+
+
+def sanitize_filename(name):
+    if not name: return "unnamed_dealer"
+    name = str(name)
+    name = re.sub(r'[\\/*?:"<>|]', "", name)
+    name = name.replace(" ", "_")
+    return name[:100]
+
+
+def read_json(path, progress=None):
+    """
+    Parses a JSON file. With progress, the file is read in IO_CHUNK_SIZE
+    pieces and progress(bytes read, file size) is called after each one.
+    """
+    if progress is None:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json_codec.load(f)
+    total = os.path.getsize(path)
+    chunks, done = [], 0
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(IO_CHUNK_SIZE)
+            if not chunk: break
+            chunks.append(chunk)
+            done += len(chunk)
+            progress(done, total)
+    # Decoding the text like open(..., 'r') does; JSON has no newlines outside whitespace to translate.
+    return json_codec.loads(b"".join(chunks).decode('utf-8'))
+
+
+def write_json(path, value):
+    with open(path, 'w', encoding='utf-8') as f:
+        json_codec.dump(value, f, indent=4)
+
+
+def resolve_globals(content, path, cache=None):
+    """
+    Returns content with a compact file's "$globals" reference replaced by the
+    keys of the referenced globals file (resolved relative to path); other
+    documents are returned unchanged. Keys in the dealer file itself win over
+    the shared ones. cache maps absolute globals paths to their content so a
+    batch of dealer files reads the shared file once.
+    """
+    if not isinstance(content, dict) or GLOBALS_REF_KEY not in content:
+        return content
+    ref = content[GLOBALS_REF_KEY]
+    globals_path = os.path.abspath(os.path.join(os.path.dirname(path), str(ref)))
+    shared = cache.get(globals_path) if cache is not None else None
+    if shared is None:
+        try:
+            shared = read_json(globals_path)
+        except FileNotFoundError:
+            raise EmpireFileError(f"Globals file '{ref}' referenced by {os.path.basename(path)} was not found.")
+        if not isinstance(shared, dict):
+            raise EmpireFileError(f"Globals file '{ref}' must contain an object.")
+        if cache is not None:
+            cache[globals_path] = shared
+    resolved = {k: v for k, v in shared.items() if k != "dealers"}
+    resolved.update((k, v) for k, v in content.items() if k != GLOBALS_REF_KEY)
+    return resolved
+
+
+def read_document(path, globals_cache=None, progress=None):
+    """read_json, with a compact split file's globals reference resolved."""
+    return resolve_globals(read_json(path, progress), path, globals_cache)
+
+
+def empire_document(dealers, other_keys):
+    """The object written to disk: the global keys in their original order, then "dealers"."""
+    document = other_keys.copy()
+    document["dealers"] = dealers
+    return document
+
+
+# What load_empire found in a file.
+#   kind:       "empire" (has a dealers list), "dealer" (a single dealer object) or "globals" (neither)
+#   dealers:    the dealers list ([content] for a single dealer, [] for globals)
+#   other_keys: every top-level key except "dealers" ({} for a single dealer)
+EmpireFile = namedtuple("EmpireFile", ["kind", "dealers", "other_keys"])
+
+
+def load_empire(path, progress=None):
+    """
+    Reads an empire.json, a split dealer file (full or compact) or a bare dealer object.
+    Raises json.JSONDecodeError on invalid JSON and EmpireFileError when the
+    root is not an object. progress is passed on to read_json.
+    """
+    content = read_document(path, progress=progress)
+    if not isinstance(content, dict):
+        raise EmpireFileError("Invalid JSON structure. Root must be an object (dictionary).")
+
+    dealers = content.get("dealers")
+    if dealers is not None and isinstance(dealers, list):
+        return EmpireFile("empire", dealers, {k: v for k, v in content.items() if k != "dealers"})
+    if "name" in content:
+        return EmpireFile("dealer", [content], {})
+    return EmpireFile("globals", [], content)
+
+
+def _indented_dump(value, level):
+    """json.dumps(value, indent=4) as it appears when nested `level` levels deep."""
+    return json_codec.dumps(value, indent=4).replace("\n", "\n" + "    " * level)
+
+
+def _document_header(other_keys):
+    """An empire file up to the opening bracket of its dealers list."""
+    return "{" + "".join("\n    " + json_codec.dumps(key) + ": " + _indented_dump(value, 1) + "," for key, value in other_keys.items()) + '\n    "dealers": ['
+
+
+def _dealer_fragment(dealer):
+    """One dealer as it appears in the dealers list of an empire file, without the separating comma."""
+    return "\n        " + _indented_dump(dealer, 2)
+
+
+def _document_footer(count):
+    return "\n    ]\n}" if count else "]\n}"
+
+
+class FragmentCache:
+    """
+    The encoded text of each dealer as it was last saved, so that saving an
+    empire file re-encodes only the dealers that changed since (the dirty
+    ones) and joins the cached text of the rest. The result is byte-identical
+    to encoding the whole document.
+
+    Dealers are tracked by identity: a dealer object is clean when it is the
+    object that was encoded, so it must not be changed in place after a save.
+    The editor never does that, since its undo history replaces an edited
+    dealer with a copy (see empire_history); other callers can discard() a
+    dealer they change in place.
+    """
+    def __init__(self):
+        self._fragments = {} # id(dealer) -> (dealer, encoded text); holding the dealer keeps its id unique
+
+    def is_clean(self, dealer):
+        cached = self._fragments.get(id(dealer))
+        return cached is not None and cached[0] is dealer
+
+    def discard(self, dealer):
+        """Marks a dealer as changed so the next save encodes it again."""
+        self._fragments.pop(id(dealer), None)
+
+    def clear(self):
+        self._fragments = {}
+
+    def encode(self, dealers, other_keys, progress=None):
+        """
+        json_codec.dumps(empire_document(dealers, other_keys), indent=4).
+        progress(done, total) is called after each dealer; when it raises,
+        the cache is left as it was.
+        """
+        previous, fragments, parts = self._fragments, {}, []
+        for done, dealer in enumerate(dealers, 1):
+            cached = previous.get(id(dealer))
+            fragment = cached[1] if cached is not None and cached[0] is dealer else _dealer_fragment(dealer)
+            if isinstance(dealer, (dict, list)):
+                fragments[id(dealer)] = (dealer, fragment)
+            parts.append(fragment)
+            if progress: progress(done, len(dealers))
+        self._fragments = fragments # Only the dealers still in the document are kept
+        return _document_header(other_keys) + ",".join(parts) + _document_footer(len(parts))
+
+
+def save_empire(path, dealers, other_keys, fragments=None, progress=None):
+    """
+    Writes an empire file. With a FragmentCache only the dealers changed
+    since its last save are encoded. With progress, the text is written in
+    IO_CHUNK_SIZE pieces to a temporary file that replaces path at the end,
+    and progress(done, total) is called per dealer encoded and per piece
+    written (as done == total); raising OperationCancelled from it leaves
+    the existing file untouched.
+    """
+    if fragments is None and progress is None:
+        write_json(path, empire_document(dealers, other_keys))
+        return
+    text = (fragments if fragments is not None else FragmentCache()).encode(dealers, other_keys, progress)
+    if progress is None:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return
+    temp_path = path + ".tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for start in range(0, len(text), IO_CHUNK_SIZE):
+                f.write(text[start:start + IO_CHUNK_SIZE])
+                progress(len(dealers), len(dealers))
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+# --- Split, Combine, Merge ---
+# written: paths of the dealer files written, in dealer order
+# errors:  (path, message) for every file that could not be written
+SplitResult = namedtuple("SplitResult", ["written", "errors"])
+
+
+def split_dealers(dealers, other_keys, output_dir, compact=False, workers=SPLIT_WORKERS, progress=None):
+    """
+    Writes one file per dealer into output_dir using a pool of `workers`
+    threads. Each file carries a copy of the global keys, or with compact=True
+    a reference to GLOBALS_FILE_NAME, which is then written once. Dealers whose
+    names map to the same file name overwrite each other in list order, as a
+    one-by-one split would. Names whose file names differ only in case get a
+    numbered suffix instead, since on Windows and macOS they would be one file
+    written by two threads at once. progress(done, total) is called per file,
+    on the calling thread; when it raises, the files not started yet are skipped.
+    """
+    jobs = {}
+    paths = []
+    # Case-folded path -> the path written there. Folded on every platform, so a split
+    # made on Linux can be copied to a case-insensitive file system unchanged.
+    claimed = {os.path.normcase(os.path.join(output_dir, GLOBALS_FILE_NAME)).casefold(): None} if compact else {}
+    for i, dealer_obj in enumerate(dealers):
+        dealer_name = dealer_obj.get('name', f'Unnamed_Dealer_{i}')
+        stem = sanitize_filename(dealer_name)
+        if compact and stem + ".json" == GLOBALS_FILE_NAME:
+            stem += "_dealer"
+        filepath, suffix = os.path.join(output_dir, stem + ".json"), 1
+        while claimed.get(os.path.normcase(filepath).casefold(), filepath) != filepath:
+            suffix += 1
+            filepath = os.path.join(output_dir, f"{stem}_{suffix}.json")
+        claimed[os.path.normcase(filepath).casefold()] = filepath
+        paths.append(filepath)
+        jobs[filepath] = dealer_obj # The last dealer for a path is the one that ends up on disk
+
+    if compact:
+        shared = {GLOBALS_REF_KEY: GLOBALS_FILE_NAME}
+        write_json(os.path.join(output_dir, GLOBALS_FILE_NAME), other_keys)
+        write_file = lambda filepath: save_empire(filepath, [jobs[filepath]], shared)
+    else:
+        write_file = lambda filepath: save_empire(filepath, [jobs[filepath]], other_keys)
+
+    failed = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {filepath: pool.submit(write_file, filepath) for filepath in jobs}
+        try:
+            for done, (filepath, future) in enumerate(futures.items(), 1):
+                try:
+                    future.result()
+                except Exception as e:
+                    failed[filepath] = str(e)
+                if progress:
+                    progress(done, len(futures))
+        except BaseException:
+            pool.shutdown(cancel_futures=True)
+            raise
+
+    written = [filepath for filepath in paths if filepath not in failed]
+    return SplitResult(written, [(filepath, failed[filepath]) for filepath in dict.fromkeys(paths) if filepath in failed])
+
+
+def _read_combine_input(filepath, globals_cache):
+    """Combine worker: reads one file and returns (other keys, dealers, errors) without raising."""
+    try:
+        file_content = read_document(filepath, globals_cache)
+    except Exception as e:
+        return {}, [], [f"Error reading {os.path.basename(filepath)}: {e}"]
+    if not isinstance(file_content, dict):
+        return {}, [], [f"Not an object: {os.path.basename(filepath)}"]
+
+    dealers_from_this_file = []
+    if isinstance(file_content.get("dealers"), list):
+        dealers_from_this_file = file_content["dealers"]
+    elif "name" in file_content:
+        dealers_from_this_file = [file_content]
+    dealers, errors = [], []
+    for dealer_obj in dealers_from_this_file:
+        if isinstance(dealer_obj, dict) and isinstance(dealer_obj.get("name"), str):
+            dealers.append(dealer_obj)
+        else:
+            errors.append(f"Invalid dealer structure in {os.path.basename(filepath)}")
+    return {k: v for k, v in file_content.items() if k != "dealers"}, dealers, errors
+
+
+def iter_combine(paths, workers=COMBINE_WORKERS, progress=None):
+    """
+    Reads and parses the files in a pool of `workers` threads and yields, in
+    file order and as soon as each file is parsed:
+        ("keys", other_keys)  once, for the first file that has global keys
+        ("dealer", dealer)    for each dealer whose name was not seen before
+        ("error", message)    for each unreadable file or invalid dealer
+    At most two files per worker are parsed ahead of the consumer, so memory
+    tracks the files in flight rather than the whole selection.
+    progress(done, total) is called after each file, on the consuming thread.
+    """
+    paths = list(paths)
+    globals_cache = {}
+    loaded_dealer_names = set()
+    have_keys = False
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = deque()
+        remaining = iter(paths)
+        for done in range(1, len(paths) + 1):
+            while len(pending) < max(1, workers) * 2:
+                filepath = next(remaining, None)
+                if filepath is None:
+                    break
+                pending.append(pool.submit(_read_combine_input, filepath, globals_cache))
+            other_keys, dealers, errors = pending.popleft().result()
+            if other_keys and not have_keys:
+                have_keys = True
+                yield "keys", other_keys
+            for dealer_obj in dealers:
+                if dealer_obj['name'] not in loaded_dealer_names:
+                    loaded_dealer_names.add(dealer_obj['name'])
+                    yield "dealer", dealer_obj
+            for error in errors:
+                yield "error", error
+            if progress:
+                progress(done, len(paths))
+
+
+# dealers:    unique dealers in file order (the first dealer with a given name wins)
+# other_keys: global keys of the first file that has any ({} when none does)
+# errors:     human-readable problems, one per bad file or dealer
+CombineResult = namedtuple("CombineResult", ["dealers", "other_keys", "errors"])
+
+
+def combine_files(paths, workers=COMBINE_WORKERS, progress=None):
+    """Collects the dealers of several empire or dealer files in memory, dropping repeated names."""
+    result = CombineResult([], {}, [])
+    for kind, value in iter_combine(paths, workers, progress):
+        if kind == "keys":
+            result.other_keys.update(value)
+        elif kind == "dealer":
+            result.dealers.append(value)
+        else:
+            result.errors.append(value)
+    return result
+
+
+# What combine_to_file wrote: the number of unique dealers, the global keys used and the load errors.
+CombineSummary = namedtuple("CombineSummary", ["written", "other_keys", "errors"])
+
+
+def combine_to_file(paths, output_path, workers=COMBINE_WORKERS, progress=None):
+    """
+    Streams the combined empire file to output_path while the inputs are still
+    being parsed; the output is byte-identical to save_empire of
+    combine_files(paths). Dealers are only held until the global keys that
+    precede them in the file are known, which is normally the first file.
+    Nothing is written when no valid dealer is found.
+    """
+    temp_path = output_path + ".tmp"
+    other_keys, errors = None, []
+    held = []
+    count = 0
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as out:
+            def write_header(keys):
+                out.write(_document_header(keys))
+
+            def write_dealer(dealer_obj):
+                out.write(("," if count else "") + _dealer_fragment(dealer_obj))
+
+            for kind, value in iter_combine(paths, workers, progress):
+                if kind == "error":
+                    errors.append(value)
+                    continue
+                if kind == "keys":
+                    other_keys = value
+                    write_header(other_keys)
+                    for dealer_obj in held:
+                        write_dealer(dealer_obj)
+                        count += 1
+                    held = []
+                elif other_keys is None:
+                    held.append(value)
+                else:
+                    write_dealer(value)
+                    count += 1
+            if other_keys is None:
+                other_keys = {}
+                write_header(other_keys)
+                for dealer_obj in held:
+                    write_dealer(dealer_obj)
+                    count += 1
+            out.write(_document_footer(count))
+        if count:
+            os.replace(temp_path, output_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return CombineSummary(count, other_keys, errors)
+
+
+def read_merge_file(path):
+    """Reads an empire file to merge from; returns an EmpireFile whose kind is always "empire"."""
+    content = read_document(path)
+    if not isinstance(content, dict) or not isinstance(content.get("dealers"), list):
+        raise EmpireFileError("Invalid merge file format. Expected an object with a 'dealers' list.")
+    return EmpireFile("empire", content["dealers"], {k: v for k, v in content.items() if k != "dealers"})
+
+
+def dealer_hash(dealer):
+    """
+    Canonical content hash of a dealer: equal for dealers with the same
+    content, whatever their key order or the file's formatting.
+    """
+    return hashlib.sha256(json_codec.canonical(dealer)).hexdigest()
+
+
+def version_key(version):
+    """
+    Sort key for a version such as "1.11" or "0.3.6f6" (its numbers as a
+    tuple), or None when there is no version. Lets "1.11" compare above "1.9".
+    """
+    if version is None or isinstance(version, bool):
+        return None
+    if isinstance(version, (int, float)):
+        return (version,)
+    numbers = tuple(int(part) for part in re.findall(r'\d+', str(version)))
+    return numbers or None
+
+
+def file_version(other_keys):
+    """The Empire version of a file ("version": {"empire": ...}), used for dealers without their own."""
+    version = other_keys.get("version") if isinstance(other_keys, dict) else None
+    return version.get("empire") if isinstance(version, dict) else None
+
+
+# Batch conflict policies for dealers whose name exists with different content:
+#   keep:      keep every existing dealer
+#   overwrite: replace every existing dealer with the incoming one
+#   newer:     take the incoming dealer only when its "version" (or, without
+#              one, its file's Empire version) is higher than the existing one's
+MERGE_POLICIES = ["keep", "overwrite", "newer"]
+
+
+def merge_policy(policy, existing_version=None, incoming_version=None):
+    """
+    Returns a resolve(name, existing, incoming) callback for merge_dealers that
+    applies one of MERGE_POLICIES. The file versions are the fallback for the
+    newer policy when a dealer has no "version" field of its own.
+    """
+    if policy not in MERGE_POLICIES:
+        raise ValueError(f"Unknown merge policy '{policy}'.")
+
+    def resolve(name, existing, incoming):
+        if policy != "newer":
+            return policy
+        existing_key = version_key(existing.get("version", existing_version))
+        incoming_key = version_key(incoming.get("version", incoming_version))
+        if incoming_key is not None and (existing_key is None or incoming_key > existing_key):
+            return "overwrite"
+        return "keep"
+    return resolve
+
+
+def find_merge_conflicts(dealers, incoming):
+    """Names of incoming dealers that exist in `dealers` with different content."""
+    existing_hashes = {d.get('name'): dealer_hash(d) for d in dealers if isinstance(d, dict) and isinstance(d.get('name'), str) and d.get('name')}
+    conflicts = []
+    for new_dealer_obj in incoming:
+        name = new_dealer_obj.get('name') if isinstance(new_dealer_obj, dict) else None
+        if isinstance(name, str) and name in existing_hashes and existing_hashes[name] != dealer_hash(new_dealer_obj):
+            conflicts.append(name)
+    return conflicts
+
+
+# Outcome of merge_dealers.
+#   added/overwritten/kept/identical: number of incoming dealers handled each way
+#   decisions: (name, "added" | "overwritten" | "kept" | "identical") per incoming dealer, in order
+#   skipped:   incoming dealers without a name (or whose name is not a string)
+#   cancelled: True when resolve returned "cancel"; the changes made before it are kept
+MergeResult = namedtuple("MergeResult", ["added", "overwritten", "kept", "identical", "decisions", "skipped", "cancelled"])
+
+
+def merge_dealers(dealers, incoming, resolve):
+    """
+    Merges the incoming dealers into `dealers` in place. New names are
+    appended, and a dealer identical (by dealer_hash) to the existing one of
+    the same name is skipped. For a real conflict resolve(name, existing,
+    incoming) must return "overwrite", "keep" or "cancel"; merge_policy()
+    builds one for a batch policy.
+    """
+    existing_dealers_map = {d.get('name'): i for i, d in enumerate(dealers) if isinstance(d, dict) and isinstance(d.get('name'), str) and d.get('name')}
+    existing_hashes = {}
+    decisions, skipped = [], []
+
+    def result(cancelled):
+        counts = Counter(action for _, action in decisions)
+        return MergeResult(counts["added"], counts["overwritten"], counts["kept"], counts["identical"], decisions, skipped, cancelled)
+
+    for new_dealer_obj in incoming:
+        new_dealer_name = new_dealer_obj.get('name') if isinstance(new_dealer_obj, dict) else None
+        if not isinstance(new_dealer_name, str) or not new_dealer_name:
+            skipped.append(new_dealer_obj)
+            continue
+
+        index = existing_dealers_map.get(new_dealer_name)
+        if index is None:
+            dealers.append(new_dealer_obj)
+            existing_dealers_map[new_dealer_name] = len(dealers) - 1
+            decisions.append((new_dealer_name, "added"))
+            continue
+
+        existing = dealers[index]
+        if index not in existing_hashes:
+            existing_hashes[index] = dealer_hash(existing)
+        new_hash = dealer_hash(new_dealer_obj)
+        if new_hash == existing_hashes[index]:
+            decisions.append((new_dealer_name, "identical"))
+            continue
+
+        action = resolve(new_dealer_name, existing, new_dealer_obj)
+        if action == "overwrite":
+            dealers[index] = new_dealer_obj
+            existing_hashes[index] = new_hash
+            decisions.append((new_dealer_name, "overwritten"))
+        elif action == "keep":
+            decisions.append((new_dealer_name, "kept"))
+        else:
+            return result(True)
+
+    return result(False)
+
+
+def merge_summary(result, limit=20):
+    """Multi-line human-readable summary of a MergeResult, listing up to `limit` names per outcome."""
+    lines = [
+        f"Dealers Added: {result.added}",
+        f"Dealers Overwritten: {result.overwritten}",
+        f"Dealers Kept Existing: {result.kept}",
+        f"Identical Dealers Skipped: {result.identical}",
+    ]
+    for action, label in (("overwritten", "Overwritten"), ("kept", "Kept existing")):
+        names = [name for name, decision in result.decisions if decision == action]
+        if names:
+            shown = ", ".join(names[:limit]) + (f" and {len(names) - limit} more" if len(names) > limit else "")
+            lines.append(f"{label}: {shown}")
+    if result.skipped:
+        lines.append(f"Skipped {len(result.skipped)} dealer(s) without a valid name.")
+    return "\n".join(lines)
+
+
+# --- Format ---
+def format_file(path, check=False):
+    """
+    Rewrites path in the editor's canonical format (4-space indent, key order
+    kept). Returns True when the file was, or with check=True would be, changed.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    formatted = json_codec.dumps(json_codec.loads(text), indent=4)
+    if formatted == text:
+        return False
+    if not check:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(formatted)
+    return True
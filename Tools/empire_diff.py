@@ -0,0 +1,372 @@
+"""
+Structural diff and three-way merge of empire files, built on subtree hashes
+of the editor's data model.
+
+Every dict and list (dealer, drug, quality, effect, shipping tier, dialogue
+list, ...) can be reduced to a content digest, so two subtrees with equal
+digests are skipped without being walked. Changes are reported by path,
+e.g. dealers["Combo Costco"].drugs["weed"].effects[2].probability.
+
+Lists whose items have a natural name (dealers, drugs, qualities, effects,
+shipping tiers) are matched by that name instead of by position, so inserting
+or reordering a dealer does not show up as every later dealer changing.
+
+merge_three_way() uses the same paths and digests to combine two edited
+copies of one base file, value by value inside each dealer.
+"""
+import re
+import json
+import hashlib
+from collections import namedtuple
+
+import json_codec
+import empire_core
+
+# Lists matched item by item through a name field, by the key they are stored under.
+# Used only while the names are unique strings (see list_key()); effects fall back to positions otherwise.
+KEYED_LISTS = {"dealers": "name", "drugs": "type", "qualities": "type", "effects": "name", "shipping": "name"}
+
+# One path segment selecting the item of a keyed list whose `field` equals `value`.
+# Other segments are plain str (dict key) or int (list index).
+ItemKey = namedtuple("ItemKey", ["field", "value"])
+
+# One difference between two documents.
+#   op:   "added", "removed", "changed" or "reordered" (items of a keyed list kept but moved)
+#   path: tuple of path segments, see format_path()
+#   old:  the old value (None when added; the old name order when reordered)
+#   new:  the new value (None when removed; the new name order when reordered)
+Change = namedtuple("Change", ["op", "path", "old", "new"])
+
+_IDENTIFIER = re.compile(r'[A-Za-z_$][A-Za-z0-9_$]*\Z')
+
+
+class HashCache:
+    """
+    Memoized subtree digests for the duration of one diff or merge. Values
+    are looked up by identity and kept referenced, so they must not be
+    modified while the cache is in use.
+
+    A digest hashes the subtree's canonical encoding in one call to the JSON
+    encoder, which is far faster than folding child digests together in
+    Python. Digests are taken top-down: the children of a subtree are only
+    hashed when the subtree itself differs, so matching dealers cost one
+    encoding each and the rest of the work follows the size of the change.
+    """
+    def __init__(self):
+        self._digests = {}
+
+    def digest(self, value):
+        entry = self._digests.get(id(value))
+        if entry is not None:
+            return entry[1]
+        digest = hashlib.blake2b(json_codec.canonical(value), digest_size=16).digest()
+        self._digests[id(value)] = (value, digest)
+        return digest
+
+    def same(self, a, b):
+        """True when a and b are equal values of the same JSON types."""
+        if a is b:
+            return True
+        if isinstance(a, (dict, list)) or isinstance(b, (dict, list)):
+            return type(a) is type(b) and self.digest(a) == self.digest(b)
+        return type(a) is type(b) and a == b
+
+
+def list_key(name, *lists):
+    """
+    The field matching items of the lists stored under `name`, or None when
+    they have to be compared by position: the list is not a KEYED_LISTS entry,
+    or some item lacks a string name or shares it with another item.
+    """
+    field = KEYED_LISTS.get(name)
+    if field is None:
+        return None
+    for items in lists:
+        if not isinstance(items, list):
+            return None
+        names = set()
+        for item in items:
+            if not isinstance(item, dict) or not isinstance(item.get(field), str) or item[field] in names:
+                return None
+            names.add(item[field])
+    return field
+
+
+def keyed_items(items, field):
+    """Maps each item's name to the item, in list order."""
+    return {item[field]: item for item in items}
+
+
+def format_path(path):
+    """Renders path segments as dealers["Combo Costco"].drugs["weed"].effects[2].probability."""
+    text = []
+    for segment in path:
+        if isinstance(segment, ItemKey):
+            text.append("[" + json.dumps(segment.value, ensure_ascii=False) + "]")
+        elif isinstance(segment, int):
+            text.append(f"[{segment}]")
+        elif _IDENTIFIER.match(segment):
+            text.append(("." if text else "") + segment)
+        else:
+            text.append("[" + json.dumps(segment, ensure_ascii=False) + "]")
+    return "".join(text) or "$"
+
+
+def diff_values(old, new, path=(), cache=None, changes=None):
+    """Appends the Changes turning old into new (found under path) to changes and returns it."""
+    if cache is None:
+        cache = HashCache()
+    if changes is None:
+        changes = []
+    if cache.same(old, new):
+        return changes
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key, value in old.items():
+            if key not in new:
+                changes.append(Change("removed", path + (key,), value, None))
+            else:
+                diff_values(value, new[key], path + (key,), cache, changes)
+        for key, value in new.items():
+            if key not in old:
+                changes.append(Change("added", path + (key,), None, value))
+        return changes
+
+    if isinstance(old, list) and isinstance(new, list):
+        name = path[-1] if path and isinstance(path[-1], str) else None
+        field = list_key(name, old, new)
+        if field is not None:
+            _diff_keyed(old, new, field, path, cache, changes)
+            return changes
+        for index in range(min(len(old), len(new))):
+            diff_values(old[index], new[index], path + (index,), cache, changes)
+        for index in range(len(new), len(old)):
+            changes.append(Change("removed", path + (index,), old[index], None))
+        for index in range(len(old), len(new)):
+            changes.append(Change("added", path + (index,), None, new[index]))
+        return changes
+
+    changes.append(Change("changed", path, old, new))
+    return changes
+
+
+def _diff_keyed(old, new, field, path, cache, changes):
+    old_items = keyed_items(old, field)
+    new_items = keyed_items(new, field)
+    for name, item in old_items.items():
+        if name not in new_items:
+            changes.append(Change("removed", path + (ItemKey(field, name),), item, None))
+        else:
+            diff_values(item, new_items[name], path + (ItemKey(field, name),), cache, changes)
+    for name, item in new_items.items():
+        if name not in old_items:
+            changes.append(Change("added", path + (ItemKey(field, name),), None, item))
+    old_order = [name for name in old_items if name in new_items]
+    new_order = [name for name in new_items if name in old_items]
+    if old_order != new_order:
+        changes.append(Change("reordered", path, old_order, new_order))
+
+
+def load_document(path):
+    """Any file load_empire accepts, as the document it would be saved as."""
+    loaded = empire_core.load_empire(path)
+    return empire_core.empire_document(loaded.dealers, loaded.other_keys)
+
+
+def diff_files(old_path, new_path):
+    return diff_values(load_document(old_path), load_document(new_path))
+
+
+def _short(value, width):
+    text = json.dumps(value, ensure_ascii=False)
+    return text if len(text) <= width else text[:width - 3] + "..."
+
+
+def format_change(change, width=80):
+    """One line per change: '~ path: old -> new', '+ path: new', '- path: old'."""
+    path = format_path(change.path)
+    if change.op == "added":
+        return f"+ {path}: {_short(change.new, width)}"
+    if change.op == "removed":
+        return f"- {path}: {_short(change.old, width)}"
+    if change.op == "reordered":
+        return f"~ {path}: order {_short(change.old, width)} -> {_short(change.new, width)}"
+    return f"~ {path}: {_short(change.old, width)} -> {_short(change.new, width)}"
+
+
+def change_to_json(change):
+    """A Change as a plain JSON object, with the path already formatted."""
+    return {"op": change.op, "path": format_path(change.path), "old": change.old, "new": change.new}
+
+
+# --- Three-Way Merge ---
+# Stands for a key or item that does not exist on one side of a merge.
+MISSING = type("Missing", (), {"__repr__": lambda self: "MISSING", "__bool__": lambda self: False})()
+
+# One place where ours and theirs changed the base differently.
+#   kind:   "value" (base/ours/theirs are values, MISSING where deleted or never added)
+#           or "order" (the item names of a keyed list, reordered differently on each side)
+#   path:   tuple of path segments, see format_path()
+#   base, ours, theirs: the three versions; the merged file holds the preferred one
+Conflict = namedtuple("Conflict", ["kind", "path", "base", "ours", "theirs"])
+
+# merged:    the merged document
+# conflicts: list of Conflict, in document order
+ThreeWayMerge = namedtuple("ThreeWayMerge", ["merged", "conflicts"])
+
+
+def merge_three_way(base, ours, theirs, prefer="ours"):
+    """
+    Merges the changes ours and theirs each made to base, path by path inside
+    every dealer, drug and list. Where both changed the same value differently
+    the merged document keeps the `prefer`red side ("ours" or "theirs") and a
+    Conflict is recorded. Subtrees that match on any two sides are resolved
+    from their digests without being walked.
+    """
+    conflicts = []
+    merged = _merge_slot(base, ours, theirs, (), HashCache(), conflicts, prefer)
+    return ThreeWayMerge(merged, conflicts)
+
+
+def _merge_slot(base, ours, theirs, path, cache, conflicts, prefer):
+    """The merged value at path, or MISSING when it ends up deleted."""
+    if ours is MISSING and theirs is MISSING:
+        return MISSING
+    if ours is not MISSING and theirs is not MISSING and cache.same(ours, theirs):
+        return ours
+    if base is not MISSING:
+        if ours is not MISSING and cache.same(base, ours):
+            return theirs
+        if theirs is not MISSING and cache.same(base, theirs):
+            return ours
+        if ours is not MISSING and theirs is not MISSING:
+            if isinstance(base, dict) and isinstance(ours, dict) and isinstance(theirs, dict):
+                return _merge_dict(base, ours, theirs, path, cache, conflicts, prefer)
+            if isinstance(base, list) and isinstance(ours, list) and isinstance(theirs, list):
+                return _merge_list(base, ours, theirs, path, cache, conflicts, prefer)
+    elif ours is MISSING or theirs is MISSING:
+        return theirs if ours is MISSING else ours
+    conflicts.append(Conflict("value", path, base, ours, theirs))
+    return ours if prefer == "ours" else theirs
+
+
+def _merge_dict(base, ours, theirs, path, cache, conflicts, prefer):
+    merged = {}
+    for key in _merge_order(list(base), list(ours), list(theirs)):
+        value = _merge_slot(base.get(key, MISSING), ours.get(key, MISSING), theirs.get(key, MISSING), path + (key,), cache, conflicts, prefer)
+        if value is not MISSING:
+            merged[key] = value
+    return merged
+
+
+def _merge_list(base, ours, theirs, path, cache, conflicts, prefer):
+    name = path[-1] if path and isinstance(path[-1], str) else None
+    field = list_key(name, base, ours, theirs)
+    if field is None:
+        if len(base) == len(ours) == len(theirs):
+            return [_merge_slot(b, o, t, path + (index,), cache, conflicts, prefer) for index, (b, o, t) in enumerate(zip(base, ours, theirs))]
+        if len(ours) == len(base) or len(theirs) == len(base):
+            return _merge_resized(base, ours, theirs, path, cache, conflicts, prefer)
+        # Both sides added or removed items, so their positions cannot be lined up with each other.
+        conflicts.append(Conflict("value", path, base, ours, theirs))
+        return ours if prefer == "ours" else theirs
+
+    base_items, our_items, their_items = keyed_items(base, field), keyed_items(ours, field), keyed_items(theirs, field)
+    order = _merge_order(list(base_items), list(our_items), list(their_items), path, conflicts, prefer)
+    merged = []
+    for item_name in order:
+        value = _merge_slot(base_items.get(item_name, MISSING), our_items.get(item_name, MISSING), their_items.get(item_name, MISSING),
+                            path + (ItemKey(field, item_name),), cache, conflicts, prefer)
+        if value is not MISSING:
+            merged.append(value)
+    return merged
+
+
+def _merge_resized(base, ours, theirs, path, cache, conflicts, prefer):
+    """
+    Merges a list compared by position that only one side made longer or
+    shorter. That side's list is the layout: its items matching base at the
+    start and at the end line up with base, and so does the changed stretch
+    in between, from its start; the items past that stretch's shorter end
+    were added or removed. The other side's edits are merged into the
+    positions that line up, and editing an item the layout side removed is
+    a conflict.
+    """
+    ours_resized = len(ours) != len(base)
+    layout, other = (ours, theirs) if ours_resized else (theirs, ours)
+    shorter = min(len(base), len(layout))
+    prefix = 0
+    while prefix < shorter and cache.same(base[prefix], layout[prefix]):
+        prefix += 1
+    suffix = 0
+    while suffix < shorter - prefix and cache.same(base[-1 - suffix], layout[-1 - suffix]):
+        suffix += 1
+    paired = shorter - suffix # base[:paired] lines up with layout[:paired]
+
+    merged = []
+    def merge_item(index, layout_value):
+        sides = (layout_value, other[index]) if ours_resized else (other[index], layout_value)
+        value = _merge_slot(base[index], *sides, path + (len(merged),), cache, conflicts, prefer)
+        if value is not MISSING:
+            merged.append(value)
+    for index in range(paired):
+        merge_item(index, layout[index])
+    for index in range(paired, len(base) - suffix): # Removed by the layout side
+        merge_item(index, MISSING)
+    merged.extend(layout[paired:len(layout) - suffix]) # Added by the layout side
+    for offset in range(suffix, 0, -1):
+        merge_item(len(base) - offset, layout[len(layout) - offset])
+    return merged
+
+
+def _relative_order(names, among):
+    return [name for name in names if name in among]
+
+
+def _merge_order(base, ours, theirs, path=None, conflicts=None, prefer="ours"):
+    """
+    Every name of ours and theirs in merged order. The order of a side that
+    rearranged the names it shares with base wins; the other side's new names
+    are placed after the name that precedes them on that side. With path
+    given, both sides rearranging differently is recorded as an order conflict.
+    """
+    common = set(base) & set(ours) & set(theirs)
+    base_order, our_order, their_order = _relative_order(base, common), _relative_order(ours, common), _relative_order(theirs, common)
+    ours_moved, theirs_moved = our_order != base_order, their_order != base_order
+    primary, secondary = (theirs, ours) if theirs_moved and not ours_moved else (ours, theirs)
+    if ours_moved and theirs_moved and our_order != their_order and path is not None:
+        conflicts.append(Conflict("order", path, base, ours, theirs))
+        if prefer == "theirs":
+            primary, secondary = theirs, ours
+
+    order = list(primary)
+    placed = set(order)
+    previous = None
+    for name in secondary:
+        if name not in placed:
+            order.insert(order.index(previous) + 1 if previous is not None else 0, name)
+            placed.add(name)
+        previous = name
+    return order
+
+
+def merge_files(base_path, ours_path, theirs_path, prefer="ours"):
+    return merge_three_way(load_document(base_path), load_document(ours_path), load_document(theirs_path), prefer)
+
+
+def format_conflict(conflict, width=80):
+    """'! path: base <base> | ours <ours> | theirs <theirs>', with '(absent)' for MISSING."""
+    def show(value):
+        return "(absent)" if value is MISSING else _short(value, width)
+    label = "order " if conflict.kind == "order" else ""
+    return f"! {format_path(conflict.path)}: {label}base {show(conflict.base)} | ours {show(conflict.ours)} | theirs {show(conflict.theirs)}"
+
+
+def conflict_to_json(conflict):
+    """A Conflict as a plain JSON object; sides where the value is absent are left out."""
+    entry = {"kind": conflict.kind, "path": format_path(conflict.path)}
+    for side in ("base", "ours", "theirs"):
+        value = getattr(conflict, side)
+        if value is not MISSING:
+            entry[side] = value
+    return entry
@@ -1,36 +1,50 @@
 import json
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, simpledialog
+import tkinter.font as tkfont
 import os # Needed for path operations
 import re # Needed for filename sanitization
+import queue # Hands progress from worker threads to the Tk thread
+import threading # Runs file operations off the Tk thread
 import traceback # For better error reporting
-import copy # Needed for deep copying objects
+
+import json_codec # Fast JSON parsing/serialization with stdlib-identical output
+import empire_core # GUI-free load/save/split/combine/merge logic shared with empire_cli.py
+import empire_index # Inverted index behind the dealer search box
+import empire_history # Undo/redo snapshots that share unchanged data
+import empire_journal # Write-ahead journal of edits for crash recovery
+import empire_schema # Schema check of the whole document, re-checking only edited dealers
 
 # --- Custom Dialog for Merge Conflicts ---
 class MergeConflictDialog(simpledialog.Dialog):
     """
-    Custom dialog to ask the user how to resolve a merge conflict
-    when a dealer with the same name already exists.
+    Custom dialog asking once how to resolve every merge conflict, i.e. each
+    incoming dealer whose name already exists with different content.
     """
-    def __init__(self, parent, title, dealer_name):
-        self.dealer_name = dealer_name
+    def __init__(self, parent, title, conflict_names):
+        self.conflict_names = conflict_names
         self.result = "cancel" # Default action if dialog is closed
         super().__init__(parent, title)
 
     def body(self, master):
         """Creates the dialog body."""
-        tk.Label(master, text=f"Dealer '{self.dealer_name}' already exists in the current data.").grid(row=0, columnspan=3, pady=10, padx=10)
-        tk.Label(master, text="How would you like to proceed?").grid(row=1, columnspan=3, padx=10)
+        count = len(self.conflict_names)
+        shown = ", ".join(self.conflict_names[:10]) + (f" and {count - 10} more" if count > 10 else "")
+        tk.Label(master, text=f"{count} dealer(s) already exist with different content:", justify=tk.LEFT).grid(row=0, columnspan=3, pady=(10, 0), padx=10, sticky="w")
+        tk.Label(master, text=shown, wraplength=480, justify=tk.LEFT).grid(row=1, columnspan=3, pady=5, padx=10, sticky="w")
+        tk.Label(master, text="How would you like to resolve all of them? (Identical dealers are skipped.)").grid(row=2, columnspan=3, padx=10, sticky="w")
         return None # No specific widget to focus on initially
 
     def buttonbox(self):
         """Creates the dialog buttons."""
         box = ttk.Frame(self)
 
-        keep_button = ttk.Button(box, text="Keep Existing", width=15, command=self.keep_existing)
+        keep_button = ttk.Button(box, text="Keep All Existing", width=17, command=self.keep_existing)
         keep_button.pack(side=tk.LEFT, padx=5, pady=10)
-        overwrite_button = ttk.Button(box, text="Overwrite with New", width=18, command=self.overwrite)
+        overwrite_button = ttk.Button(box, text="Overwrite All", width=15, command=self.overwrite)
         overwrite_button.pack(side=tk.LEFT, padx=5, pady=10)
+        newer_button = ttk.Button(box, text="Newer Version Wins", width=19, command=self.newer)
+        newer_button.pack(side=tk.LEFT, padx=5, pady=10)
         cancel_button = ttk.Button(box, text="Cancel Merge", width=15, command=self.cancel_merge)
         cancel_button.pack(side=tk.LEFT, padx=5, pady=10)
 
@@ -49,11 +63,243 @@ class MergeConflictDialog(simpledialog.Dialog):
         self.result = "overwrite"
         self.ok()
 
+    def newer(self, event=None):
+        """Sets result to 'newer' and closes dialog."""
+        self.result = "newer"
+        self.ok()
+
     def cancel_merge(self, event=None):
         """Sets result to 'cancel' and closes dialog using standard cancel method."""
         self.result = "cancel"
         self.cancel()
 
+# --- Progress Window for Long File Operations ---
+class ProgressDialog(tk.Toplevel):
+    """
+    Small modal window that runs a job on a worker thread, so the Tk mainloop
+    keeps running while files are read or written; its grab locks the editor
+    until the job ends. The job reports through progress(done, total), which
+    only queues the numbers; the Tk thread picks them up with after(). Cancel
+    makes the job's next progress() call raise OperationCancelled.
+    """
+    POLL_MS = 50
+
+    def __init__(self, parent, title, message, status="Processed {done} of {total} file(s)..."):
+        super().__init__(parent)
+        self.title(title)
+        self.transient(parent)
+        self.resizable(False, False)
+        self.status = status # Label text once progress arrives, formatted with done and total
+        self.protocol("WM_DELETE_WINDOW", self.cancel)
+        self.label = ttk.Label(self, text=message)
+        self.label.pack(padx=15, pady=(15, 5))
+        self.bar = ttk.Progressbar(self, length=320, mode="determinate")
+        self.bar.pack(padx=15, pady=(0, 10))
+        self.cancel_button = ttk.Button(self, text="Cancel", command=self.cancel)
+        self.cancel_button.pack(pady=(0, 15))
+        self._events = queue.Queue() # (done, total) from the worker, then None when it ends
+        self._cancelled = threading.Event()
+        self._outcome = None # (result, exception) of the job
+        self.wait_visibility() # Grabbing a window that is not mapped yet fails on X11, as in tkinter.simpledialog
+        self.grab_set()
+        self.cancel_button.focus_set()
+
+    def run(self, job):
+        """
+        Calls job(progress) on a worker thread and handles Tk events until it
+        ends, then closes the window. Returns what the job returned or raises
+        what it raised (OperationCancelled after Cancel).
+        """
+        threading.Thread(target=self._work, args=(job,), daemon=True).start()
+        self.after(self.POLL_MS, self._poll)
+        self.wait_window(self)
+        result, error = self._outcome
+        if error is not None: raise error
+        return result
+
+    def progress(self, done, total):
+        """Progress callback for the job; runs on the worker thread."""
+        if self._cancelled.is_set(): raise empire_core.OperationCancelled()
+        self._events.put((done, total))
+
+    def cancel(self):
+        self._cancelled.set()
+        self.cancel_button.state(["disabled"])
+        self.label.configure(text="Cancelling...")
+
+    def _work(self, job):
+        try:
+            self._outcome = (job(self.progress), None)
+        except BaseException as e:
+            self._outcome = (None, e)
+        self._events.put(None)
+
+    def _poll(self):
+        latest, finished = None, False
+        while not finished:
+            try: event = self._events.get_nowait()
+            except queue.Empty: break
+            if event is None: finished = True
+            else: latest = event
+        if latest and not self._cancelled.is_set():
+            done, total = latest
+            self.bar.configure(maximum=max(1, total), value=done)
+            self.label.configure(text=self.status.format(done=done, total=total))
+        if finished: self.destroy()
+        else: self.after(self.POLL_MS, self._poll)
+
+# --- Virtualized List for Dealers and Sub-Items ---
+def item_label(key, default):
+    """Row label function showing an item's position and its `key` field."""
+    return lambda index, item: f"{index}: {item.get(key, default)}"
+
+
+class VirtualListbox(ttk.Frame):
+    """
+    Listbox that shows a Python list without copying it into Tk. Only the
+    rows in view are rendered (through label(index, item)), so reloading,
+    inserting, removing or swapping items redraws one screen of rows however
+    long the list is. Offers the part of the tk.Listbox API the editor uses,
+    with indices into the whole list, and generates <<ListboxSelect>> when
+    the user changes the selection. color(index, item), when given, picks a
+    row's text color (None for the default).
+    """
+    def __init__(self, parent, label, height=10, color=None):
+        super().__init__(parent)
+        self.label = label
+        self.color = color
+        self.items = []
+        self.top = 0 # Index of the first rendered item
+        self.selected = None
+        self.listbox = tk.Listbox(self, height=height, exportselection=False, activestyle="none")
+        self.font = tkfont.Font(font=self.listbox.cget("font"))
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.listbox.bind("<<ListboxSelect>>", self._on_select)
+        self.listbox.bind("<Configure>", lambda e: self._render())
+        self.listbox.bind("<Up>", lambda e: self._step(-1))
+        self.listbox.bind("<Down>", lambda e: self._step(1))
+        self.listbox.bind("<Prior>", lambda e: self._step(-self._rows()))
+        self.listbox.bind("<Next>", lambda e: self._step(self._rows()))
+        self.listbox.bind("<MouseWheel>", lambda e: self._scroll_by(-3 if e.delta > 0 else 3))
+        self.listbox.bind("<Button-4>", lambda e: self._scroll_by(-3))
+        self.listbox.bind("<Button-5>", lambda e: self._scroll_by(3))
+
+    def _rows(self):
+        """Number of rows that fit in the listbox (its height option until it is drawn)."""
+        line = self.font.metrics("linespace") + 1 + 2 * int(self.listbox.cget("selectborderwidth"))
+        border = 2 * (int(self.listbox.cget("borderwidth")) + int(self.listbox.cget("highlightthickness")))
+        height = self.listbox.winfo_height() - border
+        if height < line:
+            return max(1, int(self.listbox.cget("height")))
+        return max(1, height // line)
+
+    def _render(self):
+        rows = self._rows()
+        self.top = max(0, min(self.top, len(self.items) - rows))
+        end = min(len(self.items), self.top + rows + 1) # One extra for a partly visible last row
+        disabled = str(self.listbox.cget("state")) == tk.DISABLED
+        if disabled: self.listbox.configure(state=tk.NORMAL)
+        self.listbox.delete(0, tk.END)
+        if end > self.top:
+            self.listbox.insert(0, *[self.label(i, self.items[i]) for i in range(self.top, end)])
+            if self.color:
+                for i in range(self.top, end):
+                    color = self.color(i, self.items[i])
+                    if color: self.listbox.itemconfig(i - self.top, foreground=color)
+        if self.selected is not None and self.top <= self.selected < end:
+            self.listbox.selection_set(self.selected - self.top)
+        if disabled: self.listbox.configure(state=tk.DISABLED)
+        if self.items:
+            self.scrollbar.set(self.top / len(self.items), min(1.0, (self.top + rows) / len(self.items)))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _on_select(self, event):
+        rows = self.listbox.curselection()
+        if rows and self.top + rows[0] < len(self.items):
+            self.selected = self.top + rows[0]
+            self.event_generate("<<ListboxSelect>>")
+
+    def _on_scroll(self, action, amount, unit=None):
+        if action == "moveto":
+            self.top = int(float(amount) * len(self.items))
+            self._render()
+        else:
+            self._scroll_by(int(amount) * (self._rows() if unit == "pages" else 1))
+
+    def _scroll_by(self, rows):
+        self.top += rows
+        self._render()
+        return "break"
+
+    def _step(self, delta):
+        if self.items and str(self.listbox.cget("state")) != tk.DISABLED:
+            current = self.selected if self.selected is not None else (-1 if delta > 0 else len(self.items))
+            self.selected = max(0, min(len(self.items) - 1, current + delta))
+            self.see(self.selected)
+            self.event_generate("<<ListboxSelect>>")
+        return "break"
+
+    # tk.Listbox-style API
+    def curselection(self):
+        return (self.selected,) if self.selected is not None else ()
+
+    def selection_set(self, index):
+        self.selected = index if 0 <= index < len(self.items) else None
+        self._render()
+
+    def selection_clear(self, first=None, last=None):
+        self.selected = None
+        self._render()
+
+    def activate(self, index):
+        pass # The selected row is the only one highlighted
+
+    def see(self, index):
+        rows = self._rows()
+        if index < self.top:
+            self.top = index
+        elif index >= self.top + rows:
+            self.top = index - rows + 1
+        self._render()
+
+    def size(self):
+        return len(self.items)
+
+    # Deltas: the caller changed `items` in place and reports how
+    def set_items(self, items, select=None):
+        """Shows `items` (kept by reference, not copied), selecting and scrolling to `select`."""
+        self.items = items
+        self.selected = select if select is not None and 0 <= select < len(items) else None
+        if self.selected is not None:
+            self.see(self.selected)
+        else:
+            self._render()
+
+    def refresh(self):
+        """Redraws the visible rows, e.g. after an item's name changed."""
+        self._render()
+
+    def inserted(self, index):
+        if self.selected is not None and self.selected >= index:
+            self.selected += 1
+        self._render()
+
+    def removed(self, index):
+        if self.selected == index:
+            self.selected = None
+        elif self.selected is not None and self.selected > index:
+            self.selected -= 1
+        self._render()
+
+    def swapped(self, first, second):
+        if self.selected in (first, second):
+            self.selected = second if self.selected == first else first
+        self._render()
+
+
 class DealerEditorApp:
     """
     Main application class for the Empire JSON Editor.
@@ -83,15 +329,35 @@ class DealerEditorApp:
         self.current_shipping_index = -1
         
         self.file_path = None
+        self.search_index = None # Built by the first search, then updated dealer by dealer
+        self.unlock_graph = empire_index.UnlockGraph() # Which dealers can unlock, updated after every edit
+        self.history = empire_history.History()
+        self.fragments = empire_core.FragmentCache() # Encoded dealers from the last save, reused by the next one
+        self.journal = None # Edits since the last save or load, for recovery after a crash
+        self.journal_base = None # What the journaled file holds, for compacting the journal
+        self.validator = empire_schema.Validator() # Remembers each dealer's problems until it is edited
+        self.problems = [] # Schema problems of the document as of the last commit
+        self.lazy_sections = {} # Detail section name -> (frame, fill(dealer)); filled when scrolled into view
+        self.filled_sections = set() # Lazy sections showing the current dealer
+        self.form_baseline = {} # Input widget (or variable) -> value it showed when filled, to spot user edits
+        self._form_inputs_cache = {}
+        self.details_enabled = False
 
         self.create_widgets()
+        pending_journals = empire_journal.pending_journals() # Read before new_file() restarts the untitled journal
         self.new_file(confirm=False) # Load default empty structure on start
+        self._offer_recovery(pending_journals)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(empire_journal.SYNC_INTERVAL_MS, self._sync_journal)
 
     # --- UI Creation Methods ---
     def create_widgets(self):
         """Creates the main application widgets and layout."""
         self._create_menu()
 
+        self.problems_label = ttk.Label(self.root, anchor="w", padding=(10, 0, 10, 5))
+        self.problems_label.pack(side=tk.BOTTOM, fill=tk.X)
+
         main_notebook = ttk.Notebook(self.root)
         main_notebook.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
 
@@ -119,12 +385,26 @@ class DealerEditorApp:
         filemenu.add_separator()
         filemenu.add_command(label="Exit", command=self.root.quit)
         menubar.add_cascade(label="File", menu=filemenu)
+        # Ctrl+Y is Redo only on Windows; X11 entries and text boxes bind it to paste.
+        on_windows = self.root.tk.call("tk", "windowingsystem") == "win32"
+        self.edit_menu = tk.Menu(menubar, tearoff=0)
+        self.edit_menu.add_command(label="Undo", command=self.undo, accelerator="Ctrl+Z", state=tk.DISABLED)
+        self.edit_menu.add_command(label="Redo", command=self.redo, accelerator="Ctrl+Y" if on_windows else "Ctrl+Shift+Z", state=tk.DISABLED)
+        self.edit_menu.add_separator()
+        self.edit_menu.add_command(label="Rename Dealer...", command=self.rename_dealer, accelerator="F2")
+        self.edit_menu.add_command(label="Check for Problems...", command=self.show_problems, accelerator="F8")
+        menubar.add_cascade(label="Edit", menu=self.edit_menu)
         self.root.config(menu=menubar)
 
         self.root.bind_all("<Control-n>", lambda e: self.new_file())
         self.root.bind_all("<Control-o>", lambda e: self.load_json())
         self.root.bind_all("<Control-s>", lambda e: self.save_json())
         self.root.bind_all("<Control-S>", lambda e: self.save_json_as())
+        self.root.bind_all("<Control-z>", lambda e: self.undo())
+        if on_windows: self.root.bind_all("<Control-y>", lambda e: self.redo())
+        self.root.bind_all("<Control-Z>", lambda e: self.redo())
+        self.root.bind_all("<F2>", lambda e: self.rename_dealer())
+        self.root.bind_all("<F8>", lambda e: self.show_problems())
 
 
     def _create_global_settings_section(self, parent_tab):
@@ -193,15 +473,22 @@ class DealerEditorApp:
         dealers_frame = ttk.LabelFrame(parent_pane, text="Dealers", padding=(10, 5))
         parent_pane.add(dealers_frame, weight=1)
 
+        self.search_frame = ttk.Frame(dealers_frame)
+        self.search_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(self.search_frame, text="Search:").pack(side=tk.LEFT, padx=(0, 5))
+        self.search_var = tk.StringVar()
+        ttk.Entry(self.search_frame, textvariable=self.search_var).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.search_var.trace_add("write", lambda *args: self.run_search())
+        # Shown below the search box only while there is a query
+        self.search_results = VirtualListbox(dealers_frame, self._search_result_label, height=6)
+        self.search_results.bind('<<ListboxSelect>>', self.open_search_result)
+
         dealer_list_controls_frame = ttk.Frame(dealers_frame)
         dealer_list_controls_frame.pack(fill=tk.BOTH, expand=True)
 
         dealer_list_frame = ttk.Frame(dealer_list_controls_frame)
         dealer_list_frame.pack(fill=tk.BOTH, expand=True, side=tk.LEFT, padx=(0,5))
-        dealer_scrollbar = ttk.Scrollbar(dealer_list_frame, orient=tk.VERTICAL)
-        self.dealer_list = tk.Listbox(dealer_list_frame, yscrollcommand=dealer_scrollbar.set, exportselection=False)
-        dealer_scrollbar.config(command=self.dealer_list.yview)
-        dealer_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.dealer_list = VirtualListbox(dealer_list_frame, self._dealer_label, color=lambda index, dealer: "red" if self.unlock_graph.blocker(dealer) else None)
         self.dealer_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         self.dealer_list.bind('<<ListboxSelect>>', self.load_selected_dealer)
 
@@ -223,7 +510,7 @@ class DealerEditorApp:
         details_outer_frame = ttk.Frame(parent_pane)
         parent_pane.add(details_outer_frame, weight=3)
         
-        details_canvas = tk.Canvas(details_outer_frame)
+        details_canvas = self.details_canvas = tk.Canvas(details_outer_frame)
         details_scrollbar = ttk.Scrollbar(details_outer_frame, orient="vertical", command=details_canvas.yview)
         self.details_scrollable_frame = ttk.Frame(details_canvas, padding=(10, 5))
 
@@ -233,7 +520,8 @@ class DealerEditorApp:
         details_canvas.bind_all("<Button-5>", lambda e: details_canvas.yview_scroll(1, "units"))
 
         details_canvas.create_window((0, 0), window=self.details_scrollable_frame, anchor="nw")
-        details_canvas.configure(yscrollcommand=details_scrollbar.set)
+        # Every scroll and resize reports here, which is when lazy sections may come into view.
+        details_canvas.configure(yscrollcommand=lambda first, last: (details_scrollbar.set(first, last), self._fill_visible_sections()))
         
         details_canvas.pack(side="left", fill="both", expand=True)
         details_scrollbar.pack(side="right", fill="y")
@@ -264,14 +552,16 @@ class DealerEditorApp:
         unlock_req_scrollbar = ttk.Scrollbar(unlock_req_text_frame, orient=tk.VERTICAL, command=self.unlock_requirements_text.yview)
         unlock_req_scrollbar.grid(row=0, column=1, sticky="ns")
         self.unlock_requirements_text.configure(yscrollcommand=unlock_req_scrollbar.set)
+        self.unlock_info_label = ttk.Label(basic_info_frame, wraplength=500, justify=tk.LEFT)
+        self.unlock_info_label.grid(row=4, column=1, padx=5, pady=(0, 2), sticky="w")
         
-        self.rep_log_base_entry = self._create_label_entry_pair(basic_info_frame, "Rep Log Base (int):", 4)
-        self.deal_days_entry = self._create_label_entry_pair(basic_info_frame, "Deal Days (str, comma-sep):", 5)
+        self.rep_log_base_entry = self._create_label_entry_pair(basic_info_frame, "Rep Log Base (int):", 5)
+        self.deal_days_entry = self._create_label_entry_pair(basic_info_frame, "Deal Days (str, comma-sep):", 6)
         
-        ttk.Label(basic_info_frame, text="Curfew Deal:").grid(row=6, column=0, padx=5, pady=2, sticky="w")
+        ttk.Label(basic_info_frame, text="Curfew Deal:").grid(row=7, column=0, padx=5, pady=2, sticky="w")
         self.curfew_deal_var = tk.StringVar()
         self.curfew_deal_combobox = ttk.Combobox(basic_info_frame, textvariable=self.curfew_deal_var, values=["True", "False"], state="readonly")
-        self.curfew_deal_combobox.grid(row=6, column=1, padx=5, pady=2, sticky="ew")
+        self.curfew_deal_combobox.grid(row=7, column=1, padx=5, pady=2, sticky="ew")
         self.curfew_deal_combobox.set("False")
 
         gift_frame = ttk.LabelFrame(parent_frame, text="Gift", padding=(10, 5))
@@ -311,22 +601,24 @@ class DealerEditorApp:
         deals_scrollbar = ttk.Scrollbar(deals_frame, orient=tk.VERTICAL, command=self.deals_text.yview)
         deals_scrollbar.grid(row=0, column=1, sticky="ns")
         self.deals_text.configure(yscrollcommand=deals_scrollbar.set)
+        self._add_lazy_section("deals", deals_frame, lambda dealer: self.text_from_deals(self.deals_text, dealer.get("deals", [])))
 
         self.drugs_list, self.drug_details_frame = self._create_list_detail_section(
             parent_frame, current_row, "Drugs", "Drug",
             self.add_drug, self.remove_drug, self.clone_drug, self.load_selected_drug,
-            self.create_drug_details_widgets
+            self.create_drug_details_widgets, item_label("type", "Unnamed Drug")
         ); current_row += 1
         
         self.shipping_list, self.shipping_details_frame = self._create_list_detail_section(
             parent_frame, current_row, "Shipping", "Shipping Option",
             self.add_shipping, self.remove_shipping, self.clone_shipping, self.load_selected_shipping,
-            self.create_shipping_details_widgets
+            self.create_shipping_details_widgets, item_label("name", "Unnamed Shipping")
         ); current_row += 1
 
         dialogue_frame = ttk.LabelFrame(parent_frame, text="Dialogue (One line per entry)", padding=(10, 5))
         dialogue_frame.grid(row=current_row, column=0, padx=5, pady=5, sticky="nsew"); current_row += 1
         self.create_dialogue_details_widgets(dialogue_frame)
+        self._add_lazy_section("dialogue", dialogue_frame, self._fill_dialogue)
 
         save_dealer_button = ttk.Button(parent_frame, text="Save Current Dealer", command=self.save_current_dealer)
         save_dealer_button.grid(row=current_row, column=0, pady=15, padx=5, sticky="ew"); current_row += 1
@@ -346,7 +638,7 @@ class DealerEditorApp:
         entry.grid(row=row_num, column=1, padx=5, pady=2, sticky="ew")
         return entry
 
-    def _create_list_detail_section(self, parent_frame, grid_row, section_label, item_name, add_cmd, remove_cmd, clone_cmd, select_cmd, create_detail_widgets_cmd):
+    def _create_list_detail_section(self, parent_frame, grid_row, section_label, item_name, add_cmd, remove_cmd, clone_cmd, select_cmd, create_detail_widgets_cmd, row_label):
         """Helper to create a standard listbox with add/remove/clone buttons and a details frame."""
         frame = ttk.LabelFrame(parent_frame, text=section_label, padding=(10, 5))
         frame.grid(row=grid_row, column=0, padx=5, pady=5, sticky="nsew")
@@ -355,9 +647,7 @@ class DealerEditorApp:
         list_frame = ttk.Frame(frame)
         list_frame.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 5))
         list_frame.columnconfigure(0, weight=1)
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL)
-        listbox = tk.Listbox(list_frame, height=5, yscrollcommand=scrollbar.set, exportselection=False)
-        scrollbar.config(command=listbox.yview); scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        listbox = VirtualListbox(list_frame, row_label, height=5)
         listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         listbox.bind('<<ListboxSelect>>', select_cmd)
 
@@ -388,13 +678,13 @@ class DealerEditorApp:
         self.qualities_list, self.quality_details_frame = self._create_list_detail_section(
             parent_frame, current_row, "Qualities", "Quality",
             self.add_quality, self.remove_quality, self.clone_quality, self.load_selected_quality,
-            self.create_quality_details_widgets
+            self.create_quality_details_widgets, item_label("type", "Unnamed Quality")
         ); current_row +=1
 
         self.effects_list, self.effect_details_frame = self._create_list_detail_section(
             parent_frame, current_row, "Effects", "Effect",
             self.add_effect, self.remove_effect, self.clone_effect, self.load_selected_effect,
-            self.create_effect_details_widgets
+            self.create_effect_details_widgets, item_label("name", "Unnamed Effect")
         ); current_row +=1
         
         self.set_widget_state(parent_frame, 'disabled')
@@ -450,6 +740,62 @@ class DealerEditorApp:
             
             self.dialogue_text_widgets[field_name] = text_widget
 
+    def _fill_dialogue(self, dealer):
+        dialogue_data = dealer.get("dialogue", {})
+        for field, widget in self.dialogue_text_widgets.items():
+            self.text_from_list(widget, dialogue_data.get(field, []))
+
+    # --- Lazy Detail Sections and Change Tracking ---
+    def _add_lazy_section(self, name, frame, fill):
+        """
+        Registers a detail section that load_selected_dealer leaves stale
+        until it is scrolled into view or one of its inputs gets the focus.
+        """
+        self.lazy_sections[name] = (frame, fill)
+        for widget in self._form_inputs(frame):
+            widget.bind("<FocusIn>", lambda e, name=name: self._fill_section(name), add="+")
+
+    def _fill_section(self, name):
+        if name in self.filled_sections or not (0 <= self.current_dealer_index < len(self.data["dealers"])): return
+        frame, fill = self.lazy_sections[name]
+        fill(self.data["dealers"][self.current_dealer_index])
+        self.filled_sections.add(name)
+        self._mark_clean(frame)
+
+    def _fill_visible_sections(self):
+        if len(self.filled_sections) == len(self.lazy_sections) or self.current_dealer_index == -1: return
+        top = self.details_canvas.canvasy(0)
+        bottom = top + self.details_canvas.winfo_height()
+        for name, (frame, fill) in self.lazy_sections.items():
+            # Before the first layout every height is 1; fill everything then rather than guess.
+            if frame.winfo_height() <= 1 or (frame.winfo_y() < bottom and frame.winfo_y() + frame.winfo_height() > top):
+                self._fill_section(name)
+
+    def _form_inputs(self, frame):
+        """The Entry, Combobox and Text widgets inside frame; the widget tree never changes, so this is cached."""
+        inputs = self._form_inputs_cache.get(frame)
+        if inputs is None:
+            inputs, pending = [], [frame]
+            while pending:
+                widget = pending.pop()
+                if isinstance(widget, (ttk.Entry, tk.Entry, tk.Text)): inputs.append(widget)
+                pending.extend(widget.winfo_children())
+            self._form_inputs_cache[frame] = inputs
+        return inputs
+
+    def _input_value(self, widget):
+        return widget.get("1.0", "end-1c") if isinstance(widget, tk.Text) else widget.get()
+
+    def _mark_clean(self, frame):
+        """Records what the inputs in frame show now, i.e. the data they were just filled from."""
+        for widget in self._form_inputs(frame):
+            self.form_baseline[widget] = self._input_value(widget)
+        self.form_baseline[self.debt_enabled_var] = self.debt_enabled_var.get()
+
+    def _form_changed(self):
+        """Whether the user edited any dealer, drug, quality, effect or shipping input since it was filled."""
+        return any(self._input_value(widget) != value for widget, value in self.form_baseline.items())
+
     # --- Utility Methods ---
     def set_widget_state(self, parent_widget, state):
         """Recursively sets the state ('normal' or 'disabled') for child widgets, skipping containers."""
@@ -470,14 +816,10 @@ class DealerEditorApp:
         if text_widget: text_widget.delete('1.0', tk.END)
     
     def clear_listbox(self, listbox):
-        if listbox: listbox.delete(0, tk.END)
+        if listbox: listbox.set_items([])
 
     def sanitize_filename(self, name):
-        if not name: return "unnamed_dealer"
-        name = str(name)
-        name = re.sub(r'[\\/*?:"<>|]', "", name)
-        name = name.replace(" ", "_")
-        return name[:100]
+        return empire_core.sanitize_filename(name)
 
     def safe_float(self, value_str, default=0.0):
         try: return float(value_str)
@@ -518,21 +860,19 @@ class DealerEditorApp:
     def deals_from_text(self, text_widget):
         lines = self.list_from_text(text_widget, item_type=str)
         if lines is None: return None # Error occurred in list_from_text
-        parsed_deals = []
+        parsed_deals, errors = [], []
         for i, line in enumerate(lines):
             parts = [p.strip() for p in line.split(',')]
-            if len(parts) == 4:
-                try:
-                    parsed_deals.append([
-                        self.safe_int(parts[0]), self.safe_float(parts[1]),
-                        self.safe_int(parts[2]), self.safe_int(parts[3])
-                    ])
-                except ValueError:
-                    messagebox.showerror("Deal Parse Error", f"Error parsing deal on line {i+1}: '{line}'. Expected int,float,int,int format.")
-                    return None
-            elif line:
-                messagebox.showerror("Deal Parse Error", f"Incorrect format for deal on line {i+1}: '{line}'. Expected 4 comma-separated values.")
-                return None
+            if len(parts) != 4:
+                errors.append(f"Line {i+1}: '{line}' does not have 4 comma-separated values.")
+                continue
+            try:
+                parsed_deals.append([int(float(parts[0])), float(parts[1]), int(float(parts[2])), int(float(parts[3]))])
+            except (ValueError, OverflowError): # int(float('inf')) overflows
+                errors.append(f"Line {i+1}: '{line}' is not in int,float,int,int format.")
+        if errors: # All bad lines at once, rather than one per attempt
+            messagebox.showerror("Deal Parse Error", "\n".join(errors))
+            return None
         return parsed_deals
 
     def text_from_deals(self, text_widget, deals_list):
@@ -545,7 +885,7 @@ class DealerEditorApp:
         self.clear_text(text_widget)
         if isinstance(list_of_objects, list):
             try:
-                lines = [json.dumps(obj, sort_keys=True, indent=None) for obj in list_of_objects]
+                lines = [json_codec.dumps(obj, sort_keys=True, indent=None) for obj in list_of_objects]
                 text_widget.insert("1.0", "\n".join(lines))
             except TypeError as e:
                 messagebox.showerror("JSON Error", f"Could not serialize object to JSON for display: {e}\nObject: {obj}")
@@ -555,15 +895,15 @@ class DealerEditorApp:
     def list_of_json_objects_from_text(self, text_widget):
         content = text_widget.get("1.0", tk.END).strip()
         lines = [line.strip() for line in content.split('\n') if line.strip()] if content else []
-        parsed_objects = []
+        parsed_objects, errors = [], []
         for i, line_str in enumerate(lines):
             try:
-                if line_str:
-                    parsed_obj = json.loads(line_str)
-                    parsed_objects.append(parsed_obj)
+                parsed_objects.append(json_codec.loads(line_str))
             except json.JSONDecodeError as e:
-                messagebox.showerror("JSON Parse Error", f"Error parsing an Unlock Requirement on line {i+1} as JSON: {e}\n\nContent: '{line_str}'\n\nPlease ensure each line is a valid JSON object (e.g., {{\"key\": \"value\"}}).")
-                return None
+                errors.append(f"Line {i+1}: {e}\n    '{line_str}'")
+        if errors:
+            messagebox.showerror("JSON Parse Error", "Could not parse these Unlock Requirements as JSON:\n\n" + "\n".join(errors) + "\n\nPlease ensure each line is a valid JSON object (e.g., {\"key\": \"value\"}).")
+            return None
         return parsed_objects
 
 
@@ -577,27 +917,14 @@ class DealerEditorApp:
         else:
             current_selection_value = select_index
 
-        self.clear_listbox(self.dealer_list)
-        for i, dealer in enumerate(self.data.get("dealers", [])):
-            self.dealer_list.insert(tk.END, f"{i}: {dealer.get('name', 'Unnamed Dealer')}")
-
-        if current_selection_value is not None and 0 <= current_selection_value < self.dealer_list.size():
-            self.dealer_list.selection_set(current_selection_value)
-            self.dealer_list.activate(current_selection_value)
-            self.dealer_list.see(current_selection_value)
-        else:
+        # Rows are rendered on demand, so this costs one screen of rows whatever the dealer count.
+        self.dealer_list.set_items(self.data.get("dealers", []), current_selection_value)
+        if not self.dealer_list.curselection():
             self.clear_dealer_details()
 
     def get_default_data_structure(self):
         """Returns a dictionary with the default empty structure for a new file."""
-        return {
-            "version": {"s1api": "1.0.0", "empire": "0.1"},
-            "effectsName": [], "effectsDollarMult": [],
-            "qualityTypes": [], "qualitiesDollarMult": [],
-            "productTypes": [], "randomNumberRanges": [],
-            "noNecessaryEffects": False,
-            "dealers": []
-        }
+        return empire_core.default_empire()
 
     def new_file(self, event=None, confirm=True):
         if confirm and not messagebox.askyesno("Confirm New File", "Discard all current data and start a new file?"):
@@ -610,6 +937,7 @@ class DealerEditorApp:
         self.file_path = None
         
         self._load_all_data_to_ui()
+        self._start_journal()
         self.root.title("Empire Editor - New File")
 
     def load_json(self, event=None):
@@ -621,28 +949,23 @@ class DealerEditorApp:
         if not path: return
 
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                loaded_full_structure = json.load(f)
-            
-            if not isinstance(loaded_full_structure, dict):
-                messagebox.showerror("Load Error", "Invalid JSON structure. Root must be an object (dictionary).")
-                return
+            progress = ProgressDialog(self.root, "Opening File", f"Reading {os.path.basename(path)}...", status="Read {done:,} of {total:,} bytes...")
+            loaded = progress.run(lambda report: empire_core.load_empire(path, progress=report))
 
-            dealers_list = loaded_full_structure.get("dealers")
-            if dealers_list is not None and isinstance(dealers_list, list):
-                self.data["dealers"] = dealers_list
-                self.other_top_level_keys = {k: v for k, v in loaded_full_structure.items() if k != "dealers"}
-            elif "name" in loaded_full_structure:
+            if loaded.kind == "empire":
+                self.data["dealers"] = loaded.dealers
+                self.other_top_level_keys = loaded.other_keys
+            elif loaded.kind == "dealer":
                 if not self.file_path and not self.data["dealers"]:
-                    self.data["dealers"] = [loaded_full_structure]
+                    self.data["dealers"] = loaded.dealers
                     self.other_top_level_keys = {}
                     messagebox.showinfo("File Loaded", f"Loaded '{os.path.basename(path)}' as a single dealer. It will be wrapped in a 'dealers' list and standard structure if saved as an empire file.")
                 else:
                     if messagebox.askyesno("Load Single Dealer", f"'{os.path.basename(path)}' appears to be a single dealer object. Merge it into the current data?"):
-                        self.data['dealers'].append(loaded_full_structure)
+                        self.data['dealers'].extend(loaded.dealers)
             else:
                 self.data["dealers"] = []
-                self.other_top_level_keys = loaded_full_structure
+                self.other_top_level_keys = loaded.other_keys
                 messagebox.showinfo("File Loaded", "No 'dealers' key found. Loaded other top-level keys. Dealers list is now empty.")
 
             
@@ -650,8 +973,11 @@ class DealerEditorApp:
             self.root.title(f"Empire Editor - {os.path.basename(self.file_path)}")
             self.current_dealer_index = -1
             self._load_all_data_to_ui()
+            self._start_journal(base=loaded)
 
+        except empire_core.OperationCancelled: return
         except json.JSONDecodeError: messagebox.showerror("Load Error", f"Could not decode JSON from file: {path}")
+        except empire_core.EmpireFileError as e: messagebox.showerror("Load Error", str(e))
         except Exception as e: messagebox.showerror("Load Error", f"An unexpected error occurred: {e}\n{traceback.format_exc()}")
 
     def save_json(self, event=None):
@@ -675,17 +1001,24 @@ class DealerEditorApp:
             messagebox.showerror("Save Error", "Could not save due to invalid data in one of the fields. Please check the error messages and try again.")
             return False
         
-        data_to_save = self.other_top_level_keys.copy()
-        data_to_save["dealers"] = self.data.get("dealers", [])
+        self._commit("Edit")
+        if self.problems and not messagebox.askyesno("Save With Problems", f"The data has {len(self.problems)} problem(s) the mod may not load:\n\n{self._problems_text(limit=15)}\n\nSave anyway?"):
+            return False
 
         try:
-            with open(path, 'w', encoding='utf-8') as f:
-                json.dump(data_to_save, f, indent=4)
+            dealers, other_keys = self.data.get("dealers", []), self.other_top_level_keys
+            progress = ProgressDialog(self.root, "Saving", f"Saving {os.path.basename(path)}...", status="Saved {done} of {total} dealer(s)...")
+            # Only the dealers edited since the last save are encoded again; the file is replaced once fully written.
+            progress.run(lambda report: empire_core.save_empire(path, dealers, other_keys, fragments=self.fragments, progress=report))
             self.file_path = path
+            self._start_journal()
             self.root.title(f"Empire Editor - {os.path.basename(self.file_path)}")
             if show_success_msg:
                  messagebox.showinfo("Save Success", f"Data saved successfully to {path}")
             return True
+        except empire_core.OperationCancelled:
+            messagebox.showinfo("Save Cancelled", f"The save was cancelled; {path} was not changed.")
+            return False
         except Exception as e:
             messagebox.showerror("Save Error", f"An error occurred while saving to {path}: {e}\n{traceback.format_exc()}")
             return False
@@ -693,6 +1026,11 @@ class DealerEditorApp:
     # --- Data Sync and UI Population ---
     def _load_all_data_to_ui(self):
         """Loads all in-memory data (global and dealers) into the UI widgets."""
+        self._reset_search_index()
+        self.fragments.clear()
+        self.history.reset(self.data["dealers"], self.other_top_level_keys); self._update_undo_menu()
+        self.unlock_graph.rebuild(self.data["dealers"])
+        self._validate()
         self._load_global_settings_to_ui()
         self.update_dealer_listbox()
         self.clear_dealer_details()
@@ -711,13 +1049,14 @@ class DealerEditorApp:
     def _sync_all_ui_to_data(self):
         """Saves all data from the UI back into the internal data structures."""
         if not self._save_global_settings_from_ui(): return False
-        if self.current_dealer_index != -1:
+        if self.current_dealer_index != -1 and self._form_changed(): # An untouched form already matches the data
             if not self._save_dealer_data(self.current_dealer_index, show_success=False):
                 return False
         return True
 
     def _save_global_settings_from_ui(self):
         """Saves data from the Global Settings tab into self.other_top_level_keys."""
+        self.other_top_level_keys = self.history.editable(self.other_top_level_keys)
         self.other_top_level_keys['version'] = {
             "s1api": self.version_s1api_entry.get(),
             "empire": self.version_empire_entry.get()
@@ -751,22 +1090,25 @@ class DealerEditorApp:
         output_dir = filedialog.askdirectory(title="Select Directory to Save Split Dealer Files")
         if not output_dir: return
 
-        success_count = 0; error_count = 0
-        for i, dealer_obj in enumerate(self.data["dealers"]):
-            dealer_name = dealer_obj.get('name', f'Unnamed_Dealer_{i}')
-            filename = self.sanitize_filename(dealer_name) + ".json"
-            filepath = os.path.join(output_dir, filename)
-            
-            dealer_file_content = self.other_top_level_keys.copy()
-            dealer_file_content["dealers"] = [dealer_obj]
-            
-            try:
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    json.dump(dealer_file_content, f, indent=4)
-                success_count += 1
-            except Exception as e:
-                error_count += 1
-                print(f"Error saving split file {filepath}: {e}\n{traceback.format_exc()}")
+        compact = messagebox.askyesnocancel(
+            "Split Format",
+            f"Write the global settings once to '{empire_core.GLOBALS_FILE_NAME}' and reference it from every dealer file?\n\n"
+            "Yes: compact files (combine and open them from this folder).\nNo: copy the global settings into every dealer file.")
+        if compact is None: return
+
+        dealers, other_keys = self.data["dealers"], self.other_top_level_keys
+        try:
+            progress = ProgressDialog(self.root, "Splitting Dealers", f"Writing {len(dealers)} dealer file(s)...")
+            result = progress.run(lambda report: empire_core.split_dealers(dealers, other_keys, output_dir, compact=compact, progress=report))
+        except empire_core.OperationCancelled:
+            messagebox.showinfo("Split Cancelled", f"Splitting was cancelled. The dealer files already written were kept in:\n{output_dir}")
+            return
+        except Exception as e:
+            messagebox.showerror("Split Error", f"Could not write the global settings file: {e}")
+            return
+        for filepath, error in result.errors:
+            print(f"Error saving split file {filepath}: {error}")
+        success_count, error_count = len(result.written), len(result.errors)
 
         msg = f"Splitting operation finished.\nSuccessfully saved: {success_count} dealer files.\nFailed: {error_count} files."
         if error_count > 0:
@@ -781,56 +1123,7 @@ class DealerEditorApp:
         )
         if not files_to_combine: return
 
-        combined_dealers_list = []
-        loaded_dealer_names = set()
-        errors_loading_files = []
-        first_file_other_keys = None
-
-        for filepath in files_to_combine:
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    file_content = json.load(f)
-                
-                if not isinstance(file_content, dict):
-                    errors_loading_files.append(f"Not an object: {os.path.basename(filepath)}")
-                    continue
-
-                current_file_other_keys = {k:v for k,v in file_content.items() if k != "dealers"}
-                if first_file_other_keys is None and current_file_other_keys:
-                    first_file_other_keys = current_file_other_keys
-                
-                dealers_from_this_file = []
-                if isinstance(file_content.get("dealers"), list):
-                    dealers_from_this_file = file_content["dealers"]
-                elif "name" in file_content:
-                    dealers_from_this_file = [file_content]
-                
-                for dealer_obj in dealers_from_this_file:
-                    if isinstance(dealer_obj, dict) and "name" in dealer_obj:
-                        name = dealer_obj['name']
-                        if name not in loaded_dealer_names:
-                            combined_dealers_list.append(dealer_obj)
-                            loaded_dealer_names.add(name)
-                    else:
-                        errors_loading_files.append(f"Invalid dealer structure in {os.path.basename(filepath)}")
-            except Exception as e:
-                errors_loading_files.append(f"Error reading {os.path.basename(filepath)}: {e}")
-
-        if not combined_dealers_list:
-            messagebox.showerror("Combine Error", "No valid dealer data found in the selected files.")
-            return
-        
-        final_other_keys = first_file_other_keys if first_file_other_keys is not None else {}
-        final_combined_data_to_save = final_other_keys.copy()
-        final_combined_data_to_save["dealers"] = combined_dealers_list
-
-        report_message = f"Found {len(combined_dealers_list)} unique dealers to combine."
-        if errors_loading_files:
-            report_message += "\n\nErrors encountered while loading some files:\n- " + "\n- ".join(errors_loading_files)
-            messagebox.showwarning("Combine Issues", report_message)
-        else:
-            messagebox.showinfo("Combine Ready", report_message + "\nReady to save the combined file.")
-
+        # The combined file is written while the inputs are parsed, so ask where it goes up front.
         save_path = filedialog.asksaveasfilename(
             title="Save Combined Empire File As...",
             defaultextension=".json", filetypes=[("JSON files", "*.json")],
@@ -839,18 +1132,41 @@ class DealerEditorApp:
         if not save_path: return
 
         try:
-            with open(save_path, 'w', encoding='utf-8') as f:
-                json.dump(final_combined_data_to_save, f, indent=4)
-            
-            if messagebox.askyesno("Combine Success", f"Combined data saved successfully to:\n{save_path}\n\nLoad this new file into the editor?"):
-                self.other_top_level_keys = final_other_keys
-                self.data["dealers"] = combined_dealers_list
-                self.file_path = save_path
-                self.root.title(f"Empire Editor - {os.path.basename(self.file_path)}")
-                self.current_dealer_index = -1
-                self._load_all_data_to_ui()
+            progress = ProgressDialog(self.root, "Combining Dealers", f"Reading {len(files_to_combine)} file(s)...")
+            summary = progress.run(lambda report: empire_core.combine_to_file(files_to_combine, save_path, progress=report))
+        except empire_core.OperationCancelled:
+            messagebox.showinfo("Combine Cancelled", "Combining was cancelled; no file was written.")
+            return
         except Exception as e:
             messagebox.showerror("Save Error", f"An error occurred while saving the combined file: {e}")
+            return
+
+        if not summary.written:
+            messagebox.showerror("Combine Error", "No valid dealer data found in the selected files.")
+            return
+
+        report_message = f"Combined {summary.written} unique dealers and saved them to:\n{save_path}"
+        if summary.errors:
+            report_message += "\n\nErrors encountered while loading some files:\n- " + "\n- ".join(summary.errors)
+            messagebox.showwarning("Combine Issues", report_message)
+            report_message = f"Combined data saved to:\n{save_path}"
+
+        if messagebox.askyesno("Combine Success", report_message + "\n\nLoad this new file into the editor?"):
+            try:
+                progress = ProgressDialog(self.root, "Opening File", f"Reading {os.path.basename(save_path)}...", status="Read {done:,} of {total:,} bytes...")
+                loaded = progress.run(lambda report: empire_core.load_empire(save_path, progress=report))
+            except empire_core.OperationCancelled:
+                return
+            except Exception as e:
+                messagebox.showerror("Load Error", f"Could not load the combined file: {e}")
+                return
+            self.other_top_level_keys = loaded.other_keys
+            self.data["dealers"] = loaded.dealers
+            self.file_path = save_path
+            self.root.title(f"Empire Editor - {os.path.basename(self.file_path)}")
+            self.current_dealer_index = -1
+            self._load_all_data_to_ui()
+            self._start_journal()
 
     def merge_dealers(self):
         if not self._sync_all_ui_to_data():
@@ -864,47 +1180,345 @@ class DealerEditorApp:
         if not path_to_merge: return
 
         try:
-            with open(path_to_merge, 'r', encoding='utf-8') as f:
-                merge_file_content = json.load(f)
-            
-            if not isinstance(merge_file_content, dict) or not isinstance(merge_file_content.get("dealers"), list):
-                messagebox.showerror("Merge Error", "Invalid merge file format. Expected an object with a 'dealers' list.")
-                return
-            dealers_to_merge_from_file = merge_file_content["dealers"]
+            merge_source = empire_core.read_merge_file(path_to_merge)
+        except empire_core.EmpireFileError as e:
+            messagebox.showerror("Merge Error", str(e)); return
         except Exception as e:
             messagebox.showerror("Merge Error", f"Error reading merge file: {e}"); return
 
-        existing_dealers_map = {d.get('name'): i for i, d in enumerate(self.data["dealers"]) if d.get('name')}
-        added_count, overwritten_count, kept_count, merge_cancelled_by_user = 0,0,0,False
+        # One decision for all conflicting dealers instead of a dialog per name.
+        policy = "keep"
+        conflicts = empire_core.find_merge_conflicts(self.data["dealers"], merge_source.dealers)
+        if conflicts:
+            policy = MergeConflictDialog(self.root, "Merge Conflicts", conflicts).result
+            if policy == "cancel":
+                messagebox.showinfo("Merge Cancelled", "Merge operation was cancelled by the user.")
+                return
 
-        for new_dealer_obj in dealers_to_merge_from_file:
-            new_dealer_name = new_dealer_obj.get('name')
-            if not new_dealer_name:
-                print(f"Warning: Skipping dealer with no name from merge file: {new_dealer_obj}")
-                continue
+        resolve = empire_core.merge_policy(policy, empire_core.file_version(self.other_top_level_keys), empire_core.file_version(merge_source.other_keys))
+        result = empire_core.merge_dealers(self.data["dealers"], merge_source.dealers, resolve)
+        for dealer_obj in result.skipped:
+            print(f"Warning: Skipping dealer without a valid name from merge file: {dealer_obj}")
 
-            if new_dealer_name in existing_dealers_map:
-                dialog = MergeConflictDialog(self.root, "Merge Conflict", new_dealer_name)
-                action = dialog.result
-                
-                if action == "overwrite":
-                    self.data["dealers"][existing_dealers_map[new_dealer_name]] = new_dealer_obj
-                    overwritten_count += 1
-                elif action == "keep":
-                    kept_count += 1
-                else:
-                     messagebox.showinfo("Merge Cancelled", "Merge operation was cancelled by the user.")
-                     merge_cancelled_by_user = True
-                     break
-            else:
-                self.data["dealers"].append(new_dealer_obj)
-                added_count += 1
-                existing_dealers_map[new_dealer_name] = len(self.data["dealers"]) - 1
+        messagebox.showinfo("Merge Complete", "Merge operation finished.\n" + empire_core.merge_summary(result))
+        self._reset_search_index()
+        self._commit("Merge")
+        self.update_dealer_listbox()
+        self.clear_dealer_details()
+
+    # --- Dealer Search ---
+    def _reset_search_index(self):
+        """Drops the index after the dealers list was replaced; the next search rebuilds it."""
+        self.search_index = None
+        self._refresh_search()
+
+    def _index_dealer(self, dealer):
+        """Re-indexes one added or edited dealer (nothing to do until the first search)."""
+        if self.search_index is not None:
+            self.search_index.update_dealer(dealer)
+            self._refresh_search()
+
+    def _unindex_dealer(self, dealer):
+        if self.search_index is not None:
+            self.search_index.remove_dealer(dealer)
+            self._refresh_search()
+
+    def _refresh_search(self):
+        """Reruns the current search, e.g. after dealers were edited or moved."""
+        if self.search_var.get().strip(): self.run_search(keep_selection=True)
+
+    def run_search(self, keep_selection=False):
+        query = self.search_var.get()
+        if not empire_index.parse_query(query):
+            self.search_results.set_items([])
+            self.search_results.pack_forget()
+            return
+        if self.search_index is None:
+            self.search_index = empire_index.SearchIndex(self.data["dealers"])
+        selected = self.search_results.curselection() if keep_selection else ()
+        self.search_results.set_items(self.search_index.search(query, self.data["dealers"]), selected[0] if selected else None)
+        if not self.search_results.winfo_ismapped():
+            self.search_results.pack(fill=tk.X, pady=(0, 5), after=self.search_frame)
+
+    def _search_result_label(self, index, hit):
+        found = [empire_index.describe_match(entry) for entry in self.search_index.matches(hit.dealer, self.search_var.get()) if entry.field != "dealer"]
+        label = f"{hit.index}: {hit.dealer.get('name', 'Unnamed Dealer')}"
+        if found: label += " - " + ", ".join(found[:3]) + (f" (+{len(found) - 3})" if len(found) > 3 else "")
+        return label if len(label) <= 150 else label[:147] + "..."
+
+    def open_search_result(self, event):
+        """Selects the dealer of the chosen result and the drug, quality, effect or shipping option that matched."""
+        selected = self.search_results.curselection()
+        if not selected: return
+        hit = self.search_results.items[selected[0]]
+        if not (0 <= hit.index < len(self.data["dealers"])) or self.data["dealers"][hit.index] is not hit.dealer:
+            self.run_search(); return # The list changed since this result was found
+        matches = self.search_index.matches(hit.dealer, self.search_var.get())
+
+        self.dealer_list.selection_set(hit.index); self.dealer_list.see(hit.index)
+        self.load_selected_dealer(None)
+        for entry in matches:
+            if entry.field in ("drug", "quality", "effect"):
+                self.drugs_list.selection_set(entry.location[0]); self.drugs_list.see(entry.location[0])
+                self.load_selected_drug(None)
+                if entry.field == "quality":
+                    self.qualities_list.selection_set(entry.location[1]); self.qualities_list.see(entry.location[1])
+                    self.load_selected_quality(None)
+                elif entry.field == "effect":
+                    self.effects_list.selection_set(entry.location[1]); self.effects_list.see(entry.location[1])
+                    self.load_selected_effect(None)
+                break
+            if entry.field == "shipping":
+                self.shipping_list.selection_set(entry.location[0]); self.shipping_list.see(entry.location[0])
+                self.load_selected_shipping(None)
+                break
+
+    # --- Undo / Redo ---
+    def _editable_dealer(self, index):
+        """The dealer at index, copied first if an undo snapshot still shares it."""
+        dealer = self.data["dealers"][index]
+        editable = self.history.thaw(self.data["dealers"], index)
+        if editable is not dealer: self._unindex_dealer(dealer)
+        return editable
+
+    def _editable_list(self, key):
+        """
+        The current dealer's (drugs, shipping) or current drug's (qualities,
+        effects) list, made editable along with its parents, so that a change
+        copies only the path from the dealers list down to it.
+        """
+        if key in ("qualities", "effects"):
+            parent = self._editable_item("drugs", self.current_drug_index)
+        else:
+            parent = self._editable_dealer(self.current_dealer_index)
+        if not isinstance(parent.get(key), list): parent[key] = []
+        items = self.history.thaw(parent, key)
+        listbox = {"drugs": self.drugs_list, "qualities": self.qualities_list, "effects": self.effects_list, "shipping": self.shipping_list}[key]
+        if listbox.items is not items:
+            listbox.set_items(items, listbox.selected)
+        return items
+
+    def _editable_item(self, key, index):
+        return self.history.thaw(self._editable_list(key), index)
+
+    def _index_current_dealer(self):
+        self._index_dealer(self.data["dealers"][self.current_dealer_index])
+
+    def _commit(self, label):
+        """Ends one user action: records it as an undo step and in the journal, unless nothing changed."""
+        before = self.history.current
+        if self.history.commit(self.data["dealers"], self.other_top_level_keys, label):
+            self._journal_change(before, self.history.current)
+            self._update_undo_menu()
+            self._sync_unlock_graph()
+            self._validate()
+
+    def _update_undo_menu(self):
+        undo_label, redo_label = self.history.undo_label(), self.history.redo_label()
+        self.edit_menu.entryconfigure(0, label=f"Undo {undo_label}" if undo_label else "Undo", state=tk.NORMAL if undo_label else tk.DISABLED)
+        self.edit_menu.entryconfigure(1, label=f"Redo {redo_label}" if redo_label else "Redo", state=tk.NORMAL if redo_label else tk.DISABLED)
+
+    def undo(self):
+        self._sync_all_ui_to_data() # Pending form edits become their own step, undone first
+        self._commit("Edit")
+        before = self.history.current
+        snapshot = self.history.undo()
+        if snapshot is not None: self._restore_snapshot(before, snapshot)
+
+    def redo(self):
+        self._sync_all_ui_to_data()
+        self._commit("Edit") # Editing after an undo drops the redo steps, as usual
+        before = self.history.current
+        snapshot = self.history.redo()
+        if snapshot is not None: self._restore_snapshot(before, snapshot)
+
+    def _restore_snapshot(self, before, snapshot):
+        self._journal_change(before, snapshot)
+        selected = self.current_dealer_index
+        self.current_dealer_index = -1 # The form shows the replaced data; don't save it back
+        self.data["dealers"][:] = snapshot.dealers
+        self.other_top_level_keys = snapshot.other_keys
+        self._reset_search_index()
+        self._load_global_settings_to_ui()
+        self.update_dealer_listbox(select_index=selected if 0 <= selected < len(self.data["dealers"]) else None)
+        if self.dealer_list.curselection(): self.load_selected_dealer(None)
+        else: self.clear_dealer_details()
+        self._update_undo_menu()
+        self._sync_unlock_graph()
+        self._validate()
+
+    # --- Unlock Requirements ---
+    def _dealer_label(self, index, dealer):
+        label = f"{index}: {dealer.get('name', 'Unnamed Dealer')}"
+        blocker = self.unlock_graph.blocker(dealer)
+        return f"{label} (never unlocks: {blocker})" if blocker else label
+
+    def _sync_unlock_graph(self):
+        """Updates the unlock graph after an edit; costs only what the edited dealers' names and requirements affect."""
+        self.unlock_graph.sync(self.data["dealers"])
+        self.dealer_list.refresh()
+        self._update_unlock_info()
+
+    def _update_unlock_info(self):
+        """Shows under the requirements whom the current dealer unlocks, or why it never unlocks."""
+        if not (0 <= self.current_dealer_index < len(self.data["dealers"])):
+            self.unlock_info_label.config(text="", foreground=""); return
+        dealer = self.data["dealers"][self.current_dealer_index]
+        blocker = self.unlock_graph.blocker(dealer)
+        if blocker:
+            self.unlock_info_label.config(text=f"Never unlocks: {blocker}", foreground="red"); return
+        unlocks = sorted(other.get("name", "") for other in self.unlock_graph.unlocks(dealer.get("name", "")))
+        shown = ", ".join(unlocks[:10]) + (f" (+{len(unlocks) - 10})" if len(unlocks) > 10 else "")
+        self.unlock_info_label.config(text=f"Unlocks: {shown}" if unlocks else "Unlocks: nothing", foreground="")
+
+    def _rename_references(self, old_name, new_name):
+        """
+        Points the unlock requirements naming old_name at new_name, after the
+        dealer called old_name was renamed. The graph's reverse index finds
+        them, so this costs the same in a large file as in a small one.
+        Nothing changes while another dealer still has the old name.
+        """
+        self.unlock_graph.sync(self.data["dealers"]) # Positions as of now, and the renamed dealer under its new name
+        if self.unlock_graph.named(old_name): return
+        for dealer, requirement_indices in self.unlock_graph.references(old_name):
+            index = self.unlock_graph.position(dealer)
+            edited = self._editable_dealer(index)
+            requirements = self.history.thaw(edited, "unlockRequirements")
+            for i in requirement_indices:
+                self.history.thaw(requirements, i)["name"] = new_name
+            self._index_dealer(edited)
+            if index == self.current_dealer_index: # A dealer requiring itself; the form must not save the old name back
+                self.text_from_list_of_json_objects(self.unlock_requirements_text, requirements)
+                self.form_baseline[self.unlock_requirements_text] = self._input_value(self.unlock_requirements_text)
+
+    def rename_dealer(self, event=None):
+        """Renames the selected dealer and every unlock requirement naming it, as one undo step."""
+        if not (0 <= self.current_dealer_index < len(self.data["dealers"])):
+            messagebox.showwarning("Rename Error", "No dealer selected to rename."); return
+        if not self._sync_all_ui_to_data(): return
+        self._commit("Edit") # Pending form edits stay a step of their own
+        index = self.current_dealer_index
+        old_name = self.data["dealers"][index].get("name", "")
+        new_name = simpledialog.askstring("Rename Dealer", f"New name for '{old_name}':", initialvalue=old_name, parent=self.root)
+        if new_name is None: return
+        new_name = new_name.strip()
+        if not new_name or new_name == old_name: return
+        if self.unlock_graph.named(new_name) and not messagebox.askyesno("Rename Dealer", f"Another dealer is already called '{new_name}'. Requirements naming it would then match both. Rename anyway?"):
+            return
+
+        references = len(self.unlock_graph.unlocks(old_name))
+        self._editable_dealer(index)["name"] = new_name
+        if isinstance(old_name, str) and old_name: self._rename_references(old_name, new_name)
+        self._index_current_dealer()
+        self.clear_entry(self.name_entry); self.name_entry.insert(0, new_name)
+        self.form_baseline[self.name_entry] = new_name
+        self.dealer_list.refresh()
+        self._commit(f"Rename Dealer '{old_name}'")
+        if references and self.unlock_graph.named(old_name):
+            messagebox.showinfo("Rename Dealer", f"Another dealer is still called '{old_name}', so the {references} dealer(s) requiring that name were left as they are.")
+        elif references:
+            messagebox.showinfo("Rename Dealer", f"Renamed '{old_name}' to '{new_name}' and updated the unlock requirements of {references} dealer(s).")
+
+    # --- Validation ---
+    def _validate(self):
+        """Checks the committed document against the schema; only dealers edited since the last check are looked at."""
+        snapshot = self.history.current
+        self.problems = self.validator.validate(empire_core.empire_document(list(snapshot.dealers), snapshot.other_keys))
+        locked = self.unlock_graph.locked_count()
+        text = f"{len(self.problems)} problem(s), first: {empire_schema.format_problem(self.problems[0])} (Edit > Check for Problems... lists them all)" if self.problems else ""
+        if locked: text += (" " if text else "") + f"{locked} dealer(s) never unlock (shown in red)."
+        text = text or "No problems found."
+        self.problems_label.config(text=text)
+
+    def _problems_text(self, limit=40):
+        lines = [empire_schema.format_problem(problem) for problem in self.problems[:limit]]
+        if len(self.problems) > limit: lines.append(f"... and {len(self.problems) - limit} more.")
+        return "\n".join(lines)
+
+    def show_problems(self, event=None):
+        self._sync_all_ui_to_data() # Pending form edits are checked too
+        self._commit("Edit")
+        text = self._problems_text() if self.problems else ""
+        if self.unlock_graph.locked_count():
+            blocked = [f"{index}: {dealer.get('name', 'Unnamed Dealer')} - {blocker}" for index, dealer in enumerate(self.data["dealers"])
+                       for blocker in [self.unlock_graph.blocker(dealer)] if blocker]
+            text += ("\n\n" if text else "") + f"{len(blocked)} dealer(s) never unlock:\n" + "\n".join(blocked[:20]) + (f"\n... and {len(blocked) - 20} more." if len(blocked) > 20 else "")
+        if not text:
+            messagebox.showinfo("Check for Problems", "No problems found.")
+        else:
+            messagebox.showwarning("Check for Problems", f"Found {len(self.problems)} problem(s):\n\n{text}" if self.problems else text)
+
+    # --- Edit Journal ---
+    def _start_journal(self, base=None):
+        """
+        Starts journaling edits to self.file_path, which holds `base` (an
+        EmpireFile or Snapshot; by default the data as it is now). Called
+        after New, Open and Save; the previous journal is dropped.
+        """
+        current = self.history.current
+        if base is None: base = current
+        try:
+            if self.journal is not None: self.journal.discard()
+            self.journal = empire_journal.Journal(empire_journal.journal_path(self.file_path))
+            self.journal.start(self.file_path, empire_journal.document_ops(base, current))
+            self.journal_base = base
+        except OSError as e:
+            print(f"Warning: Could not start the edit journal, crash recovery is off: {e}")
+            self.journal = None
+
+    def _journal_change(self, before, after):
+        if self.journal is None: return
+        try:
+            self.journal.append(empire_journal.document_ops(before, after))
+            if self.journal.needs_compaction():
+                self.journal.compact(empire_journal.document_ops(self.journal_base, after))
+        except OSError as e:
+            print(f"Warning: Could not write the edit journal, crash recovery is off: {e}")
+            self.journal = None
+
+    def _sync_journal(self):
+        """Timer: puts the edits journaled since the last call on disk."""
+        if self.journal is not None:
+            try: self.journal.sync()
+            except OSError as e:
+                print(f"Warning: Could not write the edit journal, crash recovery is off: {e}")
+                self.journal = None
+        self.root.after(empire_journal.SYNC_INTERVAL_MS, self._sync_journal)
+
+    def _offer_recovery(self, pending_journals):
+        """Offers to replay the edits journaled by a session that ended without saving them."""
+        # The untitled journal was already restarted by new_file(), so it is offered first while its edits are in memory.
+        for pending in sorted(pending_journals, key=lambda pending: pending.base.get("file") is not None):
+            file_path = pending.base.get("file")
+            name = os.path.basename(file_path) if file_path else "a new unsaved file"
+            if not messagebox.askyesno("Recover Unsaved Changes", f"The editor closed with {len(pending.ops)} unsaved change(s) to {name}. Recover them?\n\nNo: discard them."):
+                if os.path.exists(pending.path) and (self.journal is None or pending.path != self.journal.path): os.remove(pending.path)
+                continue
+            try:
+                saved, recovered = empire_journal.recover(pending)
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Recovery Error", f"Could not recover the changes to {name}: {e}")
+                continue
+            self.data["dealers"] = recovered.dealers
+            self.other_top_level_keys = recovered.other_keys
+            self.file_path = file_path
+            self.current_dealer_index = -1
+            self._load_all_data_to_ui()
+            self._start_journal(base=saved) # The recovered edits stay journaled until saved
+            self.root.title(f"Empire Editor - {os.path.basename(file_path) if file_path else 'New File'} (recovered)")
+            return # One document at a time; other journals are offered next start
 
-        if not merge_cancelled_by_user:
-             messagebox.showinfo("Merge Complete", f"Merge operation finished.\nDealers Added: {added_count}\nDealers Overwritten: {overwritten_count}\nDealers Kept Existing: {kept_count}")
-             self.update_dealer_listbox()
-             self.clear_dealer_details()
+    def on_close(self):
+        """Keeps the journal only when it holds edits that were not saved."""
+        if self.journal is not None:
+            try:
+                self._sync_all_ui_to_data()
+                self._commit("Edit")
+                if empire_journal.document_ops(self.journal_base, self.history.current): self.journal.close()
+                else: self.journal.discard()
+            except OSError as e:
+                print(f"Warning: Could not close the edit journal: {e}")
+        self.root.destroy()
 
     # --- Dealer List Management & Reordering ---
     def move_dealer_up(self):
@@ -922,7 +1536,9 @@ class DealerEditorApp:
         if self.current_dealer_index == current_pos: self.current_dealer_index = current_pos - 1
         elif self.current_dealer_index == current_pos -1: self.current_dealer_index = current_pos
 
-        self.update_dealer_listbox(select_index=current_pos - 1)
+        self.dealer_list.swapped(current_pos, current_pos - 1); self.dealer_list.see(current_pos - 1)
+        self._refresh_search()
+        self._commit("Move Dealer")
 
     def move_dealer_down(self):
         selected_indices = self.dealer_list.curselection()
@@ -939,24 +1555,19 @@ class DealerEditorApp:
         if self.current_dealer_index == current_pos: self.current_dealer_index = current_pos + 1
         elif self.current_dealer_index == current_pos + 1: self.current_dealer_index = current_pos
 
-        self.update_dealer_listbox(select_index=current_pos + 1)
+        self.dealer_list.swapped(current_pos, current_pos + 1); self.dealer_list.see(current_pos + 1)
+        self._refresh_search()
+        self._commit("Move Dealer")
 
     # --- CRUD Operations for Dealers and Sub-Items ---
     def add_dealer(self):
-        new_dealer = {
-            "name": "New Dealer", "image": "", "tier": 0,
-            "unlockRequirements": [], "deals": [], "dealDays": [],
-            "curfewDeal": False,
-            "repLogBase": 10,
-            "gift": {"cost": 0, "rep": 0},
-            "reward": {"rep_cost": 0, "unlockRep": 0, "type": "", "args": []},
-            "drugs": [], "shipping": [],
-            "dialogue": {key: [] for key in ["intro", "dealStart", "accept", "incomplete", "expire", "fail", "success", "reward"]}
-        }
+        new_dealer = empire_core.new_dealer()
         self.data["dealers"].append(new_dealer)
+        self._index_dealer(new_dealer)
         new_idx = len(self.data["dealers"]) - 1
-        self.update_dealer_listbox(select_index=new_idx)
+        self.dealer_list.selection_set(new_idx); self.dealer_list.see(new_idx)
         self.load_selected_dealer(None)
+        self._commit("Add Dealer")
 
     def remove_dealer(self):
         selected_indices = self.dealer_list.curselection()
@@ -966,11 +1577,12 @@ class DealerEditorApp:
         index_to_remove = selected_indices[0]
         if 0 <= index_to_remove < len(self.data["dealers"]):
             dealer_name = self.data["dealers"][index_to_remove].get('name', 'Unnamed Dealer')
-            if messagebox.askyesno("Confirm Removal", f"Are you sure you want to remove dealer '{dealer_name}'? This action cannot be undone."):
-                del self.data["dealers"][index_to_remove]
+            if messagebox.askyesno("Confirm Removal", f"Are you sure you want to remove dealer '{dealer_name}'?"):
+                self._unindex_dealer(self.data["dealers"].pop(index_to_remove))
                 self.current_dealer_index = -1
-                self.update_dealer_listbox()
-                if not self.data["dealers"]: self.clear_dealer_details()
+                self.dealer_list.removed(index_to_remove)
+                self.clear_dealer_details()
+                self._commit(f"Remove Dealer '{dealer_name}'")
         else:
             messagebox.showerror("Remove Error", "Invalid dealer index selected for removal.")
 
@@ -985,8 +1597,9 @@ class DealerEditorApp:
         new_index = selected_indices[0]
 
         if self.current_dealer_index != -1 and self.current_dealer_index != new_index:
-            if 0 <= self.current_dealer_index < len(self.data['dealers']):
+            if 0 <= self.current_dealer_index < len(self.data['dealers']) and self._form_changed():
                 self._save_dealer_data(self.current_dealer_index, show_success=False)
+                self._commit("Edit Dealer")
 
         self.current_dealer_index = new_index
         try:
@@ -994,13 +1607,16 @@ class DealerEditorApp:
                  raise IndexError("Selected dealer index is out of bounds.")
             
             dealer = self.data["dealers"][self.current_dealer_index]
-            self.set_widget_state(self.details_scrollable_frame, 'normal')
+            if not self.details_enabled: # Switching between dealers leaves the widgets enabled
+                self.set_widget_state(self.details_scrollable_frame, 'normal')
+                self.details_enabled = True
 
             self.clear_entry(self.name_entry); self.name_entry.insert(0, dealer.get("name", ""))
             self.clear_entry(self.image_entry); self.image_entry.insert(0, dealer.get("image", ""))
             self.clear_entry(self.tier_entry); self.tier_entry.insert(0, str(dealer.get("tier", 0)))
             
             self.text_from_list_of_json_objects(self.unlock_requirements_text, dealer.get("unlockRequirements", []))
+            self._update_unlock_info()
             
             self.clear_entry(self.rep_log_base_entry); self.rep_log_base_entry.insert(0, str(dealer.get("repLogBase", 10)))
             self.clear_entry(self.deal_days_entry); self.deal_days_entry.insert(0, self.string_from_list(dealer.get("dealDays", [])))
@@ -1031,14 +1647,14 @@ class DealerEditorApp:
             self._toggle_debt_widgets_state()
 
 
-            self.text_from_deals(self.deals_text, dealer.get("deals", []))
-
             self.update_drugs_listbox(); self.clear_drug_details()
             self.update_shipping_listbox(); self.clear_shipping_details()
-            
-            dialogue_data = dealer.get("dialogue", {})
-            for field, widget in self.dialogue_text_widgets.items():
-                self.text_from_list(widget, dialogue_data.get(field, []))
+
+            # Deals and dialogue are filled once they are scrolled into view.
+            self.form_baseline = {}
+            self._mark_clean(self.details_scrollable_frame)
+            self.filled_sections = set()
+            self._fill_visible_sections()
 
         except IndexError:
             messagebox.showerror("Load Error", "Selected dealer index is out of range.")
@@ -1056,6 +1672,7 @@ class DealerEditorApp:
              return
         
         if self._save_dealer_data(self.current_dealer_index, show_success=True):
+             self._commit("Edit Dealer")
              self.update_dealer_listbox(select_index=self.current_dealer_index)
 
     def _save_dealer_data(self, index, show_success=True):
@@ -1063,8 +1680,9 @@ class DealerEditorApp:
             if not (0 <= index < len(self.data['dealers'])):
                 raise IndexError("Dealer index out of bounds during save operation.")
             
-            dealer = self.data["dealers"][index]
+            dealer = self._editable_dealer(index)
 
+            old_name = dealer.get("name")
             dealer["name"] = self.name_entry.get()
             dealer["image"] = self.image_entry.get()
             dealer["tier"] = self.safe_int(self.tier_entry.get(), 0)
@@ -1095,11 +1713,12 @@ class DealerEditorApp:
                 dealer.pop("debt", None) # Remove debt key if it exists
 
 
-            parsed_deals = self.deals_from_text(self.deals_text)
-            if parsed_deals is None:
-                if show_success: messagebox.showerror("Save Error", "Invalid format in 'Deals' section. Dealer not fully saved.")
-                return False
-            dealer["deals"] = parsed_deals
+            if "deals" in self.filled_sections: # Otherwise the text still shows another dealer
+                parsed_deals = self.deals_from_text(self.deals_text)
+                if parsed_deals is None:
+                    if show_success: messagebox.showerror("Save Error", "Invalid format in 'Deals' section. Dealer not fully saved.")
+                    return False
+                dealer["deals"] = parsed_deals
 
             if self.current_drug_index != -1:
                  if not self._save_drug_data(self.current_drug_index, show_success=False):
@@ -1109,10 +1728,17 @@ class DealerEditorApp:
                  if not self._save_shipping_data(self.current_shipping_index, show_success=False):
                      if show_success: messagebox.showerror("Save Error", "Failed to save current shipping details. Dealer changes partially saved."); return False
             
-            dialogue_data = {}
-            for field, widget in self.dialogue_text_widgets.items():
-                dialogue_data[field] = self.list_from_text(widget, str)
-            dealer["dialogue"] = dialogue_data
+            if "dialogue" in self.filled_sections:
+                old_dialogue = dealer.get("dialogue") if isinstance(dealer.get("dialogue"), dict) else {}
+                dialogue_data = {}
+                for field, widget in self.dialogue_text_widgets.items():
+                    lines = self.list_from_text(widget, str)
+                    dialogue_data[field] = old_dialogue[field] if old_dialogue.get(field) == lines else lines # Unchanged lines stay shared with the undo history
+                dealer["dialogue"] = dialogue_data
+            if isinstance(old_name, str) and old_name and old_name != dealer["name"]:
+                self._rename_references(old_name, dealer["name"]) # Part of this edit, so one undo step
+            self._index_dealer(dealer)
+            self._mark_clean(self.details_scrollable_frame) # The data now matches the form; don't save (and copy) it again until edited
 
             if show_success:
                 messagebox.showinfo("Save Success", f"Dealer '{dealer.get('name', 'N/A')}' saved successfully.")
@@ -1125,7 +1751,7 @@ class DealerEditorApp:
 
     def clear_dealer_details(self):
         self.clear_entry(self.name_entry); self.clear_entry(self.image_entry); self.clear_entry(self.tier_entry)
-        self.clear_text(self.unlock_requirements_text)
+        self.clear_text(self.unlock_requirements_text); self.unlock_info_label.config(text="")
         self.clear_entry(self.rep_log_base_entry); self.clear_entry(self.deal_days_entry)
         self.curfew_deal_combobox.set("False")
         
@@ -1146,6 +1772,8 @@ class DealerEditorApp:
         for widget in self.dialogue_text_widgets.values(): self.clear_text(widget)
 
         self.set_widget_state(self.details_scrollable_frame, 'disabled')
+        self.details_enabled = False
+        self.filled_sections = set(); self.form_baseline = {}
         
         self.current_dealer_index = -1; self.current_drug_index = -1
         self.current_quality_index = -1; self.current_effect_index = -1; self.current_shipping_index = -1
@@ -1159,12 +1787,7 @@ class DealerEditorApp:
         if self.current_dealer_index != -1 and 0 <= self.current_dealer_index < len(self.data['dealers']):
             try:
                 dealer = self.data["dealers"][self.current_dealer_index]
-                for i, drug in enumerate(dealer.get("drugs", [])):
-                    self.drugs_list.insert(tk.END, f"{i}: {drug.get('type', 'Unnamed Drug')}")
-                
-                if current_sel_idx is not None and 0 <= current_sel_idx < self.drugs_list.size():
-                    self.drugs_list.selection_set(current_sel_idx)
-                    self.drugs_list.activate(current_sel_idx); self.drugs_list.see(current_sel_idx)
+                self.drugs_list.set_items(dealer.get("drugs", []), current_sel_idx)
             except (IndexError, KeyError): self.clear_drug_details()
         else: self.clear_drug_details()
 
@@ -1172,13 +1795,14 @@ class DealerEditorApp:
         if self.current_dealer_index == -1 or not (0 <= self.current_dealer_index < len(self.data['dealers'])):
             messagebox.showwarning("Add Drug Error", "Please select a valid dealer first."); return
         new_drug = {"type": "New Drug", "unlockRep": 0, "base_dollar": 0, "base_rep": 0, "base_xp": 0, "rep_mult": 1.0, "xp_mult": 1.0, "qualities": [], "effects": []}
-        dealer = self.data["dealers"][self.current_dealer_index]
-        if not isinstance(dealer.get("drugs"), list): dealer["drugs"] = []
-        dealer["drugs"].append(new_drug)
-        new_idx = len(dealer["drugs"]) - 1
+        drugs = self._editable_list("drugs")
+        drugs.append(new_drug)
+        self._index_current_dealer()
+        new_idx = len(drugs) - 1
         self.update_drugs_listbox(); self.drugs_list.selection_clear(0, tk.END)
         self.drugs_list.selection_set(new_idx); self.drugs_list.activate(new_idx); self.drugs_list.see(new_idx)
         self.load_selected_drug(None)
+        self._commit("Add Drug")
 
     def remove_drug(self):
         if self.current_dealer_index == -1 or not (0 <= self.current_dealer_index < len(self.data['dealers'])):
@@ -1190,9 +1814,11 @@ class DealerEditorApp:
         if isinstance(dealer.get("drugs"), list) and 0 <= drug_idx_to_remove < len(dealer["drugs"]):
             drug_name = dealer["drugs"][drug_idx_to_remove].get('type', 'Unnamed Drug')
             if messagebox.askyesno("Confirm Removal", f"Are you sure you want to remove drug '{drug_name}'?"):
-                del dealer["drugs"][drug_idx_to_remove]
+                del self._editable_list("drugs")[drug_idx_to_remove]
+                self._index_current_dealer()
                 self.current_drug_index = -1
                 self.update_drugs_listbox(); self.clear_drug_details()
+                self._commit(f"Remove Drug '{drug_name}'")
         else: messagebox.showerror("Remove Drug Error", "Invalid drug index or data structure problem.")
 
     def load_selected_drug(self, event):
@@ -1207,6 +1833,7 @@ class DealerEditorApp:
             try:
                 if 0 <= self.current_drug_index < len(self.data['dealers'][self.current_dealer_index].get('drugs',[])):
                     self._save_drug_data(self.current_drug_index, show_success=False)
+                    self._commit("Edit Drug")
             except (IndexError, KeyError): pass
         self.current_drug_index = new_drug_idx
         try:
@@ -1224,6 +1851,7 @@ class DealerEditorApp:
             self.clear_entry(self.drug_xp_mult_entry); self.drug_xp_mult_entry.insert(0, str(drug.get("xp_mult", 1.0)))
             self.update_qualities_listbox(); self.clear_quality_details()
             self.update_effects_listbox(); self.clear_effect_details()
+            self._mark_clean(self.drug_details_frame)
         except (IndexError, KeyError) as e:
             messagebox.showerror("Load Drug Error", f"Failed to load drug details (data missing or incorrect): {e}");
             self.clear_drug_details(); self.current_drug_index = -1
@@ -1238,7 +1866,7 @@ class DealerEditorApp:
             dealer = self.data["dealers"][self.current_dealer_index]
             if not isinstance(dealer.get('drugs'), list) or not (0 <= drug_idx_to_save < len(dealer['drugs'])):
                  raise IndexError("Drug index for saving is out of bounds.")
-            drug = dealer["drugs"][drug_idx_to_save]
+            drug = self._editable_item("drugs", drug_idx_to_save)
             drug.update({
                 "type": self.drug_type_entry.get(), "unlockRep": self.safe_int(self.drug_unlock_rep_entry.get()),
                 "base_dollar": self.safe_int(self.drug_base_dollar_entry.get()), "base_rep": self.safe_int(self.drug_base_rep_entry.get()),
@@ -1251,6 +1879,8 @@ class DealerEditorApp:
             if self.current_effect_index != -1:
                 if not self._save_effect_data(self.current_effect_index, False):
                     if show_success: messagebox.showwarning("Save Drug Warning", "Could not save current effect details. Drug data partially saved."); return False
+            self._index_current_dealer()
+            self._mark_clean(self.drug_details_frame)
             return True
         except Exception as e:
             if show_success: messagebox.showerror("Save Drug Error", f"An error occurred saving drug details: {e}\n{traceback.format_exc()}")
@@ -1275,11 +1905,7 @@ class DealerEditorApp:
            0 <= self.current_dealer_index < len(self.data['dealers']):
             try:
                 drug = self.data["dealers"][self.current_dealer_index]["drugs"][self.current_drug_index]
-                for i, quality in enumerate(drug.get("qualities", [])):
-                    self.qualities_list.insert(tk.END, f"{i}: {quality.get('type', 'Unnamed Quality')}")
-                if current_sel_idx is not None and 0 <= current_sel_idx < self.qualities_list.size():
-                    self.qualities_list.selection_set(current_sel_idx)
-                    self.qualities_list.activate(current_sel_idx); self.qualities_list.see(current_sel_idx)
+                self.qualities_list.set_items(drug.get("qualities", []), current_sel_idx)
             except (IndexError, KeyError): self.clear_quality_details()
         else: self.clear_quality_details()
 
@@ -1291,13 +1917,15 @@ class DealerEditorApp:
         new_quality = {"type": "New Quality", "dollar_mult": 1.0, "unlockRep": 0}
         try:
             drug = self.data["dealers"][self.current_dealer_index]["drugs"][self.current_drug_index]
-            if not isinstance(drug.get("qualities"), list): drug["qualities"] = []
-            drug["qualities"].append(new_quality)
-            new_idx = len(drug["qualities"]) - 1
+            qualities = self._editable_list("qualities")
+            qualities.append(new_quality)
+            self._index_current_dealer()
+            new_idx = len(qualities) - 1
             self.update_qualities_listbox()
             self.qualities_list.selection_clear(0, tk.END); self.qualities_list.selection_set(new_idx)
             self.qualities_list.activate(new_idx); self.qualities_list.see(new_idx)
             self.load_selected_quality(None)
+            self._commit("Add Quality")
         except (IndexError, KeyError) as e:
             messagebox.showerror("Add Quality Error", f"Could not add quality (check dealer/drug selection): {e}")
 
@@ -1313,9 +1941,11 @@ class DealerEditorApp:
                 messagebox.showerror("Remove Quality Error", "Quality index out of bounds."); return
             quality_name = drug["qualities"][quality_idx_to_remove].get('type', 'Unnamed Quality')
             if messagebox.askyesno("Confirm Removal", f"Are you sure you want to remove quality '{quality_name}'?"):
-                del drug["qualities"][quality_idx_to_remove]
+                del self._editable_list("qualities")[quality_idx_to_remove]
+                self._index_current_dealer()
                 self.current_quality_index = -1
                 self.update_qualities_listbox(); self.clear_quality_details()
+                self._commit(f"Remove Quality '{quality_name}'")
         except (IndexError, KeyError) as e:
             messagebox.showerror("Remove Quality Error", f"Could not remove quality: {e}")
 
@@ -1332,6 +1962,7 @@ class DealerEditorApp:
             try:
                 if 0 <= self.current_quality_index < len(self.data['dealers'][self.current_dealer_index]['drugs'][self.current_drug_index].get('qualities',[])):
                     self._save_quality_data(self.current_quality_index, False)
+                    self._commit("Edit Quality")
             except (IndexError, KeyError): pass
         self.current_quality_index = new_quality_idx
         try:
@@ -1340,6 +1971,7 @@ class DealerEditorApp:
             self.clear_entry(self.quality_type_entry); self.quality_type_entry.insert(0, quality.get("type", ""))
             self.clear_entry(self.quality_dollar_mult_entry); self.quality_dollar_mult_entry.insert(0, str(quality.get("dollar_mult", 1.0)))
             self.clear_entry(self.quality_unlock_rep_entry); self.quality_unlock_rep_entry.insert(0, str(quality.get("unlockRep", 0)))
+            self._mark_clean(self.quality_details_frame)
         except (IndexError, KeyError) as e:
             messagebox.showerror("Load Quality Error", f"Failed to load quality details: {e}");
             self.clear_quality_details(); self.current_quality_index = -1
@@ -1355,12 +1987,14 @@ class DealerEditorApp:
             drug = self.data["dealers"][self.current_dealer_index]["drugs"][self.current_drug_index]
             if not isinstance(drug.get('qualities'), list) or not (0 <= quality_idx_to_save < len(drug['qualities'])):
                  raise IndexError("Quality index for saving is out of bounds.")
-            quality = drug["qualities"][quality_idx_to_save]
+            quality = self._editable_item("qualities", quality_idx_to_save)
             quality.update({
                 "type": self.quality_type_entry.get(),
                 "dollar_mult": self.safe_float(self.quality_dollar_mult_entry.get(), 1.0),
                 "unlockRep": self.safe_int(self.quality_unlock_rep_entry.get())
             })
+            self._index_current_dealer()
+            self._mark_clean(self.quality_details_frame)
             return True
         except Exception as e:
             if show_success: messagebox.showerror("Save Quality Error", f"An error occurred saving quality: {e}\n{traceback.format_exc()}")
@@ -1381,11 +2015,7 @@ class DealerEditorApp:
            0 <= self.current_dealer_index < len(self.data['dealers']):
             try:
                 drug = self.data["dealers"][self.current_dealer_index]["drugs"][self.current_drug_index]
-                for i, effect in enumerate(drug.get("effects", [])):
-                    self.effects_list.insert(tk.END, f"{i}: {effect.get('name', 'Unnamed Effect')}")
-                if current_sel_idx is not None and 0 <= current_sel_idx < self.effects_list.size():
-                    self.effects_list.selection_set(current_sel_idx)
-                    self.effects_list.activate(current_sel_idx); self.effects_list.see(current_sel_idx)
+                self.effects_list.set_items(drug.get("effects", []), current_sel_idx)
             except (IndexError, KeyError): self.clear_effect_details()
         else: self.clear_effect_details()
 
@@ -1397,13 +2027,15 @@ class DealerEditorApp:
         new_effect = {"name": "New Effect", "unlockRep": 0, "probability": 0.0, "dollar_mult": 1.0}
         try:
             drug = self.data["dealers"][self.current_dealer_index]["drugs"][self.current_drug_index]
-            if not isinstance(drug.get("effects"), list): drug["effects"] = []
-            drug["effects"].append(new_effect)
-            new_idx = len(drug["effects"]) - 1
+            effects = self._editable_list("effects")
+            effects.append(new_effect)
+            self._index_current_dealer()
+            new_idx = len(effects) - 1
             self.update_effects_listbox()
             self.effects_list.selection_clear(0, tk.END); self.effects_list.selection_set(new_idx)
             self.effects_list.activate(new_idx); self.effects_list.see(new_idx)
             self.load_selected_effect(None)
+            self._commit("Add Effect")
         except (IndexError, KeyError) as e:
             messagebox.showerror("Add Effect Error", f"Could not add effect: {e}")
 
@@ -1419,9 +2051,11 @@ class DealerEditorApp:
                 messagebox.showerror("Remove Effect Error", "Effect index out of bounds."); return
             effect_name = drug["effects"][effect_idx_to_remove].get('name', 'Unnamed Effect')
             if messagebox.askyesno("Confirm Removal", f"Are you sure you want to remove effect '{effect_name}'?"):
-                del drug["effects"][effect_idx_to_remove]
+                del self._editable_list("effects")[effect_idx_to_remove]
+                self._index_current_dealer()
                 self.current_effect_index = -1
                 self.update_effects_listbox(); self.clear_effect_details()
+                self._commit(f"Remove Effect '{effect_name}'")
         except (IndexError, KeyError) as e:
             messagebox.showerror("Remove Effect Error", f"Could not remove effect: {e}")
 
@@ -1438,6 +2072,7 @@ class DealerEditorApp:
             try:
                 if 0 <= self.current_effect_index < len(self.data['dealers'][self.current_dealer_index]['drugs'][self.current_drug_index].get('effects',[])):
                     self._save_effect_data(self.current_effect_index, False)
+                    self._commit("Edit Effect")
             except (IndexError, KeyError): pass
         self.current_effect_index = new_effect_idx
         try:
@@ -1447,6 +2082,7 @@ class DealerEditorApp:
             self.clear_entry(self.effect_unlock_rep_entry); self.effect_unlock_rep_entry.insert(0, str(effect.get("unlockRep", 0)))
             self.clear_entry(self.effect_probability_entry); self.effect_probability_entry.insert(0, str(effect.get("probability", 0.0)))
             self.clear_entry(self.effect_dollar_mult_entry); self.effect_dollar_mult_entry.insert(0, str(effect.get("dollar_mult", 1.0)))
+            self._mark_clean(self.effect_details_frame)
         except (IndexError, KeyError) as e:
             messagebox.showerror("Load Effect Error", f"Failed to load effect details: {e}");
             self.clear_effect_details(); self.current_effect_index = -1
@@ -1462,13 +2098,15 @@ class DealerEditorApp:
             drug = self.data["dealers"][self.current_dealer_index]["drugs"][self.current_drug_index]
             if not isinstance(drug.get('effects'), list) or not (0 <= effect_idx_to_save < len(drug['effects'])):
                  raise IndexError("Effect index for saving is out of bounds.")
-            effect = drug["effects"][effect_idx_to_save]
+            effect = self._editable_item("effects", effect_idx_to_save)
             effect.update({
                 "name": self.effect_name_entry.get(),
                 "unlockRep": self.safe_int(self.effect_unlock_rep_entry.get()),
                 "probability": self.safe_float(self.effect_probability_entry.get()),
                 "dollar_mult": self.safe_float(self.effect_dollar_mult_entry.get(), 1.0)
             })
+            self._index_current_dealer()
+            self._mark_clean(self.effect_details_frame)
             return True
         except Exception as e:
             if show_success: messagebox.showerror("Save Effect Error", f"An error occurred saving effect: {e}\n{traceback.format_exc()}")
@@ -1489,11 +2127,7 @@ class DealerEditorApp:
         if self.current_dealer_index != -1 and 0 <= self.current_dealer_index < len(self.data['dealers']):
             try:
                 dealer = self.data["dealers"][self.current_dealer_index]
-                for i, shipping_item in enumerate(dealer.get("shipping", [])):
-                    self.shipping_list.insert(tk.END, f"{i}: {shipping_item.get('name', 'Unnamed Shipping')}")
-                if current_sel_idx is not None and 0 <= current_sel_idx < self.shipping_list.size():
-                    self.shipping_list.selection_set(current_sel_idx)
-                    self.shipping_list.activate(current_sel_idx); self.shipping_list.see(current_sel_idx)
+                self.shipping_list.set_items(dealer.get("shipping", []), current_sel_idx)
             except (IndexError, KeyError): self.clear_shipping_details()
         else: self.clear_shipping_details()
 
@@ -1504,13 +2138,15 @@ class DealerEditorApp:
         new_shipping = {"name": "New Shipping", "cost": 0, "unlockRep": 0, "minAmount": 0, "stepAmount": 1, "maxAmount": 100, "dealModifier": [0.0,0.0,0.0,0.0]}
         try:
             dealer = self.data["dealers"][self.current_dealer_index]
-            if not isinstance(dealer.get("shipping"), list): dealer["shipping"] = []
-            dealer["shipping"].append(new_shipping)
-            new_idx = len(dealer["shipping"]) - 1
+            shipping = self._editable_list("shipping")
+            shipping.append(new_shipping)
+            self._index_current_dealer()
+            new_idx = len(shipping) - 1
             self.update_shipping_listbox()
             self.shipping_list.selection_clear(0, tk.END); self.shipping_list.selection_set(new_idx)
             self.shipping_list.activate(new_idx); self.shipping_list.see(new_idx)
             self.load_selected_shipping(None)
+            self._commit("Add Shipping")
         except (IndexError, KeyError) as e:
             messagebox.showerror("Add Shipping Error", f"Could not add shipping option: {e}")
 
@@ -1525,9 +2161,11 @@ class DealerEditorApp:
                 messagebox.showerror("Remove Shipping Error", "Shipping index out of bounds."); return
             shipping_name = dealer["shipping"][shipping_idx_to_remove].get('name', 'Unnamed Shipping')
             if messagebox.askyesno("Confirm Removal", f"Are you sure you want to remove shipping option '{shipping_name}'?"):
-                del dealer["shipping"][shipping_idx_to_remove]
+                del self._editable_list("shipping")[shipping_idx_to_remove]
+                self._index_current_dealer()
                 self.current_shipping_index = -1
                 self.update_shipping_listbox(); self.clear_shipping_details()
+                self._commit(f"Remove Shipping '{shipping_name}'")
         except (IndexError, KeyError) as e:
             messagebox.showerror("Remove Shipping Error", f"Could not remove shipping option: {e}")
 
@@ -1543,6 +2181,7 @@ class DealerEditorApp:
             try:
                 if 0 <= self.current_shipping_index < len(self.data['dealers'][self.current_dealer_index].get('shipping',[])):
                     self._save_shipping_data(self.current_shipping_index, False)
+                    self._commit("Edit Shipping")
             except (IndexError, KeyError): pass
         self.current_shipping_index = new_shipping_idx
         try:
@@ -1555,6 +2194,7 @@ class DealerEditorApp:
             self.clear_entry(self.shipping_step_amount_entry); self.shipping_step_amount_entry.insert(0, str(shipping_item.get("stepAmount", 1)))
             self.clear_entry(self.shipping_max_amount_entry); self.shipping_max_amount_entry.insert(0, str(shipping_item.get("maxAmount", 100)))
             self.clear_entry(self.shipping_deal_modifier_entry); self.shipping_deal_modifier_entry.insert(0, self.string_from_list(shipping_item.get("dealModifier", [0.0,0.0,0.0,0.0])))
+            self._mark_clean(self.shipping_details_frame)
         except (IndexError, KeyError) as e:
             messagebox.showerror("Load Shipping Error", f"Failed to load shipping details: {e}");
             self.clear_shipping_details(); self.current_shipping_index = -1
@@ -1569,7 +2209,7 @@ class DealerEditorApp:
             dealer = self.data["dealers"][self.current_dealer_index]
             if not isinstance(dealer.get('shipping'), list) or not (0 <= shipping_idx_to_save < len(dealer['shipping'])):
                  raise IndexError("Shipping index for saving is out of bounds.")
-            shipping_item = dealer["shipping"][shipping_idx_to_save]
+            shipping_item = self._editable_item("shipping", shipping_idx_to_save)
             shipping_item.update({
                 "name": self.shipping_name_entry.get(), "cost": self.safe_int(self.shipping_cost_entry.get()),
                 "unlockRep": self.safe_int(self.shipping_unlock_rep_entry.get()), "minAmount": self.safe_int(self.shipping_min_amount_entry.get()),
@@ -1581,6 +2221,8 @@ class DealerEditorApp:
                 shipping_item["dealModifier"] = shipping_item.get("dealModifier", [0.0,0.0,0.0,0.0])
                 if show_success:
                     messagebox.showwarning("Save Shipping Warning", "Deal Modifier for shipping option was not 4 numbers separated by commas. Its value was not updated or reverted to default.")
+            self._index_current_dealer()
+            self._mark_clean(self.shipping_details_frame)
             return True
         except Exception as e:
             if show_success: messagebox.showerror("Save Shipping Error", f"An error occurred saving shipping option: {e}\n{traceback.format_exc()}")
@@ -1604,14 +2246,17 @@ class DealerEditorApp:
         original_index = selected_indices[0]
         original_dealer = self.data["dealers"][original_index]
         
-        cloned_dealer = copy.deepcopy(original_dealer)
+        cloned_dealer = self.history.share(original_dealer) # Drugs, dialogue... stay shared until changed
         cloned_dealer["name"] = f"{original_dealer.get('name', 'Unnamed')}_clone"
         
         new_index = original_index + 1
         self.data["dealers"].insert(new_index, cloned_dealer)
+        self._index_dealer(cloned_dealer)
         
-        self.update_dealer_listbox(select_index=new_index)
+        self.dealer_list.inserted(new_index)
+        self.dealer_list.selection_set(new_index); self.dealer_list.see(new_index)
         self.load_selected_dealer(None)
+        self._commit("Clone Dealer")
 
     def clone_drug(self):
         selected_indices = self.drugs_list.curselection()
@@ -1623,15 +2268,17 @@ class DealerEditorApp:
         dealer = self.data["dealers"][self.current_dealer_index]
         original_drug = dealer["drugs"][original_index]
         
-        cloned_drug = copy.deepcopy(original_drug)
+        cloned_drug = self.history.share(original_drug)
         cloned_drug["type"] = f"{original_drug.get('type', 'Unnamed')}_clone"
         
         new_index = original_index + 1
-        dealer["drugs"].insert(new_index, cloned_drug)
+        self._editable_list("drugs").insert(new_index, cloned_drug)
+        self._index_current_dealer()
         
         self.update_drugs_listbox()
         self.drugs_list.selection_set(new_index)
         self.load_selected_drug(None)
+        self._commit("Clone Drug")
 
     def clone_quality(self):
         selected_indices = self.qualities_list.curselection()
@@ -1643,15 +2290,17 @@ class DealerEditorApp:
         drug = self.data["dealers"][self.current_dealer_index]["drugs"][self.current_drug_index]
         original_quality = drug["qualities"][original_index]
         
-        cloned_quality = copy.deepcopy(original_quality)
+        cloned_quality = self.history.share(original_quality)
         cloned_quality["type"] = f"{original_quality.get('type', 'Unnamed')}_clone"
         
         new_index = original_index + 1
-        drug["qualities"].insert(new_index, cloned_quality)
+        self._editable_list("qualities").insert(new_index, cloned_quality)
+        self._index_current_dealer()
 
         self.update_qualities_listbox()
         self.qualities_list.selection_set(new_index)
         self.load_selected_quality(None)
+        self._commit("Clone Quality")
         
     def clone_effect(self):
         selected_indices = self.effects_list.curselection()
@@ -1663,15 +2312,17 @@ class DealerEditorApp:
         drug = self.data["dealers"][self.current_dealer_index]["drugs"][self.current_drug_index]
         original_effect = drug["effects"][original_index]
         
-        cloned_effect = copy.deepcopy(original_effect)
+        cloned_effect = self.history.share(original_effect)
         cloned_effect["name"] = f"{original_effect.get('name', 'Unnamed')}_clone"
         
         new_index = original_index + 1
-        drug["effects"].insert(new_index, cloned_effect)
+        self._editable_list("effects").insert(new_index, cloned_effect)
+        self._index_current_dealer()
 
         self.update_effects_listbox()
         self.effects_list.selection_set(new_index)
         self.load_selected_effect(None)
+        self._commit("Clone Effect")
 
     def clone_shipping(self):
         selected_indices = self.shipping_list.curselection()
@@ -1683,15 +2334,17 @@ class DealerEditorApp:
         dealer = self.data["dealers"][self.current_dealer_index]
         original_shipping = dealer["shipping"][original_index]
         
-        cloned_shipping = copy.deepcopy(original_shipping)
+        cloned_shipping = self.history.share(original_shipping)
         cloned_shipping["name"] = f"{original_shipping.get('name', 'Unnamed')}_clone"
         
         new_index = original_index + 1
-        dealer["shipping"].insert(new_index, cloned_shipping)
+        self._editable_list("shipping").insert(new_index, cloned_shipping)
+        self._index_current_dealer()
 
         self.update_shipping_listbox()
         self.shipping_list.selection_set(new_index)
         self.load_selected_shipping(None)
+        self._commit("Clone Shipping")
 
 
 if __name__ == "__main__":
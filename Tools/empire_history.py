@@ -0,0 +1,104 @@
+"""
+Undo/redo for the Empire Editor built on snapshots that share structure.
+
+A snapshot holds the dealers list and the global keys as they were after an
+edit. Consecutive snapshots share every dealer, drug, dialogue list, ...
+that the edit did not touch: before changing a dict or list in place the
+editor asks for an editable() version, which is a shallow copy the first
+time an object is touched after a commit, and the object itself after that.
+An edit to one effect therefore copies only the dealer, its drugs list, the
+drug, its effects list and the effect; snapshots are never modified.
+"""
+from collections import namedtuple
+
+UNDO_LIMIT = 200 # Undo steps kept; the oldest are dropped first
+
+# The document after one committed edit.
+#   dealers:    tuple of dealer dicts (shared with neighbouring snapshots)
+#   other_keys: the global keys dict
+Snapshot = namedtuple("Snapshot", ["dealers", "other_keys"])
+
+
+class History:
+    def __init__(self, limit=UNDO_LIMIT):
+        self.limit = limit
+        self.reset([], {})
+
+    def reset(self, dealers, other_keys):
+        """Starts a new history (after New, Open, Combine...) at the given document."""
+        self.current = Snapshot(tuple(dealers), other_keys) # The document as of the last commit
+        self._undo = [] # (label, snapshot before the edit)
+        self._redo = [] # (label, snapshot after the edit)
+        self._owned = {} # id -> object copied since the last commit, safe to change in place
+
+    def editable(self, value):
+        """
+        value itself when it was copied since the last commit, otherwise a
+        shallow copy of it (whose children are still shared). The caller
+        must put the result where value was.
+        """
+        if id(value) in self._owned:
+            return value
+        copied = value.copy()
+        self._owned[id(copied)] = copied
+        return copied
+
+    def thaw(self, container, key):
+        """Replaces container[key] with editable(container[key]) and returns it."""
+        value = container[key]
+        editable = self.editable(value)
+        if editable is not value:
+            container[key] = editable
+        return editable
+
+    def share(self, value):
+        """
+        A shallow copy of value for cloning it: the copy and the original
+        share all their children, so every object copied so far becomes
+        read-only again and is copied on its next change.
+        """
+        self._owned.clear()
+        return value.copy()
+
+    def commit(self, dealers, other_keys, label):
+        """
+        Records the document after an edit as one undo step. Returns False
+        (and records nothing) when it equals the last snapshot, so calling
+        this after every action that may have changed something is cheap.
+        """
+        snapshot = Snapshot(tuple(dealers), other_keys)
+        self._owned.clear()
+        previous = self.current
+        self.current = snapshot
+        if snapshot.other_keys is previous.other_keys or snapshot.other_keys == previous.other_keys:
+            # Unchanged dealers are the same objects, so this only compares the edited ones in depth.
+            if snapshot.dealers == previous.dealers:
+                return False
+        self._undo.append((label, previous))
+        del self._undo[:-self.limit]
+        self._redo.clear()
+        return True
+
+    def undo(self):
+        """The snapshot to restore, or None when there is nothing to undo."""
+        if not self._undo: return None
+        label, snapshot = self._undo.pop()
+        self._redo.append((label, self.current))
+        self.current = snapshot
+        self._owned.clear()
+        return snapshot
+
+    def redo(self):
+        if not self._redo: return None
+        label, snapshot = self._redo.pop()
+        self._undo.append((label, self.current))
+        self.current = snapshot
+        self._owned.clear()
+        return snapshot
+
+    def undo_label(self):
+        """Label of the edit undo() would revert, or None."""
+        return self._undo[-1][0] if self._undo else None
+
+    def redo_label(self):
+        return self._redo[-1][0] if self._redo else None
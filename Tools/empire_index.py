@@ -0,0 +1,480 @@
+"""
+In-memory indexes over the dealers of an empire file, kept up to date one
+dealer at a time while the editor changes them.
+
+SearchIndex is an inverted index from words to the dealers whose names, drug
+types, quality types, effect names, shipping names or dialogue lines contain
+them. Dealers are tracked by object identity, so reordering the dealer list
+needs no update; an edited dealer is re-indexed with update_dealer().
+
+UnlockGraph links dealers through their unlockRequirements and keeps track
+of which dealers can ever unlock, and why the others cannot.
+"""
+import re
+from bisect import bisect_left
+from collections import namedtuple
+
+# Fields a search term can be limited to with "field:word".
+SEARCH_FIELDS = ["dealer", "drug", "quality", "effect", "shipping", "dialogue"]
+
+# One searchable piece of text in a dealer.
+#   field:    one of SEARCH_FIELDS
+#   location: where it is in the dealer: () for the name, (drug,) for a drug type,
+#             (drug, quality) / (drug, effect) for qualities and effects,
+#             (shipping,) for a shipping name and (dialogue key, line) for dialogue
+#   text:     the text itself
+Entry = namedtuple("Entry", ["field", "location", "text"])
+
+# One search result; SearchIndex.matches() tells which of its entries matched.
+#   index:   position of the dealer in the list searched
+#   dealer:  the dealer object
+SearchHit = namedtuple("SearchHit", ["index", "dealer"])
+
+_WORD = re.compile(r"\w+")
+
+
+def words(text):
+    return _WORD.findall(str(text).lower())
+
+
+def dealer_entries(dealer):
+    """Yields every searchable Entry of a dealer, in the order the editor shows them."""
+    yield Entry("dealer", (), dealer.get("name", ""))
+    for d, drug in enumerate(dealer.get("drugs") or []):
+        if not isinstance(drug, dict): continue
+        yield Entry("drug", (d,), drug.get("type", ""))
+        for q, quality in enumerate(drug.get("qualities") or []):
+            if isinstance(quality, dict): yield Entry("quality", (d, q), quality.get("type", ""))
+        for e, effect in enumerate(drug.get("effects") or []):
+            if isinstance(effect, dict): yield Entry("effect", (d, e), effect.get("name", ""))
+    for s, shipping in enumerate(dealer.get("shipping") or []):
+        if isinstance(shipping, dict): yield Entry("shipping", (s,), shipping.get("name", ""))
+    dialogue = dealer.get("dialogue")
+    if isinstance(dialogue, dict):
+        for key, lines in dialogue.items():
+            for line_number, line in enumerate(lines if isinstance(lines, list) else []):
+                yield Entry("dialogue", (key, line_number), line)
+
+
+def parse_query(query):
+    """
+    Splits a query into (field, word) terms; field is None unless the term
+    was written "field:word" with a field from SEARCH_FIELDS.
+    """
+    terms = []
+    for part in query.split():
+        field, sep, rest = part.partition(":")
+        if sep and field.lower() in SEARCH_FIELDS:
+            terms.extend((field.lower(), word) for word in words(rest))
+        else:
+            terms.extend((None, word) for word in words(part))
+    return terms
+
+
+class SearchIndex:
+    """
+    Inverted index: word -> {id(dealer): set of fields containing the word}.
+    A query matches the dealers that contain every term, each term matching
+    any word it is a prefix of, so results update while the user types.
+    """
+    def __init__(self, dealers=()):
+        self.rebuild(dealers)
+
+    def rebuild(self, dealers):
+        self._postings = {}
+        self._dealers = {} # id(dealer) -> (dealer, its indexed words)
+        self._vocabulary = None # Sorted words, rebuilt when a new word appears
+        for dealer in dealers:
+            self.update_dealer(dealer)
+
+    def update_dealer(self, dealer):
+        """(Re-)indexes one dealer after it was added or edited."""
+        self.remove_dealer(dealer)
+        if not isinstance(dealer, dict): return
+        fields_by_word = {}
+        for entry in dealer_entries(dealer):
+            for word in words(entry.text):
+                fields = fields_by_word.get(word)
+                if fields is None: fields_by_word[word] = {entry.field}
+                else: fields.add(entry.field)
+        for word, fields in fields_by_word.items():
+            posting = self._postings.get(word)
+            if posting is None:
+                posting = self._postings[word] = {}
+                self._vocabulary = None
+            posting[id(dealer)] = fields
+        self._dealers[id(dealer)] = (dealer, list(fields_by_word))
+
+    def remove_dealer(self, dealer):
+        """Drops a removed dealer from the index; unknown dealers are ignored."""
+        indexed = self._dealers.pop(id(dealer), None)
+        if indexed is None: return
+        for word in indexed[1]:
+            posting = self._postings[word]
+            del posting[id(dealer)]
+            if not posting:
+                del self._postings[word]
+                self._vocabulary = None
+
+    def _completions(self, prefix):
+        """Indexed words starting with prefix."""
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        vocabulary = self._vocabulary
+        position = bisect_left(vocabulary, prefix)
+        while position < len(vocabulary) and vocabulary[position].startswith(prefix):
+            yield vocabulary[position]
+            position += 1
+
+    def _term_dealers(self, field, prefix):
+        found = set()
+        for word in self._completions(prefix):
+            for dealer_id, fields in self._postings[word].items():
+                if field is None or field in fields:
+                    found.add(dealer_id)
+        return found
+
+    def search(self, query, dealers):
+        """
+        SearchHits for the dealers (in list order) matching every term of
+        query; an empty query matches nothing.
+        """
+        terms = parse_query(query)
+        if not terms: return []
+        matched = None
+        for field, prefix in sorted(terms, key=lambda term: len(term[1]), reverse=True): # Longest (most selective) first
+            found = self._term_dealers(field, prefix)
+            matched = found if matched is None else matched & found
+            if not matched: return []
+
+        return [SearchHit(index, dealer) for index, dealer in enumerate(dealers) if id(dealer) in matched]
+
+    def matches(self, dealer, query):
+        """
+        The Entries of dealer that match a term of query. Worked out from the
+        dealer itself, so it is only paid for the results actually shown.
+        """
+        terms = parse_query(query)
+        return [entry for entry in dealer_entries(dealer)
+                if any((field is None or field == entry.field) and any(word.startswith(prefix) for word in words(entry.text))
+                       for field, prefix in terms)]
+
+
+def describe_match(entry):
+    """Short text for a matched entry, e.g. 'effect "Random"'."""
+    if entry.field == "dialogue":
+        return f'{entry.location[0]} "{entry.text}"'
+    return f'{entry.field} "{entry.text}"'
+
+
+# --- Unlock Requirements ---
+# The unlock requirements of one dealer as the graph last saw them.
+#   dealer:       the dealer object
+#   name:         its name ("" for none)
+#   requirements: tuple of (name, needs_unlock) pairs, in the dealer's order; needs_unlock is
+#                 False for a minRep of 0 or less, which the required dealer's starting reputation meets
+Node = namedtuple("Node", ["dealer", "name", "requirements"])
+
+
+def unlock_requirements(dealer):
+    """The (name, needs_unlock) pairs of a dealer's unlockRequirements; entries without a name are skipped."""
+    requirements = dealer.get("unlockRequirements") if isinstance(dealer, dict) else None
+    pairs = []
+    for requirement in requirements if isinstance(requirements, list) else []:
+        if not isinstance(requirement, dict) or not isinstance(requirement.get("name"), str): continue
+        min_rep = requirement.get("minRep", 0)
+        pairs.append((requirement["name"], not (isinstance(min_rep, (int, float)) and min_rep <= 0)))
+    return tuple(pairs)
+
+
+class UnlockGraph:
+    """
+    Dealers linked by their unlock requirements, kept up to date one dealer
+    at a time. Like the mod (Contacts.cs), a dealer unlocks once every
+    requirement names an existing dealer with enough reputation; reputation
+    starts at 0 and only grows while a dealer is unlocked, so a requirement
+    with minRep above 0 needs the named dealer unlocked first. Dealers without
+    requirements are unlocked from the start.
+
+    Which dealers can ever unlock is maintained incrementally: for each locked
+    dealer the number of requirements not met, and for each unlocked one a
+    rank that is higher than the ranks of the dealers unlocking it. Additions
+    only unlock more and are propagated forward from the dealers affected;
+    when a dealer may lose its unlock, just the dealers depending on it are
+    locked and derived again. Either way an edit costs what it affects.
+    """
+    def __init__(self, dealers=()):
+        self.rebuild(dealers)
+
+    def rebuild(self, dealers):
+        self._nodes = {} # id(dealer) -> Node
+        self._named = {} # name -> {id(dealer): dealer} of the dealers with that name
+        self._required_by = {} # name -> {id(dealer): dealer} of the dealers requiring that name
+        self._missing = {} # id(dealer) -> number of its requirements not met, for locked dealers
+        self._ranks = {} # name -> {id(dealer): rank} of the unlocked dealers with that name
+        self._rank = {} # id(dealer) -> rank, for unlocked dealers
+        self._order = tuple(dealers) # The dealers as of the last sync()
+        self._positions = {id(dealer): index for index, dealer in enumerate(self._order)} # id(dealer) -> index in _order
+        self._cycles = None # Cached (cycles(), {id(dealer): its cycle}), dropped on every change
+        unlocked = [dealer for dealer in self._order if self._add(dealer)]
+        self._unlock(unlocked)
+
+    # Queries
+    def is_unlockable(self, dealer):
+        """Whether dealer unlocks at some point in a game (False for dealers not in the graph)."""
+        return id(dealer) in self._rank
+
+    def unlocks(self, name):
+        """Dealers with a requirement naming `name`, in no particular order."""
+        return list(self._required_by.get(name, {}).values())
+
+    def named(self, name):
+        """Dealers called `name` (more than one only in files with duplicate names)."""
+        return list(self._named.get(name, {}).values())
+
+    def position(self, dealer):
+        """Index of dealer in the list given to the last sync() or rebuild(), or None."""
+        index = self._positions.get(id(dealer))
+        return index if index is not None and self._order[index] is dealer else None
+
+    def references(self, name):
+        """
+        (dealer, indices into its unlockRequirements) for every requirement
+        naming `name`; found through the reverse index, so the cost follows
+        the number of references rather than the number of dealers.
+        """
+        return [(dealer, [i for i, requirement in enumerate(dealer["unlockRequirements"]) if isinstance(requirement, dict) and requirement.get("name") == name])
+                for dealer in self._required_by.get(name, {}).values()]
+
+    def locked_count(self):
+        """Number of dealers that never unlock."""
+        return len(self._nodes) - len(self._rank)
+
+    def cycles(self):
+        """
+        Cycles of dealers that require each other to unlock, each a list of
+        dealers. Only locked dealers can be on one, so this looks at those
+        alone and costs nothing while every dealer can unlock.
+        """
+        if self._cycles is None:
+            cycles = self._find_cycles()
+            self._cycles = (cycles, {id(member): cycle for cycle in cycles for member in cycle})
+        return self._cycles[0]
+
+    def blocker(self, dealer):
+        """
+        Why dealer never unlocks, e.g. "requires unknown dealer 'Bob'", or
+        None when it does (or is not in the graph).
+        """
+        node = self._nodes.get(id(dealer))
+        if node is None or id(dealer) in self._rank: return None
+        for name, needs_unlock in node.requirements:
+            if not self._named.get(name): return f"requires unknown dealer '{name}'"
+        self.cycles()
+        cycle = self._cycles[1].get(id(dealer))
+        if cycle is not None:
+            return "unlock cycle: " + " -> ".join(f"'{member.get('name', '')}'" for member in cycle + cycle[:1])
+        for name, needs_unlock in node.requirements:
+            if needs_unlock and not self._ranks.get(name): return f"waits on locked dealer '{name}'"
+        return None
+
+    # Updates
+    def sync(self, dealers):
+        """
+        Brings the graph up to date with the dealers list after an edit.
+        Dealers are tracked by identity: a dealer object that took the place
+        of another one (an edited copy) is compared against it, so only
+        changed names and requirements cost anything beyond the identity scan.
+        """
+        positions = {id(dealer): index for index, dealer in enumerate(dealers)}
+        removed = [dealer for dealer in self._order if id(dealer) not in positions]
+        added = [dealer for dealer in dealers if self._nodes.get(id(dealer), (None,))[0] is not dealer]
+        self._order, self._positions = tuple(dealers), positions
+        if len(removed) == len(added): # Edited copies replaced their originals, in list order
+            for old, new in zip(removed, added):
+                self._replace(old, new)
+        else:
+            for dealer in removed: self.remove_dealer(dealer)
+            for dealer in added: self.update_dealer(dealer)
+
+    def _replace(self, old, new):
+        node = self._nodes.pop(id(old))
+        self._nodes[id(new)] = node._replace(dealer=new)
+        if id(old) in self._missing: self._missing[id(new)] = self._missing.pop(id(old))
+        if id(old) in self._rank:
+            self._rank[id(new)] = rank = self._rank.pop(id(old))
+            del self._ranks[node.name][id(old)]
+            self._ranks[node.name][id(new)] = rank
+        del self._named[node.name][id(old)]
+        self._named[node.name][id(new)] = new
+        for name in {name for name, needs_unlock in node.requirements}:
+            del self._required_by[name][id(old)]
+            self._required_by[name][id(new)] = new
+        self.update_dealer(new)
+
+    def update_dealer(self, dealer):
+        """(Re-)reads one added or edited dealer's name and requirements."""
+        node = self._nodes.get(id(dealer))
+        if node is None:
+            if self._add(dealer): self._unlock([dealer])
+            return
+        name, requirements = self._name(dealer), unlock_requirements(dealer)
+        if name == node.name and requirements == node.requirements: return
+        self._cycles = None
+        if name != node.name: # Others may depend on either name; handle it as a removal and an addition
+            self.remove_dealer(dealer)
+            if self._add(dealer): self._unlock([dealer])
+            return
+
+        self._link(dealer, node.requirements, False)
+        self._nodes[id(dealer)] = node = Node(dealer, name, requirements)
+        self._link(dealer, requirements, True)
+        if id(dealer) not in self._rank: # Still nothing depends on it; it may unlock now
+            self._missing[id(dealer)] = self._count_missing(node)
+            if not self._missing[id(dealer)]: self._unlock([dealer])
+        elif self._count_missing(node) or any(needs_unlock and self._name_rank(name) >= self._rank[id(dealer)] for name, needs_unlock in requirements):
+            self._relock([dealer], ()) # Lost its unlock, or now relies on dealers unlocked after it
+        # Otherwise it unlocks as before, no later than before, so the dealers depending on it are unaffected.
+
+    def remove_dealer(self, dealer):
+        node = self._nodes.pop(id(dealer), None)
+        if node is None: return
+        self._cycles = None
+        self._link(dealer, node.requirements, False)
+        del self._named[node.name][id(dealer)]
+        if not self._named[node.name]: del self._named[node.name]
+        self._missing.pop(id(dealer), None)
+        if self._rank.pop(id(dealer), None) is not None:
+            del self._ranks[node.name][id(dealer)]
+            if not self._ranks[node.name]: del self._ranks[node.name]
+            self._relock((), [node.name]) # Even with other dealers of that name unlocked, they may have relied on this one
+        elif node.name not in self._named:
+            self._relock((), [node.name])
+
+    # Internals
+    @staticmethod
+    def _name(dealer):
+        name = dealer.get("name") if isinstance(dealer, dict) else None
+        return name if isinstance(name, str) else ""
+
+    def _link(self, dealer, requirements, add):
+        for name in {name for name, needs_unlock in requirements}:
+            if add: self._required_by.setdefault(name, {})[id(dealer)] = dealer
+            else:
+                del self._required_by[name][id(dealer)]
+                if not self._required_by[name]: del self._required_by[name]
+
+    def _met(self, name, needs_unlock):
+        return bool(self._ranks.get(name) if needs_unlock else self._named.get(name))
+
+    def _count_missing(self, node):
+        return sum(not self._met(name, needs_unlock) for name, needs_unlock in node.requirements)
+
+    def _name_rank(self, name):
+        return min(self._ranks[name].values())
+
+    def _add(self, dealer):
+        """Adds a dealer as locked; returns whether it can unlock right away (the caller unlocks it)."""
+        node = Node(dealer, self._name(dealer), unlock_requirements(dealer))
+        self._cycles = None
+        self._nodes[id(dealer)] = node
+        self._link(dealer, node.requirements, True)
+        named = self._named.setdefault(node.name, {})
+        named[id(dealer)] = dealer
+        if len(named) == 1: # The name exists now, which is all its minRep 0 requirements wait for
+            self._unlock([waiting for waiting in self._satisfy(node.name, needs_unlock=False)])
+        self._missing[id(dealer)] = self._count_missing(node)
+        return not self._missing[id(dealer)]
+
+    def _satisfy(self, name, needs_unlock):
+        """Counts the requirements on `name` of that kind as met; returns the locked dealers left with none missing."""
+        ready = []
+        for waiting_id, waiting in self._required_by.get(name, {}).items():
+            if waiting_id not in self._missing: continue
+            met = sum(1 for required, needs in self._nodes[waiting_id].requirements if required == name and needs == needs_unlock)
+            if met:
+                self._missing[waiting_id] -= met
+                if not self._missing[waiting_id]: ready.append(waiting)
+        return ready
+
+    def _unlock(self, ready):
+        """Unlocks the dealers in ready (none of their requirements missing) and whatever that lets unlock."""
+        queue = list(ready)
+        while queue:
+            dealer = queue.pop()
+            if self._missing.pop(id(dealer), None) is None: continue # Already unlocked
+            node = self._nodes[id(dealer)]
+            rank = 1 + max((self._name_rank(name) for name, needs_unlock in node.requirements if needs_unlock), default=0)
+            self._rank[id(dealer)] = rank
+            ranks = self._ranks.setdefault(node.name, {})
+            ranks[id(dealer)] = rank
+            if len(ranks) == 1:
+                queue.extend(self._satisfy(node.name, needs_unlock=True))
+
+    def _relock(self, dealers, names):
+        """
+        Locks the given dealers, the unlocked dealers requiring the given
+        names and everything depending on those in turn, then unlocks again
+        those of them that still can. Locked dealers requiring an affected
+        name have their missing counts worked out again.
+        """
+        affected = {}
+        queue = list(dealers)
+        for dealer in dealers: affected[id(dealer)] = dealer
+        pending_names = list(names)
+        while queue or pending_names:
+            while queue:
+                dealer = queue.pop()
+                if id(dealer) in self._rank: pending_names.append(self._nodes[id(dealer)].name)
+            if pending_names:
+                name = pending_names.pop()
+                for dependent_id, dependent in self._required_by.get(name, {}).items():
+                    if dependent_id not in affected:
+                        affected[dependent_id] = dependent
+                        queue.append(dependent)
+
+        for dealer_id, dealer in affected.items():
+            if dealer_id in self._rank:
+                name = self._nodes[dealer_id].name
+                del self._rank[dealer_id]
+                del self._ranks[name][dealer_id]
+                if not self._ranks[name]: del self._ranks[name]
+        ready = []
+        for dealer_id, dealer in affected.items():
+            self._missing[dealer_id] = self._count_missing(self._nodes[dealer_id])
+            if not self._missing[dealer_id]: ready.append(dealer)
+        self._unlock(ready)
+
+    def _find_cycles(self):
+        """Strongly connected groups of locked dealers (Tarjan), over requirements that need an unlock."""
+        locked = {dealer_id: node for dealer_id, node in self._nodes.items() if dealer_id not in self._rank}
+        def successors(node):
+            for name, needs_unlock in node.requirements:
+                if needs_unlock:
+                    for dealer_id in self._named.get(name, {}):
+                        if dealer_id in locked: yield dealer_id
+
+        index, low, stack, on_stack, cycles = {}, {}, [], set(), []
+        for root in locked:
+            if root in index: continue
+            work = [(root, successors(locked[root]))]
+            index[root] = low[root] = len(index); stack.append(root); on_stack.add(root)
+            while work:
+                dealer_id, children = work[-1]
+                for child in children:
+                    if child not in index:
+                        index[child] = low[child] = len(index); stack.append(child); on_stack.add(child)
+                        work.append((child, successors(locked[child])))
+                        break
+                    if child in on_stack: low[dealer_id] = min(low[dealer_id], index[child])
+                else:
+                    work.pop()
+                    if work: low[work[-1][0]] = min(low[work[-1][0]], low[dealer_id])
+                    if low[dealer_id] == index[dealer_id]:
+                        group = []
+                        while True:
+                            member = stack.pop(); on_stack.discard(member); group.append(member)
+                            if member == dealer_id: break
+                        if len(group) > 1 or dealer_id in set(successors(locked[dealer_id])):
+                            cycles.append([locked[member].dealer for member in reversed(group)])
+        return cycles
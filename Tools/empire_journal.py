@@ -0,0 +1,273 @@
+"""
+Write-ahead journal of editor changes, for recovering unsaved work after a
+crash without rewriting the whole empire file on every autosave.
+
+A journal belongs to one document (a saved file, or the unsaved new file)
+and holds one JSON object per line. The first line names the saved file the
+edits apply to; every other line is one operation on the document, i.e. the
+global keys plus "dealers":
+    {"op": "base", "file": path or null, "size": bytes, "mtime": ns}
+    {"op": "set", "path": ["dealers", 3, "drugs", 0, "unlockRep"], "value": 5}
+    {"op": "delete", "path": ["dealers", 3, "debt"]}
+    {"op": "insert", "path": ["dealers", 4], "value": {...}}
+    {"op": "move", "path": ["dealers", 4], "to": 3}
+Operations are worked out by comparing the document before and after each
+change. The editor's undo snapshots share everything an edit did not touch,
+so the comparison skips shared parts by identity and writes only what changed.
+"""
+import os
+import glob
+import hashlib
+from collections import namedtuple
+
+import json_codec
+import empire_core
+
+JOURNAL_DIR = os.path.join(os.path.expanduser("~"), ".empire_editor", "journal")
+SYNC_BATCH = 50 # Operations written before the journal is fsync'd without waiting for the timer
+SYNC_INTERVAL_MS = 2000 # How often the editor fsyncs the operations written since the last sync
+COMPACT_BYTES = 4 << 20 # Growth of a journal after which it is rewritten as the net changes since the save
+
+
+def journal_path(file_path):
+    """Where the journal of a document lives; file_path None is the unsaved new file."""
+    if file_path is None:
+        return os.path.join(JOURNAL_DIR, "untitled.journal")
+    digest = hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(JOURNAL_DIR, f"{empire_core.sanitize_filename(os.path.basename(file_path))}-{digest}.journal")
+
+
+# --- Operations ---
+def _same(old, new):
+    """Identical objects or equal scalars of the same type (1 and 1.0 are written differently)."""
+    if old is new: return True
+    if isinstance(old, (dict, list)): return False
+    return type(old) is type(new) and old == new
+
+
+def diff_ops(old, new, path=()):
+    """
+    Operations turning old into new, which replay() applies. Objects shared
+    by old and new are skipped without being looked into, so the cost
+    follows the size of the change rather than of the document.
+    """
+    if _same(old, new): return []
+    if type(old) is dict and type(new) is dict:
+        kept = [key for key in old if key in new]
+        added = [key for key in new if key not in old]
+        if [key for key in new if key in old] != kept or list(new) != kept + added:
+            return [{"op": "set", "path": list(path), "value": new}] # Keys were reordered; replaying "set"s would not restore the order
+        ops = [{"op": "delete", "path": list(path + (key,))} for key in old if key not in new]
+        for key in kept:
+            ops.extend(diff_ops(old[key], new[key], path + (key,)))
+        ops.extend({"op": "set", "path": list(path + (key,)), "value": new[key]} for key in added)
+        return ops
+    if type(old) is list and type(new) is list:
+        start, old_end, new_end = 0, len(old), len(new)
+        while start < old_end and start < new_end and _same(old[start], new[start]):
+            start += 1
+        while old_end > start and new_end > start and _same(old[old_end - 1], new[new_end - 1]):
+            old_end -= 1; new_end -= 1
+        removed, added = old_end - start, new_end - start
+        if removed == 0 and added == 1:
+            return [{"op": "insert", "path": list(path + (start,)), "value": new[start]}]
+        if removed == 1 and added == 0:
+            return [{"op": "delete", "path": list(path + (start,))}]
+        if removed == added == 2 and old[start] is new[start + 1] and old[start + 1] is new[start]:
+            return [{"op": "move", "path": list(path + (start + 1,)), "to": start}]
+        if removed == added:
+            ops = []
+            for i in range(start, old_end):
+                ops.extend(diff_ops(old[i], new[i], path + (i,)))
+            return ops
+    return [{"op": "set", "path": list(path), "value": new}]
+
+
+def _document(state):
+    """The document of anything with .dealers and .other_keys (an undo Snapshot, an EmpireFile)."""
+    return empire_core.empire_document(list(state.dealers), state.other_keys)
+
+
+def document_ops(before, after):
+    """Operations turning the document of `before` into that of `after`."""
+    return diff_ops(_document(before), _document(after))
+
+
+def replay(document, ops):
+    """
+    Applies ops to document and returns the result. Containers on the path
+    of an operation are copied before they are changed, so document itself
+    is left as it was.
+    """
+    copied = set() # ids of the containers copied by this replay
+    def editable(container):
+        if id(container) in copied: return container
+        container = container.copy()
+        copied.add(id(container))
+        return container
+
+    document = editable(document)
+    for op in ops:
+        path = op["path"]
+        if not path:
+            document = op["value"]
+            continue
+        parent = document
+        for key in path[:-1]:
+            parent[key] = editable(parent[key])
+            parent = parent[key]
+        key = path[-1]
+        if op["op"] == "set": parent[key] = op["value"]
+        elif op["op"] == "insert": parent.insert(key, op["value"])
+        elif op["op"] == "delete": del parent[key]
+        elif op["op"] == "move": parent.insert(op["to"], parent.pop(key))
+        else: raise empire_core.EmpireFileError(f"Unknown journal operation '{op['op']}'.")
+    return document
+
+
+# --- Journal Files ---
+class Journal:
+    """
+    Append-only journal file. append() only buffers; the operations reach the
+    disk (flushed and fsync'd) every SYNC_BATCH operations and whenever
+    sync() is called, which the editor does on a timer. Once it has grown by
+    COMPACT_BYTES since it was last (re)written, needs_compaction() asks for
+    compact().
+    """
+    def __init__(self, path):
+        self.path = path
+        self._header = None # The base line, kept by compact()
+        self._file = None
+        self._unsynced = 0
+        self._size = 0
+        self._compact_at = COMPACT_BYTES
+
+    def start(self, file_path, ops=()):
+        """
+        (Re)starts the journal for edits applied to file_path as it is on
+        disk now (None: the default new file), beginning with ops.
+        """
+        header = {"op": "base", "file": file_path, "size": None, "mtime": None}
+        if file_path is not None:
+            stat = os.stat(file_path)
+            header.update(size=stat.st_size, mtime=stat.st_mtime_ns)
+        self._rewrite([header] + list(ops))
+
+    def _rewrite(self, lines):
+        """Replaces the journal with lines, atomically, and reopens it for appending."""
+        self.close()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = self.path + ".tmp"
+        text = "".join(json_codec.dumps(line) + "\n" for line in lines)
+        with open(temp_path, 'w', encoding='utf-8', newline='\n') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        self._header = lines[0]
+        self._file = open(self.path, 'a', encoding='utf-8', newline='\n')
+        self._size = len(text) # JSON is written ASCII-escaped, so characters are bytes (tell() would flush)
+        # The net changes can be as big as the edits (many dealers added...), so measure growth from here.
+        self._compact_at = self.size() + COMPACT_BYTES
+
+    def append(self, ops):
+        if not ops: return
+        text = "".join(json_codec.dumps(op) + "\n" for op in ops)
+        self._file.write(text)
+        self._size += len(text)
+        self._unsynced += len(ops)
+        if self._unsynced >= SYNC_BATCH:
+            self.sync()
+
+    def sync(self):
+        if self._file is None or not self._unsynced: return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def size(self):
+        return self._size
+
+    def needs_compaction(self):
+        return self.size() > self._compact_at
+
+    def compact(self, ops):
+        """Rewrites the journal as its header followed by ops, normally the net changes since the base."""
+        self._rewrite([self._header] + list(ops))
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        """Closes and deletes the journal, e.g. once its edits were saved."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+# A journal left behind with unsaved edits.
+#   path: the journal file
+#   base: its header ({"op": "base", "file": ..., "size": ..., "mtime": ...})
+#   ops:  the operations after the header
+PendingJournal = namedtuple("PendingJournal", ["path", "base", "ops"])
+
+
+def read_journal(path):
+    """
+    Reads a journal into a PendingJournal. A torn last line (the editor died
+    while writing it) is dropped; any other unreadable line raises.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.read().split("\n")
+    entries = []
+    for number, line in enumerate(lines):
+        if not line: continue
+        try:
+            entries.append(json_codec.loads(line))
+        except json_codec.JSONDecodeError:
+            if any(lines[number + 1:]): raise
+    if not entries or entries[0].get("op") != "base":
+        raise empire_core.EmpireFileError(f"{os.path.basename(path)} is not an edit journal.")
+    return PendingJournal(path, entries[0], entries[1:])
+
+
+def pending_journals():
+    """The journals in JOURNAL_DIR that hold edits; unreadable ones are skipped."""
+    pending = []
+    for path in sorted(glob.glob(os.path.join(JOURNAL_DIR, "*.journal"))):
+        try:
+            journal = read_journal(path)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Skipping unreadable edit journal {path}: {e}")
+            continue
+        if journal.ops:
+            pending.append(journal)
+    return pending
+
+
+def recover(journal):
+    """
+    Returns (saved, recovered): the EmpireFile the journal's edits apply to
+    and the one with the edits replayed. Raises EmpireFileError when the
+    saved file is gone or was changed after the journal started.
+    """
+    file_path = journal.base.get("file")
+    if file_path is None:
+        default = empire_core.default_empire()
+        saved = empire_core.EmpireFile("empire", default.pop("dealers"), default)
+    else:
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            raise empire_core.EmpireFileError(f"'{file_path}' no longer exists.")
+        if stat.st_size != journal.base.get("size") or stat.st_mtime_ns != journal.base.get("mtime"):
+            raise empire_core.EmpireFileError(f"'{file_path}' was changed after these edits were made, so they cannot be replayed onto it.")
+        saved = empire_core.load_empire(file_path)
+    document = replay(_document(saved), journal.ops)
+    if not isinstance(document, dict) or not isinstance(document.get("dealers"), list):
+        raise empire_core.EmpireFileError("The replayed journal does not contain a dealers list.")
+    recovered = empire_core.EmpireFile("empire", document["dealers"], {k: v for k, v in document.items() if k != "dealers"})
+    return saved, recovered
@@ -0,0 +1,211 @@
+"""
+Schema of empire.json files, compiled once into checking functions that walk
+a document in a single pass and report every problem with its path, e.g.
+'dealers[3].drugs[0].effects[2].probability: must be between 0 and 2 (is 2.5)'.
+
+The schema follows the mod's data classes (Empire-S1API/NPC/Data/DealerData.cs)
+and the formats the editor writes. Keys it does not know are allowed, and
+missing optional keys are not reported, since the mod fills in defaults.
+
+Validator caches the problems of each dealer by identity, so re-validating a
+document after an edit only checks the dealers that changed.
+"""
+from collections import namedtuple
+
+from empire_core import DIALOGUE_KEYS, GLOBAL_LIST_TYPES
+
+# Schema notation:
+#   str, int, float, bool  a string, an integer, any number (ints included), true/false
+#   Range(low, high)       a number between low and high, inclusive
+#   NON_EMPTY              a string that is not empty
+#   [spec]                 a list whose items all match spec
+#   (spec, spec, ...)      a list of exactly that many items, matching in order
+#   {key: spec}            an object; only the keys present are checked
+#   Required(spec)         inside an object: the key must be present
+Range = namedtuple("Range", ["low", "high"])
+Required = namedtuple("Required", ["spec"])
+NON_EMPTY = "non-empty string"
+
+DEALER_SCHEMA = {
+    "name": Required(NON_EMPTY), "image": str, "tier": int,
+    "unlockRequirements": [{"name": str, "minRep": int}],
+    "deals": [(float, float, float, float)], # Number of products, price multiplier, payment, reputation
+    "dealDays": [str], "curfewDeal": bool, "refreshCost": int, "repLogBase": float,
+    "gift": {"cost": int, "rep": int},
+    "reward": {"rep_cost": int, "unlockRep": int, "type": str, "args": [str]},
+    "debt": {"total_debt": float, "interest_rate": float, "day_multiple": float, "day_exponent": float, "product_bonus": float},
+    "drugs": [{
+        "type": str, "unlockRep": int, "base_dollar": int, "base_rep": int, "base_xp": int,
+        "rep_mult": float, "xp_mult": float,
+        "qualities": [{"type": str, "dollar_mult": float, "unlockRep": int}],
+        # Up to 1 an optional effect's chance; above 1 a necessary effect, with (probability - 1) its chance.
+        "effects": [{"name": str, "unlockRep": int, "probability": Range(0, 2), "dollar_mult": float}],
+    }],
+    "shipping": [{
+        "name": str, "cost": int, "unlockRep": int,
+        "minAmount": int, "stepAmount": int, "maxAmount": int,
+        "dealModifier": (float, float, float, float),
+    }],
+    "dialogue": {key: [str] for key in DIALOGUE_KEYS},
+}
+
+GLOBALS_SCHEMA = {
+    "version": {"s1api": str, "empire": str},
+    "noNecessaryEffects": bool,
+    **{key: [item_type] for key, item_type in GLOBAL_LIST_TYPES.items()},
+}
+
+# Global lists read in pairs: a name and its multiplier at the same position.
+PAIRED_LISTS = [("effectsName", "effectsDollarMult"), ("qualityTypes", "qualitiesDollarMult")]
+
+
+# --- Compiling ---
+# A compiled check is check(value, path, problems). Paths are linked pairs
+# (parent path, key) ending in None, so descending costs one small tuple;
+# problems collects (path, message) and format_path() renders the path.
+_TYPE_NAMES = {str: "a string", int: "an integer", float: "a number", bool: "true or false"}
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def compile_schema(spec):
+    """Turns schema notation into a check function."""
+    if spec is str or spec is bool:
+        def check(value, path, problems):
+            if not isinstance(value, spec): problems.append((path, f"must be {_TYPE_NAMES[spec]}"))
+    elif spec is int:
+        def check(value, path, problems):
+            if not isinstance(value, int) or isinstance(value, bool): problems.append((path, "must be an integer"))
+    elif spec is float:
+        def check(value, path, problems):
+            if not _is_number(value): problems.append((path, "must be a number"))
+    elif spec == NON_EMPTY:
+        def check(value, path, problems):
+            if not isinstance(value, str) or not value: problems.append((path, "must be a non-empty string"))
+    elif isinstance(spec, Range):
+        low, high = spec
+        def check(value, path, problems):
+            if not _is_number(value): problems.append((path, "must be a number"))
+            elif not low <= value <= high: problems.append((path, f"must be between {low} and {high} (is {value})"))
+    elif isinstance(spec, list):
+        check_item = compile_schema(spec[0])
+        def check(value, path, problems):
+            if not isinstance(value, list): problems.append((path, "must be a list")); return
+            for i, item in enumerate(value):
+                check_item(item, (path, i), problems)
+    elif isinstance(spec, tuple):
+        check_items = [compile_schema(item) for item in spec]
+        def check(value, path, problems):
+            if not isinstance(value, list) or len(value) != len(check_items):
+                problems.append((path, f"must be a list of {len(check_items)} values")); return
+            for i, (check_item, item) in enumerate(zip(check_items, value)):
+                check_item(item, (path, i), problems)
+    elif isinstance(spec, dict):
+        required = [key for key, field in spec.items() if isinstance(field, Required)]
+        fields = [(key, compile_schema(field.spec if isinstance(field, Required) else field)) for key, field in spec.items()]
+        def check(value, path, problems):
+            if not isinstance(value, dict): problems.append((path, "must be an object")); return
+            for key in required:
+                if key not in value: problems.append(((path, key), "is missing"))
+            for key, check_field in fields:
+                if key in value: check_field(value[key], (path, key), problems)
+    else:
+        raise ValueError(f"Unknown schema notation: {spec!r}")
+    return check
+
+
+_check_dealer = compile_schema(DEALER_SCHEMA)
+_check_globals = compile_schema(GLOBALS_SCHEMA)
+
+
+def format_path(path):
+    """Renders a linked path like dealers[3].drugs[0].type ('$' for the root)."""
+    keys = []
+    while path is not None:
+        path, key = path
+        keys.append(key)
+    text = ""
+    for key in reversed(keys):
+        text += f"[{key}]" if isinstance(key, int) else (f".{key}" if text else str(key))
+    return text or "$"
+
+
+def format_problem(problem):
+    path, message = problem
+    return f"{format_path(path)}: {message}"
+
+
+# --- Validating ---
+def _check_document_globals(content, problems):
+    _check_globals(content, None, problems)
+    for names_key, values_key in PAIRED_LISTS:
+        names, values = content.get(names_key), content.get(values_key)
+        if isinstance(names, list) and isinstance(values, list) and len(names) != len(values):
+            problems.append(((None, values_key), f"has {len(values)} values but {names_key} has {len(names)}"))
+
+
+class Validator:
+    """
+    Validates whole documents, remembering each dealer's problems until the
+    dealer object is replaced. Like FragmentCache this relies on dealers not
+    being changed in place (the editor's undo history copies edited dealers).
+    """
+    def __init__(self):
+        self._dealers = {} # id(dealer) -> (dealer, problems relative to the dealer)
+
+    def dealer_problems(self, dealer):
+        """(path, message) problems of one dealer, with paths relative to it."""
+        cached = self._dealers.get(id(dealer))
+        if cached is not None and cached[0] is dealer:
+            return cached[1]
+        problems = []
+        _check_dealer(dealer, None, problems)
+        self._dealers[id(dealer)] = (dealer, problems)
+        return problems
+
+    def validate(self, content):
+        """Every (path, message) problem of an empire document, in document order."""
+        if not isinstance(content, dict):
+            return [(None, "root must be an object")]
+        problems = []
+        _check_document_globals(content, problems)
+        dealers = content.get("dealers")
+        if not isinstance(dealers, list):
+            problems.append(((None, "dealers"), "missing or not a list"))
+            return problems
+
+        previous, self._dealers = self._dealers, {}
+        seen = {}
+        for i, dealer in enumerate(dealers):
+            cached = previous.get(id(dealer))
+            if cached is not None and cached[0] is dealer:
+                self._dealers[id(dealer)] = cached
+            dealer_path = ((None, "dealers"), i)
+            for path, message in self.dealer_problems(dealer):
+                problems.append((_rebase(path, dealer_path), message))
+            name = dealer.get("name") if isinstance(dealer, dict) else None
+            if isinstance(name, str) and name:
+                if name in seen: problems.append(((dealer_path, "name"), f"duplicate of dealers[{seen[name]}] ('{name}')"))
+                else: seen[name] = i
+        return problems
+
+
+def _rebase(path, base):
+    """path (relative to a dealer) re-rooted under base."""
+    keys = []
+    while path is not None:
+        path, key = path
+        keys.append(key)
+    for key in reversed(keys):
+        base = (base, key)
+    return base
+
+
+def validate_empire(content):
+    """
+    Checks an empire document against the schema and returns every problem
+    as a "path: message" string (empty when the file is valid).
+    """
+    return [format_problem(problem) for problem in Validator().validate(content)]
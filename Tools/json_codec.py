@@ -0,0 +1,135 @@
+"""
+Shared JSON codec for the Empire tools (empire_editor.py and save_cleaner.py).
+
+Parsing uses orjson or ujson when one is installed and falls back to the
+standard json module otherwise (and for anything the fast parser rejects,
+such as NaN literals or integers beyond 64 bits), so the decoded objects are
+always the same as json.loads would return.
+
+Serialization must stay byte-identical to json.dumps whatever is installed.
+orjson's indented output is re-indented and ASCII-escaped to match; when the
+result could still differ (floats orjson prints in another notation, NaN and
+infinities it turns into null, non-string keys, huge integers) the document
+is encoded with the standard json module instead. ujson is only used for
+parsing because its float formatting is not guaranteed to match.
+"""
+import json
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+BACKEND = "orjson" if orjson is not None else "ujson" if ujson is not None else "json"
+
+JSONDecodeError = json.JSONDecodeError
+
+# Number and null tokens orjson may format differently from json.dumps:
+# exponent floats ("1e16" vs "1e+16"), small floats ("0.00001" vs "1e-05"), and
+# null, which is also what orjson writes for NaN and infinities. With
+# OPT_INDENT_2 every value starts the document, follows ": " or starts a line,
+# so string contents can only cause false positives, which just take the
+# standard encoder. Each position gets its own pattern because a literal
+# prefix lets the regex engine skip ahead instead of trying every byte.
+_UNSAFE_VALUE = rb'(?:null|-?[0-9.]*(?:[0-9][eE]|0\.0000))'
+_UNSAFE_ORJSON_PATTERNS = [re.compile(rb'\A' + _UNSAFE_VALUE), re.compile(rb': ' + _UNSAFE_VALUE), re.compile(rb'\n *+' + _UNSAFE_VALUE)]
+_NON_ASCII = re.compile('[\x7f-\U0010ffff]')
+
+
+def loads(s):
+    """json.loads with the fastest available parser."""
+    if orjson is not None:
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            pass
+    elif ujson is not None:
+        try:
+            return ujson.loads(s)
+        except (ValueError, OverflowError):
+            pass
+    return json.loads(s)
+
+
+def load(f):
+    """json.load with the fastest available parser."""
+    return loads(f.read())
+
+
+def _escape_non_ascii(match):
+    """Escapes one character exactly like json.dumps(ensure_ascii=True)."""
+    code = ord(match.group(0))
+    if code < 0x10000:
+        return '\\u{0:04x}'.format(code)
+    code -= 0x10000
+    return '\\u{0:04x}\\u{1:04x}'.format(0xd800 | (code >> 10), 0xdc00 | (code & 0x3ff))
+
+
+def _tab_indent(raw):
+    """
+    Replaces orjson's 2-space indentation with one tab per nesting level, so
+    str.expandtabs() can then widen it to any indent in a single pass. JSON
+    output never contains a raw tab (they are escaped inside strings) and
+    newlines only occur between tokens, so every tab marks indentation. Levels
+    are converted in power-of-two groups to keep the number of passes small.
+    """
+    raw = raw.replace(b'\n  ', b'\n\t')
+    group = 1
+    while b'\t' + b'  ' * (group * 2) in raw:
+        group *= 2
+    while group:
+        raw = raw.replace(b'\t' + b'  ' * group, b'\t' * (group + 1))
+        group //= 2
+    return raw
+
+
+def _orjson_dumps(obj, indent, sort_keys):
+    """json.dumps(obj, indent=indent) produced with orjson, or None when it might not match."""
+    option = orjson.OPT_INDENT_2 | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+    try:
+        raw = orjson.dumps(obj, option=option)
+    except TypeError:
+        return None
+    if any(pattern.search(raw) for pattern in _UNSAFE_ORJSON_PATTERNS):
+        return None
+    text = _tab_indent(raw).decode('utf-8').expandtabs(indent)
+    if not text.isascii() or '\x7f' in text:
+        text = _NON_ASCII.sub(_escape_non_ascii, text)
+    return text
+
+
+def dumps(obj, indent=None, sort_keys=False):
+    """json.dumps(obj, indent=indent, sort_keys=sort_keys), byte-identical, using orjson when it is safe to."""
+    if orjson is not None and type(indent) is int and indent > 0:
+        text = _orjson_dumps(obj, indent, sort_keys)
+        if text is not None:
+            return text
+    return json.dumps(obj, indent=indent, sort_keys=sort_keys)
+
+
+def canonical(obj):
+    """
+    Compact, key-sorted UTF-8 encoding of obj for hashing and equality checks:
+    equal values always give the same bytes and different values different
+    bytes. The exact text may depend on the backend, so never write it to disk.
+    """
+    if orjson is not None:
+        try:
+            raw = orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+        except TypeError:
+            raw = None
+        # orjson also writes NaN and infinities as null, which would make them equal to None.
+        if raw is not None and b'null' not in raw:
+            return raw
+    return json.dumps(obj, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def dump(obj, f, indent=None, sort_keys=False):
+    """json.dump(obj, f, indent=indent, sort_keys=sort_keys) with the fast encoder."""
+    f.write(dumps(obj, indent=indent, sort_keys=sort_keys))
@@ -1,92 +1,1114 @@
+import io
 import json
-from collections import Counter
+import os
+import mmap
+import time
+import hashlib
+import argparse
+import platform
+import threading
+from array import array
+from collections import Counter, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+import multiprocessing
 
-def remove_all_instances_of_duplicates(file_path='NPCs.json'):
+import json_codec
+
+# Size of each read when streaming a save file. Large enough that the number
+# of reads stays small, small enough that memory never tracks the file size.
+STREAM_CHUNK_SIZE = 1 << 20
+
+# --jobs only starts a process pool for saves with at least this many NPCs;
+# below it, pool start-up and pickling cost more than the decoding itself.
+PARALLEL_MIN_RECORDS = 20000
+PARALLEL_MIN_BYTES = 8 << 20 # Same threshold for --stream, where the record count is unknown up front
+PARALLEL_CHUNK_SIZE = 5000
+
+NPCS_KEY_ERROR = "Error: The JSON file must contain a top-level key 'NPCs' with a list of NPC objects."
+
+
+class SaveFormatError(ValueError):
+    """Raised when a save file parses as JSON but has no top-level 'NPCs' list."""
+
+
+def extract_base_data_id(base_data_str):
     """
-    Reads an NPC data file, identifies NPCs with duplicate IDs, removes all
-    instances of those duplicates, and overwrites the file with the cleaned data.
+    Returns the ID stored in an NPC's nested BaseData JSON string, or None when
+    the string is empty, cannot be decoded, or holds an unusable (unhashable) ID.
+    NPCs that map to None are always treated as unique so malformed entries are
+    never removed.
     """
     try:
-        # Open and read the JSON file
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        if not base_data_str:
+            return None
+        npc_id = json_codec.loads(base_data_str).get('ID')
+        hash(npc_id)
+        return npc_id
+    except (json.JSONDecodeError, AttributeError, TypeError):
+        return None
 
-        # Ensure the 'NPCs' key exists and is a list
-        if 'NPCs' not in data or not isinstance(data['NPCs'], list):
-            print("Error: The JSON file must contain a top-level key 'NPCs' with a list of NPC objects.")
-            return
-            
-        original_npc_list = data['NPCs']
-        all_npc_ids = []
-        
-        # First pass: Extract all NPC IDs
-        for npc in original_npc_list:
+
+def extract_npc_id(npc):
+    """Returns the BaseData ID of an NPC record, or None (see extract_base_data_id)."""
+    try:
+        return extract_base_data_id(npc.get('BaseData'))
+    except AttributeError:
+        return None
+
+
+def _base_data_of(npc):
+    """The BaseData string of a record, or None when the record is not an object."""
+    return npc.get('BaseData') if isinstance(npc, dict) else None
+
+
+def _scan_chunk(base_data_strings):
+    """Process pool worker: decodes one chunk of BaseData strings and counts its IDs."""
+    chunk_ids = [extract_base_data_id(s) for s in base_data_strings]
+    return chunk_ids, Counter(chunk_ids)
+
+
+def _iter_parallel_chunks(npcs, jobs, chunk_size):
+    """
+    Yields (chunk_ids, chunk_counts) for consecutive chunks of npcs, in order,
+    decoding them in a pool of `jobs` processes. Only the BaseData strings are
+    sent to the workers, and at most two chunks per worker are in flight, so a
+    streamed NPC list is never fully materialised.
+    """
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = deque()
+        npcs = iter(npcs)
+        while True:
+            chunk = [_base_data_of(npc) for npc in islice(npcs, chunk_size)]
+            if chunk:
+                pending.append(pool.submit(_scan_chunk, chunk))
+            if pending and (not chunk or len(pending) >= jobs * 2):
+                yield pending.popleft().result()
+            elif not chunk:
+                return
+
+
+# Per-save result of the single BaseData decode pass.
+#   ids:          list of distinct NPC IDs, indexed by code
+#   counts:       Counter of every decoded ID (None for NPCs without a usable ID)
+#   record_codes: compact array with one ID code per NPC record, -1 when it has no usable ID
+IdIndex = namedtuple("IdIndex", ["ids", "counts", "record_codes"])
+
+
+def build_id_index(npcs, jobs=1):
+    """
+    Decodes each NPC's BaseData exactly once and records, per record, which ID
+    it carries. Works on any iterable, so streamed records are never retained.
+
+    With jobs > 1 the decoding is spread over a process pool and the per-chunk
+    Counters are merged; the result is identical to the serial scan. Lists
+    shorter than PARALLEL_MIN_RECORDS are always scanned serially since pool
+    start-up would cost more than it saves.
+    """
+    if hasattr(npcs, '__len__') and len(npcs) < PARALLEL_MIN_RECORDS:
+        jobs = 1
+
+    codes = {}
+    ids = []
+    counts = Counter()
+    record_codes = array('l')
+    if jobs > 1:
+        chunks = _iter_parallel_chunks(npcs, jobs, PARALLEL_CHUNK_SIZE)
+    else:
+        chunks = [((extract_npc_id(npc) for npc in npcs), None)]
+
+    for chunk_ids, chunk_counts in chunks:
+        if chunk_counts is not None:
+            counts.update(chunk_counts)
+        for npc_id in chunk_ids:
+            if chunk_counts is None:
+                counts[npc_id] += 1
+            if npc_id is None:
+                record_codes.append(-1)
+                continue
+            code = codes.get(npc_id)
+            if code is None:
+                code = codes[npc_id] = len(ids)
+                ids.append(npc_id)
+            record_codes.append(code)
+    return IdIndex(ids, counts, record_codes)
+
+
+def duplicate_ids(id_index):
+    """Returns the set of IDs that appear on more than one NPC."""
+    return {npc_id for npc_id, count in id_index.counts.items() if count > 1 and npc_id is not None}
+
+
+def keep_mask(id_index):
+    """
+    Returns a bytearray with one keep (1) / drop (0) flag per NPC record, so
+    filtering becomes a plain index lookup instead of another BaseData decode.
+    """
+    ids, counts = id_index.ids, id_index.counts
+    drop_codes = {code for code, npc_id in enumerate(ids) if counts[npc_id] > 1}
+    return bytearray(code not in drop_codes for code in id_index.record_codes)
+
+
+# --- Streaming JSON helpers ---
+class _JsonStreamReader:
+    """
+    Minimal incremental reader over a text file. Values are decoded one at a
+    time with json.JSONDecoder.raw_decode, so only the value being decoded
+    (plus one read chunk) is ever held in memory.
+    """
+    def __init__(self, f, chunk_size=STREAM_CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.consumed = 0 # Characters dropped from the front of buf so far
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    @property
+    def offset(self):
+        """Absolute position of the read cursor, in characters from the start of the file."""
+        return self.consumed + self.pos
+
+    def _fill(self, min_size=0):
+        """Appends the next chunk to the unread part of the buffer."""
+        chunk = self.f.read(max(self.chunk_size, min_size))
+        if not chunk:
+            self.eof = True
+        self.buf = self.buf[self.pos:] + chunk
+        self.consumed += self.pos
+        self.pos = 0
+
+    def peek(self):
+        """Skips whitespace and returns the next character ('' at end of file)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos:self.pos + 1]
+            self._fill()
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.buf, self.pos)
+        self.pos += 1
+
+    def decode_value(self):
+        """Decodes the next complete JSON value, reading more data as needed."""
+        self.peek()
+        while True:
             try:
-                base_data_str = npc.get('BaseData')
-                if not base_data_str:
-                    # Treat NPCs without BaseData as unique to avoid accidental removal
-                    all_npc_ids.append(None) 
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A value ending exactly at the buffer edge may be a truncated number.
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # Grow reads with the pending value so huge records are not re-parsed quadratically.
+            self._fill(min_size=len(self.buf) - self.pos)
+
+
+def iter_save_events(f, spans=False):
+    """
+    Walks a save file's top-level object without loading it, yielding:
+        ("value", key, value)  for every top-level key other than 'NPCs'
+        ("npcs_start", None, None) / ("npcs_end", None, None) around the NPC list
+        ("npc", index, npc)    for each element of the 'NPCs' list, in order
+    Raises SaveFormatError when there is no top-level 'NPCs' list.
+
+    With spans=True the NPC events carry (npc, start, end) offsets instead of
+    the bare record, npcs_start carries the offset just past '[' and npcs_end
+    the offset of ']'. Offsets count characters of f.
+    """
+    reader = _JsonStreamReader(f)
+    if reader.peek() != '{':
+        raise SaveFormatError(NPCS_KEY_ERROR)
+    reader.expect('{')
+    found_npcs = False
+    first = True
+    while reader.peek() != '}':
+        if not first:
+            reader.expect(',')
+        first = False
+        key = reader.decode_value()
+        reader.expect(':')
+        if key != 'NPCs':
+            yield "value", key, reader.decode_value()
+            continue
+        if reader.peek() != '[':
+            raise SaveFormatError(NPCS_KEY_ERROR)
+        found_npcs = True
+        reader.expect('[')
+        yield "npcs_start", None, reader.offset if spans else None
+        index = 0
+        while reader.peek() != ']':
+            if index:
+                reader.expect(',')
+            if spans:
+                reader.peek()
+                start = reader.offset
+                npc = reader.decode_value()
+                yield "npc", index, (npc, start, reader.offset)
+            else:
+                yield "npc", index, reader.decode_value()
+            index += 1
+        yield "npcs_end", None, reader.offset if spans else None
+        reader.expect(']')
+    reader.expect('}')
+    if not found_npcs:
+        raise SaveFormatError(NPCS_KEY_ERROR)
+
+
+def _indented_dump(value, level):
+    """json.dumps(value, indent=4) as it appears when nested `level` levels deep."""
+    return json_codec.dumps(value, indent=4).replace("\n", "\n" + "    " * level)
+
+
+def write_streamed_save(source_path, dest_path, keep_npc):
+    """
+    Re-reads source_path one record at a time and writes it to dest_path,
+    dropping every NPC for which keep_npc(index, npc) is False. The output is
+    byte-identical to json.dump(data, f, indent=4) of the filtered data.
+    Returns the number of NPCs written.
+    """
+    kept = 0
+    with open(source_path, 'r', encoding='utf-8') as src, open(dest_path, 'w', encoding='utf-8') as out:
+        out.write("{")
+        first_key = True
+        for kind, key, value in iter_save_events(src):
+            if kind == "npc":
+                if keep_npc(key, value):
+                    out.write(("," if kept else "") + "\n        " + _indented_dump(value, 2))
+                    kept += 1
+                continue
+            if kind == "npcs_end":
+                out.write("\n    ]" if kept else "]")
+                continue
+            out.write(("" if first_key else ",") + "\n    ")
+            first_key = False
+            if kind == "npcs_start":
+                out.write('"NPCs": [')
+            else:
+                out.write(json.dumps(key) + ": " + _indented_dump(value, 1))
+        out.write("\n}" if not first_key else "}")
+    return kept
+
+
+# --- Byte-span splicing ---
+class NpcSpans:
+    """
+    Where the NPC array and each of its elements sit in the source file.
+        array_open:  byte offset just past the '[' of the NPCs list
+        array_close: byte offset of its closing ']'
+        starts/ends: byte span of each NPC element, in order
+    """
+    def __init__(self):
+        self.array_open = None
+        self.array_close = None
+        self.starts = array('q')
+        self.ends = array('q')
+
+
+def _utf8_base_data(npc):
+    """
+    Splice scans read the file as latin-1 so character offsets equal byte
+    offsets; this restores the real UTF-8 text of a record's BaseData.
+    """
+    base_data_str = _base_data_of(npc)
+    if isinstance(base_data_str, str) and not base_data_str.isascii():
+        try:
+            npc['BaseData'] = base_data_str.encode('latin-1').decode('utf-8')
+        except UnicodeError:
+            pass
+    return npc
+
+
+def scan_npc_spans(f, spans):
+    """
+    Yields every NPC record of a save opened with encoding='latin-1' and
+    newline='', filling `spans` (an NpcSpans) with the byte offsets found.
+    """
+    for kind, _, value in iter_save_events(f, spans=True):
+        if kind == "npc":
+            npc, start, end = value
+            spans.starts.append(start)
+            spans.ends.append(end)
+            yield _utf8_base_data(npc)
+        elif kind == "npcs_start":
+            spans.array_open = value
+        elif kind == "npcs_end":
+            spans.array_close = value
+
+
+def write_spliced_save(source_path, dest_path, spans, keep):
+    """
+    Writes source_path to dest_path by copying byte ranges from an mmap of the
+    source, leaving out the NPC elements whose keep flag is 0. Consecutive kept
+    elements are copied as one range together with the separators between
+    them, so everything that is kept stays exactly as the game wrote it.
+    Returns (number of NPCs written, byte offset in the output just past the
+    last kept NPC, or just past '[' when none were kept).
+    """
+    starts, ends = spans.starts, spans.ends
+    kept = 0
+    records_end = spans.array_open
+    with open(source_path, 'rb') as src, open(dest_path, 'wb') as out, \
+            mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        view = memoryview(mm)
+        try:
+            out.write(view[:spans.array_open])
+            i, count = 0, len(starts)
+            while i < count:
+                if not keep[i]:
+                    i += 1
                     continue
-                
-                base_data = json.loads(base_data_str)
-                all_npc_ids.append(base_data.get('ID'))
-
-            except (json.JSONDecodeError, AttributeError):
-                # Also treat malformed NPCs as unique
-                all_npc_ids.append(None)
-
-        # Count the occurrences of each ID
-        id_counts = Counter(all_npc_ids)
-        
-        # Identify which IDs are duplicates (appear more than once)
-        # We also exclude 'None' in case of malformed data
-        ids_to_remove = {npc_id for npc_id, count in id_counts.items() if count > 1 and npc_id is not None}
-        
-        if not ids_to_remove:
+                run_start = i
+                while i < count and keep[i]:
+                    i += 1
+                if kept:
+                    # The gap before an element holds its ',' separator.
+                    out.write(view[ends[run_start - 1]:ends[i - 1]])
+                else:
+                    # Keep the whitespace between '[' and the original first element.
+                    out.write(view[spans.array_open:starts[0]])
+                    out.write(view[starts[run_start]:ends[i - 1]])
+                kept += i - run_start
+                records_end = out.tell()
+            out.write(view[ends[-1]:] if kept else view[spans.array_close:])
+        finally:
+            view.release()
+    return kept, records_end
+
+
+# Outcome of cleaning one save file.
+#   records:     number of NPC records scanned
+#   removed_ids: set of duplicate IDs whose NPCs were removed (empty when the file was left alone)
+#   removed:     number of NPC records removed
+#   seconds:     wall time spent on the file
+CleanResult = namedtuple("CleanResult", ["file_path", "records", "removed_ids", "removed", "seconds"])
+
+
+def _replace_via_temp_file(file_path, write_save):
+    """Lets write_save(temp_path) produce the cleaned file, then moves it over file_path."""
+    temp_path = file_path + ".tmp"
+    try:
+        written = write_save(temp_path)
+        os.replace(temp_path, file_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return written
+
+
+def _clean_in_memory(file_path, jobs):
+    # Open and read the JSON file
+    with open(file_path, 'r') as f:
+        data = json_codec.load(f)
+
+    # Ensure the 'NPCs' key exists and is a list
+    if 'NPCs' not in data or not isinstance(data['NPCs'], list):
+        raise SaveFormatError(NPCS_KEY_ERROR)
+
+    original_npc_list = data['NPCs']
+
+    # Single pass: decode every BaseData once and count the IDs
+    id_index = build_id_index(original_npc_list, jobs)
+    ids_to_remove = duplicate_ids(id_index)
+    if not ids_to_remove:
+        return len(original_npc_list), ids_to_remove, 0
+
+    # Filter by record index; no BaseData is decoded a second time
+    keep = keep_mask(id_index)
+    final_npcs = [npc for npc, kept in zip(original_npc_list, keep) if kept]
+
+    # Update the original data structure
+    original_count = len(original_npc_list)
+    final_count = len(final_npcs)
+    data['NPCs'] = final_npcs
+
+    # Write the updated data back to the same file
+    with open(file_path, 'w') as f:
+        json_codec.dump(data, f, indent=4)
+    return original_count, ids_to_remove, original_count - final_count
+
+
+def _clean_streaming(file_path, jobs):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        if os.path.getsize(file_path) < PARALLEL_MIN_BYTES:
+            jobs = 1
+        id_index = build_id_index((npc for kind, _, npc in iter_save_events(f) if kind == "npc"), jobs)
+
+    keep = keep_mask(id_index)
+    ids_to_remove = duplicate_ids(id_index)
+    if not ids_to_remove:
+        return len(keep), ids_to_remove, 0
+    final_count = _replace_via_temp_file(
+        file_path, lambda temp_path: write_streamed_save(file_path, temp_path, lambda index, _: keep[index]))
+    return len(keep), ids_to_remove, len(keep) - final_count
+
+
+def _rewrite_without_duplicates(file_path, jobs):
+    """
+    Splice-cleans file_path: scans the NPC record spans, decodes every BaseData
+    once and, when duplicates were found, copies the kept records into the
+    rewritten file. Returns (spans, id_index, keep, ids_to_remove, final_count,
+    prefix_end), prefix_end being the byte offset just past the last kept NPC
+    record of the file as it is now ('[' when there are none).
+    """
+    spans = NpcSpans()
+    with open(file_path, 'r', encoding='latin-1', newline='') as f:
+        if os.path.getsize(file_path) < PARALLEL_MIN_BYTES:
+            jobs = 1
+        id_index = build_id_index(scan_npc_spans(f, spans), jobs)
+
+    keep = keep_mask(id_index)
+    ids_to_remove = duplicate_ids(id_index)
+    if ids_to_remove:
+        final_count, prefix_end = _replace_via_temp_file(
+            file_path, lambda temp_path: write_spliced_save(file_path, temp_path, spans, keep))
+    else:
+        final_count = len(keep)
+        prefix_end = spans.ends[-1] if final_count else spans.array_open
+    return spans, id_index, keep, ids_to_remove, final_count, prefix_end
+
+
+def _clean_splice(file_path, jobs):
+    spans, id_index, keep, ids_to_remove, final_count, prefix_end = _rewrite_without_duplicates(file_path, jobs)
+    return len(keep), ids_to_remove, len(keep) - final_count
+
+
+# --- Incremental cleaning with a sidecar index ---
+# The sidecar written next to a save after each incremental run:
+#   records:       number of NPC records in the file
+#   prefix_end:    byte offset just past the last NPC record ('[' when there are none)
+#   prefix_sha256: hash of the file's first prefix_end bytes
+#   ids:           [ID, count] pairs for every decoded ID
+#   unidentified:  number of NPCs without a usable ID
+# The game appends NPCs, so as long as the hashed prefix is unchanged only the
+# records after prefix_end need decoding on the next run.
+SIDECAR_SUFFIX = ".index"
+SIDECAR_VERSION = 1
+
+
+def sidecar_path(file_path):
+    return file_path + SIDECAR_SUFFIX
+
+
+def load_sidecar(file_path):
+    """Returns the sidecar of file_path, or None when it is missing, unreadable or from another version."""
+    try:
+        with open(sidecar_path(file_path), 'r', encoding='utf-8') as f:
+            sidecar = json_codec.load(f)
+        if not isinstance(sidecar, dict) or sidecar.get("version") != SIDECAR_VERSION:
+            return None
+        counts = Counter({npc_id: count for npc_id, count in sidecar["ids"]})
+        counts[None] = sidecar["unidentified"]
+        return sidecar["records"], sidecar["prefix_end"], sidecar["prefix_sha256"], counts
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def write_sidecar(file_path, records, prefix_end, prefix_sha256, counts):
+    sidecar = {
+        "version": SIDECAR_VERSION,
+        "records": records,
+        "prefix_end": prefix_end,
+        "prefix_sha256": prefix_sha256,
+        "ids": [[npc_id, count] for npc_id, count in counts.items() if npc_id is not None and count > 0],
+        "unidentified": counts[None],
+    }
+    _replace_via_temp_file(sidecar_path(file_path), lambda temp_path: _write_json(temp_path, sidecar, indent=None))
+
+
+def _update_hash(digest, f, length):
+    """Feeds the next `length` bytes of binary file f into digest."""
+    while length > 0:
+        chunk = f.read(min(STREAM_CHUNK_SIZE, length))
+        if not chunk:
+            raise EOFError("File is shorter than expected.")
+        digest.update(chunk)
+        length -= len(chunk)
+    return digest
+
+
+def iter_appended_npcs(f, offset, leading_comma):
+    """
+    Yields (npc, start, end) for the NPC elements that follow byte `offset` of a
+    save opened as latin-1 text positioned at that offset, stopping at the ']'
+    that closes the NPCs list. leading_comma is False when offset sits just past
+    the '[' (no records before it).
+    """
+    reader = _JsonStreamReader(f)
+    reader.consumed = offset
+    first = not leading_comma
+    while reader.peek() != ']':
+        if not first:
+            reader.expect(',')
+        first = False
+        reader.peek()
+        start = reader.offset
+        npc = reader.decode_value()
+        yield _utf8_base_data(npc), start, reader.offset
+
+
+def _scan_appended_records(file_path, sidecar):
+    """
+    Decodes only the NPCs appended since the sidecar was written. Returns
+    (records, prefix_end, prefix_sha256, counts) for the current file, or None
+    when the hashed prefix changed and a full scan is required.
+    """
+    records, prefix_end, prefix_sha256, counts = sidecar
+    try:
+        with open(file_path, 'rb') as raw:
+            digest = _update_hash(hashlib.sha256(), raw, prefix_end)
+            if digest.hexdigest() != prefix_sha256:
+                return None
+            new_end = prefix_end
+            with io.TextIOWrapper(raw, encoding='latin-1', newline='') as f:
+                for npc, _, end in iter_appended_npcs(f, prefix_end, leading_comma=records > 0):
+                    counts[extract_npc_id(npc)] += 1
+                    records += 1
+                    new_end = end
+        with open(file_path, 'rb') as raw:
+            raw.seek(prefix_end)
+            _update_hash(digest, raw, new_end - prefix_end)
+    except (EOFError, json.JSONDecodeError):
+        return None
+    return records, new_end, digest.hexdigest(), counts
+
+
+def _clean_incremental(file_path, jobs):
+    """
+    Splice cleaner that keeps a sidecar index next to the save. When only new
+    records were appended since the last run, just those are decoded; a full
+    splice clean runs on the first call, when the prefix changed, or when an
+    appended record duplicates an existing ID (all its instances must go).
+    """
+    sidecar = load_sidecar(file_path)
+    if sidecar is not None:
+        appended = _scan_appended_records(file_path, sidecar)
+        if appended is not None:
+            records, prefix_end, prefix_sha256, counts = appended
+            if not any(count > 1 for npc_id, count in counts.items() if npc_id is not None):
+                write_sidecar(file_path, records, prefix_end, prefix_sha256, counts)
+                return records, set(), 0
+
+    spans, id_index, keep, ids_to_remove, final_count, prefix_end = _rewrite_without_duplicates(file_path, jobs)
+    with open(file_path, 'rb') as raw:
+        prefix_sha256 = _update_hash(hashlib.sha256(), raw, prefix_end).hexdigest()
+    counts = Counter({npc_id: count for npc_id, count in id_index.counts.items() if npc_id not in ids_to_remove})
+    write_sidecar(file_path, final_count, prefix_end, prefix_sha256, counts)
+    return len(keep), ids_to_remove, len(keep) - final_count
+
+
+# Cleaning strategies, selectable with --stream / --splice:
+#   memory: json.load the whole save and json.dump it back (the original behaviour)
+#   stream: parse and re-serialize one NPC at a time, constant memory
+#   splice: copy kept NPC records byte-for-byte from the source, never re-serialize
+#   incremental: splice, but only decode records appended since the last run
+CLEANERS = {
+    "memory": _clean_in_memory,
+    "stream": _clean_streaming,
+    "splice": _clean_splice,
+    "incremental": _clean_incremental,
+}
+
+
+def clean_npcs_file(file_path='NPCs.json', mode="memory", jobs=1):
+    """
+    Removes every instance of NPCs with duplicate IDs from one save file without
+    printing anything. The file is only rewritten when duplicates were found.
+    Raises FileNotFoundError, json.JSONDecodeError or SaveFormatError on bad input.
+    """
+    start = time.perf_counter()
+    records, removed_ids, removed = CLEANERS[mode](file_path, jobs)
+    return CleanResult(file_path, records, removed_ids, removed, time.perf_counter() - start)
+
+
+# --- Dry-run phase reports ---
+REPORT_VERSION = 1
+REPORT_PHASES = ["read", "parse", "decode", "count", "filter", "write"]
+
+
+class _TimedReader:
+    """Wraps a file so the time spent inside read() is added to phases["read"]."""
+    def __init__(self, f, phases):
+        self.f = f
+        self.phases = phases
+
+    def read(self, size=-1):
+        start = time.perf_counter()
+        chunk = self.f.read(size)
+        self.phases["read"] += time.perf_counter() - start
+        return chunk
+
+
+def _timed_decode(records, phases):
+    """
+    Decodes the BaseData ID of every record yielded by `records`, timing the
+    decode separately from the iteration itself (which reads and parses the
+    file for the streaming modes). Returns (ids, seconds spent iterating).
+    """
+    ids = []
+    start = time.perf_counter()
+    for npc in records:
+        decode_start = time.perf_counter()
+        ids.append(extract_npc_id(npc))
+        phases["decode"] += time.perf_counter() - decode_start
+    return ids, time.perf_counter() - start - phases["decode"]
+
+
+def duplicate_histogram(counts):
+    """Maps each duplicate count ("2", "3", ...) to the number of IDs seen that many times."""
+    histogram = Counter(count for npc_id, count in counts.items() if npc_id is not None and count > 1)
+    return {str(copies): histogram[copies] for copies in sorted(histogram)}
+
+
+def dry_run_report(file_path='NPCs.json', mode="memory"):
+    """
+    Runs every phase of a clean in the given mode without changing anything
+    and returns a report dict with the wall time of each phase (read, parse,
+    BaseData decode, count, filter, write), bytes read, throughput and the
+    histogram of duplicate counts.
+
+    The scan is always serial so the phases can be told apart. For the
+    streaming modes reading and parsing are interleaved; reads are timed at
+    the file object and the rest of the scan counts as parse. The write phase
+    only runs when duplicates were found, into os.devnull. "incremental" is
+    reported as a full splice scan since a dry run never uses the sidecar.
+    Raises the same errors as clean_npcs_file.
+    """
+    phases = dict.fromkeys(REPORT_PHASES, 0.0)
+    bytes_read = os.path.getsize(file_path)
+    start = time.perf_counter()
+
+    if mode == "memory":
+        with open(file_path, 'r') as f:
+            text = _TimedReader(f, phases).read()
+        parse_start = time.perf_counter()
+        data = json_codec.loads(text)
+        phases["parse"] = time.perf_counter() - parse_start
+        del text
+        if 'NPCs' not in data or not isinstance(data['NPCs'], list):
+            raise SaveFormatError(NPCS_KEY_ERROR)
+        ids, _ = _timed_decode(data['NPCs'], phases)
+    elif mode == "stream":
+        with open(file_path, 'r', encoding='utf-8') as f:
+            events = iter_save_events(_TimedReader(f, phases))
+            ids, scan_seconds = _timed_decode((npc for kind, _, npc in events if kind == "npc"), phases)
+        phases["parse"] = scan_seconds - phases["read"]
+    else:
+        spans = NpcSpans()
+        with open(file_path, 'r', encoding='latin-1', newline='') as f:
+            ids, scan_seconds = _timed_decode(scan_npc_spans(_TimedReader(f, phases), spans), phases)
+        phases["parse"] = scan_seconds - phases["read"]
+
+    count_start = time.perf_counter()
+    counts = Counter(ids)
+    ids_to_remove = {npc_id for npc_id, count in counts.items() if count > 1 and npc_id is not None}
+    phases["count"] = time.perf_counter() - count_start
+
+    filter_start = time.perf_counter()
+    keep = bytearray(npc_id not in ids_to_remove for npc_id in ids)
+    if mode == "memory":
+        data['NPCs'] = [npc for npc, kept in zip(data['NPCs'], keep) if kept]
+    phases["filter"] = time.perf_counter() - filter_start
+
+    if ids_to_remove:
+        write_start = time.perf_counter()
+        if mode == "memory":
+            with open(os.devnull, 'w') as f:
+                json_codec.dump(data, f, indent=4)
+        elif mode == "stream":
+            write_streamed_save(file_path, os.devnull, lambda index, _: keep[index])
+        else:
+            write_spliced_save(file_path, os.devnull, spans, keep)
+        phases["write"] = time.perf_counter() - write_start
+
+    seconds = time.perf_counter() - start
+    return {
+        "version": REPORT_VERSION,
+        "file": os.path.basename(file_path),
+        "mode": mode,
+        "dry_run": True,
+        "json_backend": json_codec.BACKEND,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "bytes_read": bytes_read,
+        "records": len(ids),
+        "unidentified_records": counts[None],
+        "duplicate_ids": len(ids_to_remove),
+        "records_to_remove": len(ids) - sum(keep),
+        "would_rewrite": bool(ids_to_remove),
+        "phases": {name: round(value, 6) for name, value in phases.items()},
+        "seconds": round(seconds, 6),
+        "records_per_second": round(len(ids) / seconds) if seconds > 0 else None,
+        "duplicate_histogram": duplicate_histogram(counts),
+    }
+
+
+def print_report(report):
+    """Human-readable form of a dry_run_report."""
+    print(f"\nDry run of '{report['file']}' ({report['mode']} mode, {report['json_backend']}): nothing was changed.")
+    print(f"{report['records']} NPC records, {report['bytes_read']} bytes read, {report['records_per_second'] or 0} records/s.")
+    for name in REPORT_PHASES:
+        print(f"  {name:<7} {report['phases'][name]:>9.3f} s")
+    print(f"  {'total':<7} {report['seconds']:>9.3f} s")
+    if report["would_rewrite"]:
+        histogram = ", ".join(f"{ids} ID(s) x{copies}" for copies, ids in report["duplicate_histogram"].items())
+        print(f"Would remove {report['records_to_remove']} NPC object(s) sharing {report['duplicate_ids']} ID(s): {histogram}.")
+    else:
+        print("No duplicate NPCs found.")
+
+
+def remove_all_instances_of_duplicates(file_path='NPCs.json', jobs=1, mode="memory"):
+    """
+    Reads an NPC data file, identifies NPCs with duplicate IDs, removes all
+    instances of those duplicates, and overwrites the file with the cleaned data.
+    BaseData decoding uses `jobs` processes on large saves; `mode` picks one of CLEANERS.
+    """
+    try:
+        result = clean_npcs_file(file_path, mode, jobs)
+
+        if not result.removed_ids:
             print("\nNo duplicate NPCs found. The file was not changed.")
             return
 
-        print(f"Found duplicate entries for the following NPC IDs: {', '.join(ids_to_remove)}")
+        # The file is already rewritten here, so IDs that are not strings (ints from BaseData) must not make this raise.
+        print(f"Found duplicate entries for the following NPC IDs: {', '.join(map(str, sorted(result.removed_ids, key=str)))}")
         print("Removing all instances of these NPCs...")
-
-        # Second pass: Build the new list, excluding all instances of the duplicate IDs
-        final_npcs = []
-        for npc in original_npc_list:
-            try:
-                base_data_str = npc.get('BaseData')
-                if not base_data_str:
-                    final_npcs.append(npc) # Keep NPCs without BaseData
-                    continue
-
-                base_data = json.loads(base_data_str)
-                npc_id = base_data.get('ID')
-                
-                # Only add the NPC if its ID is NOT in the set of duplicates
-                if npc_id not in ids_to_remove:
-                    final_npcs.append(npc)
-
-            except (json.JSONDecodeError, AttributeError):
-                final_npcs.append(npc) # Keep malformed NPCs
-
-        # Update the original data structure
-        original_count = len(data['NPCs'])
-        final_count = len(final_npcs)
-        data['NPCs'] = final_npcs
-        
-        # Write the updated data back to the same file
-        with open(file_path, 'w') as f:
-            json.dump(data, f, indent=4)
-        
-        print(f"\nSuccessfully removed {original_count - final_count} NPC object(s).")
+        print(f"\nSuccessfully removed {result.removed} NPC object(s).")
         print(f"The file '{file_path}' has been updated.")
 
     except FileNotFoundError:
         print(f"Error: The file '{file_path}' was not found in the same directory.")
     except json.JSONDecodeError:
         print(f"Error: Could not decode the JSON from the file '{file_path}'. Please check its format.")
+    except SaveFormatError as e:
+        print(e)
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
 
+
+def remove_all_instances_of_duplicates_streaming(file_path='NPCs.json', jobs=1):
+    """
+    Constant-memory variant of remove_all_instances_of_duplicates. The NPC list
+    is parsed one element at a time: a first pass decodes BaseData and counts IDs,
+    a second pass streams the kept records into a temporary file that replaces
+    the original. Peak memory is one NPC record plus the ID index, regardless of
+    file size.
+    """
+    remove_all_instances_of_duplicates(file_path, jobs, mode="stream")
+
+
+def remove_all_instances_of_duplicates_splice(file_path='NPCs.json', jobs=1):
+    """
+    Variant of remove_all_instances_of_duplicates that never re-serializes. The
+    scan records each NPC element's byte span, and the output is produced by
+    copying the spans of kept records straight out of an mmap of the source, so
+    untouched records, key order and the game's own formatting are preserved
+    and the write cost is a byte copy rather than a JSON encode.
+    """
+    remove_all_instances_of_duplicates(file_path, jobs, mode="splice")
+
+
+# --- Batch cleaning of a saves folder ---
+NPCS_FILE_NAME = "NPCs.json"
+CACHE_FILE_NAME = ".save_cleaner_cache.json"
+
+# One row of the batch summary. status is "cleaned", "unchanged", "skipped" (cache hit) or "error".
+BatchEntry = namedtuple("BatchEntry", ["file_path", "status", "records", "removed", "seconds", "detail"])
+
+
+def find_npc_files(root):
+    """Returns every NPCs.json below root (save slots and their backups), sorted."""
+    found = []
+    for dir_path, _, file_names in os.walk(root):
+        if NPCS_FILE_NAME in file_names:
+            found.append(os.path.join(dir_path, NPCS_FILE_NAME))
+    return sorted(found)
+
+
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(STREAM_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_clean_cache(cache_path):
+    """Reads the batch cache ({abs path: {sha256, size, mtime_ns, records}}); a missing or broken cache is empty."""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json_codec.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_clean_cache(cache_path, cache):
+    _replace_via_temp_file(cache_path, lambda temp_path: _write_json(temp_path, cache))
+
+
+def _write_json(path, value, indent=4):
+    with open(path, 'w', encoding='utf-8') as f:
+        json_codec.dump(value, f, indent=indent)
+
+
+def _clean_batch_file(file_path, mode, jobs, cached):
+    """
+    Cleans one file of a batch. Returns (BatchEntry, cache record or None).
+    A file whose size and mtime match the cache is skipped without being read;
+    otherwise its content hash decides whether it changed since the last clean.
+    """
+    start = time.perf_counter()
+    try:
+        stat = os.stat(file_path)
+        if cached and cached.get("size") == stat.st_size and cached.get("mtime_ns") == stat.st_mtime_ns:
+            return BatchEntry(file_path, "skipped", cached.get("records", 0), 0, time.perf_counter() - start, ""), cached
+        digest = file_sha256(file_path)
+        if cached and cached.get("sha256") == digest:
+            record = dict(cached, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            return BatchEntry(file_path, "skipped", cached.get("records", 0), 0, time.perf_counter() - start, ""), record
+
+        result = clean_npcs_file(file_path, mode, jobs)
+        if result.removed:
+            digest = file_sha256(file_path)
+            stat = os.stat(file_path)
+        record = {"sha256": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "records": result.records - result.removed}
+        status = "cleaned" if result.removed else "unchanged"
+        return BatchEntry(file_path, status, result.records, result.removed, time.perf_counter() - start, ""), record
+    except json.JSONDecodeError:
+        detail = "could not decode JSON"
+    except Exception as e:
+        detail = str(e)
+    return BatchEntry(file_path, "error", 0, 0, time.perf_counter() - start, detail), None
+
+
+def clean_directory(root, mode="memory", jobs=1, workers=4, use_cache=True):
+    """
+    Cleans every NPCs.json under root with a pool of `workers` threads and
+    returns one BatchEntry per file. Files whose content matches the last
+    successful clean (tracked in CACHE_FILE_NAME under root) are skipped.
+    """
+    files = find_npc_files(root)
+    cache_path = os.path.join(root, CACHE_FILE_NAME)
+    cache = load_clean_cache(cache_path) if use_cache else {}
+
+    entries = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(_clean_batch_file, path, mode, jobs, cache.get(os.path.abspath(path))) for path in files]
+        for path, future in zip(files, futures):
+            entry, record = future.result()
+            entries.append(entry)
+            if record is None:
+                cache.pop(os.path.abspath(path), None)
+            else:
+                cache[os.path.abspath(path)] = record
+
+    if use_cache:
+        save_clean_cache(cache_path, cache)
+    return entries
+
+
+def print_batch_summary(entries):
+    """Prints the per-file summary of a clean_directory run."""
+    if not entries:
+        print("No NPCs.json files found.")
+        return
+    width = max(len("File"), max(len(entry.file_path) for entry in entries))
+    print(f"\n{'File':<{width}}  {'Status':<9}  {'Records':>8}  {'Removed':>8}  {'Time (s)':>8}")
+    for entry in entries:
+        line = f"{entry.file_path:<{width}}  {entry.status:<9}  {entry.records:>8}  {entry.removed:>8}  {entry.seconds:>8.2f}"
+        print(line + (f"  {entry.detail}" if entry.detail else ""))
+    statuses = Counter(entry.status for entry in entries)
+    print(f"\n{len(entries)} file(s): " + ", ".join(f"{count} {status}" for status, count in sorted(statuses.items())) +
+          f". {sum(entry.removed for entry in entries)} NPC object(s) removed.")
+
+
+# --- Watch mode ---
+class SaveWatcher:
+    """
+    Cleans NPCs.json files shortly after the game writes them. Each poll only
+    stats the watched files (size and mtime); nothing is read until a file has
+    changed and then stayed unchanged for quiet_seconds. While nothing changes
+    the poll interval doubles from min_interval up to max_interval, so an idle
+    watcher costs a handful of stat calls per minute.
+
+    The clock is injectable and poll() performs exactly one iteration, so the
+    watcher can be driven step by step against a fake save directory.
+    """
+    def __init__(self, path, mode="incremental", jobs=1, quiet_seconds=5.0,
+                 min_interval=1.0, max_interval=30.0, rescan_seconds=60.0, clock=time.monotonic):
+        self.path = path
+        self.mode = mode
+        self.jobs = jobs
+        self.quiet_seconds = quiet_seconds
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.rescan_seconds = rescan_seconds
+        self.clock = clock
+        self.interval = min_interval
+
+        self.signatures = {}  # path -> (size, mtime_ns) last seen
+        self.changed_at = {}  # path -> clock time of the last change not cleaned yet
+        self.files = []
+        self.last_rescan = None
+        self._discover()
+        for file_path in self.files:
+            self.signatures[file_path] = self._signature(file_path)
+
+    def _discover(self):
+        """Refreshes the watched file list; a folder is re-walked every rescan_seconds."""
+        self.files = find_npc_files(self.path) if os.path.isdir(self.path) else [self.path]
+        self.last_rescan = self.clock()
+
+    def _signature(self, file_path):
+        try:
+            stat = os.stat(file_path)
+            return stat.st_size, stat.st_mtime_ns
+        except OSError:
+            return None
+
+    def poll(self):
+        """
+        Runs one watch iteration. Returns a list of (file_path, CleanResult or
+        exception) for the files cleaned during this poll and sets self.interval
+        to the delay before the next one.
+        """
+        now = self.clock()
+        if os.path.isdir(self.path) and now - self.last_rescan >= self.rescan_seconds:
+            self._discover()
+
+        activity = False
+        for file_path in self.files:
+            signature = self._signature(file_path)
+            if signature != self.signatures.get(file_path):
+                self.signatures[file_path] = signature
+                if signature is not None:
+                    self.changed_at[file_path] = now
+                activity = True
+
+        cleaned = []
+        for file_path, changed_at in list(self.changed_at.items()):
+            if now - changed_at < self.quiet_seconds:
+                continue
+            del self.changed_at[file_path]
+            try:
+                outcome = clean_npcs_file(file_path, self.mode, self.jobs)
+            except json.JSONDecodeError as e:
+                # Caught mid-write or malformed for good: keep the signature seen before reading, so the
+                # file is retried once the game writes it again rather than re-parsed every quiet period.
+                cleaned.append((file_path, e))
+                continue
+            except Exception as e:
+                outcome = e
+            # Our own rewrite must not count as a new save.
+            self.signatures[file_path] = self._signature(file_path)
+            cleaned.append((file_path, outcome))
+
+        if activity or cleaned:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * 2)
+        if self.changed_at:
+            # Wake up in time to clean as soon as the quiet period is over.
+            remaining = min(changed_at + self.quiet_seconds for changed_at in self.changed_at.values()) - now
+            self.interval = max(self.min_interval, min(self.interval, remaining))
+        return cleaned
+
+    def run(self, stop_event=None, report=None):
+        """Polls until stop_event is set (or forever), passing each poll's results to report."""
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            cleaned = self.poll()
+            if cleaned and report:
+                report(cleaned)
+            stop_event.wait(self.interval)
+
+
+def print_watch_results(cleaned):
+    for file_path, outcome in cleaned:
+        stamp = time.strftime("%H:%M:%S")
+        if isinstance(outcome, Exception):
+            print(f"[{stamp}] {file_path}: error: {outcome}")
+        elif outcome.removed:
+            print(f"[{stamp}] {file_path}: removed {outcome.removed} NPC object(s) with duplicate IDs ({outcome.seconds:.2f} s).")
+        else:
+            print(f"[{stamp}] {file_path}: no duplicate NPCs ({outcome.records} records, {outcome.seconds:.2f} s).")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Removes every instance of NPCs that share an ID in a Schedule 1 NPCs.json save file.")
+    parser.add_argument("file_path", nargs="?", default="NPCs.json", help="Path to the NPCs.json file, or a saves folder to clean every NPCs.json below it (default: NPCs.json in the current directory).")
+    parser.add_argument("--stream", action="store_true", help="Parse the NPC list one record at a time to keep memory use constant on huge saves.")
+    parser.add_argument("--splice", action="store_true", help="Copy kept NPC records byte-for-byte from the original file instead of re-serializing the save.")
+    parser.add_argument("--incremental", action="store_true", help=f"Like --splice, but keep an index next to the save (NPCs.json{SIDECAR_SUFFIX}) so later runs only decode newly appended NPCs.")
+    parser.add_argument("--jobs", type=int, default=1, metavar="N", help="Decode NPC BaseData with N worker processes on large saves (default: 1, serial).")
+    parser.add_argument("--workers", type=int, default=4, metavar="N", help="Number of files cleaned concurrently when given a folder (default: 4).")
+    parser.add_argument("--no-cache", action="store_true", help="When given a folder, re-clean every file even if it is unchanged since the last run.")
+    parser.add_argument("--watch", action="store_true", help="Keep running and clean the save(s) each time the game writes them (uses --incremental unless another mode is given).")
+    parser.add_argument("--dry-run", action="store_true", help="Change nothing; time each phase of a clean (read, parse, decode, count, filter, write) and report what would be removed.")
+    parser.add_argument("--report", choices=["text", "json"], default="text", help="With --dry-run, print the report as text (default) or as JSON.")
+    parser.add_argument("--report-file", metavar="PATH", help="With --dry-run, also write the JSON report(s) to PATH.")
+    parser.add_argument("--quiet-seconds", type=float, default=5.0, metavar="S", help="With --watch, wait until a file has been unchanged for S seconds before cleaning it (default: 5).")
+    args = parser.parse_args(argv)
+    if args.dry_run and args.watch:
+        parser.error("--dry-run cannot be combined with --watch")
+    if (args.report != "text" or args.report_file) and not args.dry_run:
+        parser.error("--report and --report-file require --dry-run")
+    return args
+
+
+def run_dry_run(path, mode, report_format="text", report_file=None):
+    """
+    Builds dry-run reports for one save or every NPCs.json below a folder and
+    prints them; files that fail to load get an entry with an "error" key.
+    """
+    reports = []
+    for file_path in find_npc_files(path) if os.path.isdir(path) else [path]:
+        # Paths relative to the saves folder tell the slots apart without exposing the user's home folder.
+        name = os.path.relpath(file_path, path) if os.path.isdir(path) else os.path.basename(file_path)
+        try:
+            report = dry_run_report(file_path, mode)
+        except json.JSONDecodeError:
+            report = {"version": REPORT_VERSION, "mode": mode, "dry_run": True, "error": "could not decode JSON"}
+        except Exception as e:
+            report = {"version": REPORT_VERSION, "mode": mode, "dry_run": True, "error": str(e)}
+        report["file"] = name
+        reports.append(report)
+    document = reports if os.path.isdir(path) else reports[0]
+    if report_format == "json":
+        print(json_codec.dumps(document, indent=4))
+    else:
+        for report in reports:
+            if "error" in report:
+                print(f"\n{report['file']}: error: {report['error']}")
+            else:
+                print_report(report)
+    if report_file:
+        _write_json(report_file, document)
+
 # --- Execute the function ---
 if __name__ == "__main__":
-    remove_all_instances_of_duplicates()
\ No newline at end of file
+    multiprocessing.freeze_support() # Required for --jobs in the frozen SaveCleaner.exe
+    args = parse_args()
+    jobs = max(1, args.jobs)
+    mode = "incremental" if args.incremental else "splice" if args.splice else "stream" if args.stream else "memory"
+    if args.dry_run:
+        run_dry_run(args.file_path, mode, args.report, args.report_file)
+    elif args.watch:
+        if mode == "memory":
+            mode = "incremental"
+        print(f"Watching '{args.file_path}' for saves. Press Ctrl+C to stop.")
+        try:
+            SaveWatcher(args.file_path, mode, jobs, quiet_seconds=args.quiet_seconds).run(report=print_watch_results)
+        except KeyboardInterrupt:
+            pass
+    elif os.path.isdir(args.file_path):
+        print_batch_summary(clean_directory(args.file_path, mode, jobs, args.workers, use_cache=not args.no_cache))
+    else:
+        remove_all_instances_of_duplicates(args.file_path, jobs, mode)